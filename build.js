@@ -0,0 +1,38 @@
+// Précompile les composants JSX en un seul bundle minifié, servi à la place
+// de @babel/standalone quand TASK_JS_BUNDLE est actif (voir layout.html).
+//
+//   npm install && npm run build && python manage.py collectstatic
+//
+// Les fichiers sont des scripts globaux (TaskCard, TaskForm, TaskList...) :
+// ils sont concaténés dans l'ordre de chargement de layout.html puis
+// transformés en script (pas en module), les noms globaux sont conservés.
+const fs = require('fs');
+const path = require('path');
+const esbuild = require('esbuild');
+
+const root = path.join(__dirname, 'task', 'static', 'task', 'js');
+const sources = [
+    'utils/api.js',
+    'components/TaskCard.js',
+    'components/TaskForm.js',
+    'components/TaskList.js',
+    'app.js',
+];
+const output = path.join(__dirname, 'task', 'static', 'task', 'dist', 'tasks.bundle.js');
+
+const code = sources
+    .map((source) => fs.readFileSync(path.join(root, source), 'utf8'))
+    .join(';\n');
+
+const result = esbuild.transformSync(code, {
+    loader: 'jsx',
+    jsxFactory: 'React.createElement',
+    jsxFragment: 'React.Fragment',
+    minify: true,
+    target: 'es2017',
+    legalComments: 'none',
+});
+
+fs.mkdirSync(path.dirname(output), { recursive: true });
+fs.writeFileSync(output, result.code);
+console.log(`${path.relative(__dirname, output)}: ${result.code.length} octets`);
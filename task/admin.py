@@ -1,6 +1,166 @@
-from django.contrib import admin
-from .models import User, Task
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db.models import Sum
+from django.http import QueryDict
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .events import notify_task_changes
+from .models import User, Task, TaskStats
+from .shards import shard_aliases
+
+# Au-delà, le nombre de résultats d'une liste filtrée est plafonné
+ADMIN_COUNT_LIMIT = 10000
+
+
+class TaskPaginator(Paginator):
+    """Évite COUNT(*) sur toute la table à chaque page de la liste.
+
+    Sans filtre, le total vient des compteurs TaskStats (une ligne par
+    utilisateur). Avec un filtre, le comptage s'arrête à ADMIN_COUNT_LIMIT
+    lignes : les pages au-delà ne sont pas proposées, affiner le filtre.
+    """
+
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            return TaskStats.objects.using(self.object_list.db).aggregate(total=Sum('total'))['total'] or 0
+        return self.object_list.order_by()[:ADMIN_COUNT_LIMIT].count()
+
+
+def admin_shard(request):
+    """Shard affiché par l'admin des tâches : ?shard=, conservé vers les pages d'édition"""
+    aliases = shard_aliases()
+    shard = request.GET.get('shard') or QueryDict(request.GET.get('_changelist_filters', '')).get('shard')
+    return shard if shard in aliases else aliases[0]
+
+
+class ShardListFilter(admin.SimpleListFilter):
+    """Avec le partitionnement, la liste montre un shard à la fois (pas de choix « Tout »)"""
+    title = 'shard'
+    parameter_name = 'shard'
+
+    def lookups(self, request, model_admin):
+        return [(alias, alias) for alias in shard_aliases()]
+
+    def choices(self, changelist):
+        current = self.value() or shard_aliases()[0]
+        for lookup, title in self.lookup_choices:
+            yield {
+                'selected': current == lookup,
+                'query_string': changelist.get_query_string({self.parameter_name: lookup}),
+                'display': title,
+            }
+
+    def queryset(self, request, queryset):
+        # La base est choisie par TaskAdmin.get_queryset
+        return queryset
+
+
+class UserListFilter(admin.SimpleListFilter):
+    """Filtre par nom d'utilisateur saisi : ne charge pas la liste de tous les utilisateurs"""
+    title = 'user'
+    parameter_name = 'username'
+    template = 'admin/task/input_filter.html'
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.value() is None,
+            'query_string': changelist.get_query_string(remove=[self.parameter_name]),
+            'display': 'All',
+            'parameter_name': self.parameter_name,
+            'value': self.value(),
+            # Autres filtres conservés à la soumission du champ
+            'params': [(k, v) for k, v in changelist.params.items() if k != self.parameter_name],
+        }
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        # Ids résolus sur la base des utilisateurs : pas de jointure avec un shard
+        user_ids = list(User.objects.filter(username=self.value()).values_list('id', flat=True))
+        return queryset.filter(user_id__in=user_ids)
+
 
 # Register your models here.
-admin.site.register(User)
-admin.site.register(Task)
\ No newline at end of file
+@admin.register(User)
+class UserAdmin(admin.ModelAdmin):
+    # Recherche utilisée par l'autocomplétion du champ user de TaskAdmin
+    search_fields = ('username', 'email')
+    ordering = ('username',)
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('title', 'user', 'status', 'task_time', 'created_at')
+    # user__username dans la même requête que les tâches (pas de N+1)
+    list_select_related = ('user',)
+    list_filter = ('status', UserListFilter)
+    # Liste triée par clé primaire : pas de tri de toute la table sur created_at
+    ordering = ('-id',)
+    show_full_result_count = False
+    paginator = TaskPaginator
+    autocomplete_fields = ('user',)
+    actions = ('mark_done', 'delete_completed')
+
+    def get_list_filter(self, request):
+        if shard_aliases():
+            return (ShardListFilter, *self.list_filter)
+        return self.list_filter
+
+    def get_list_select_related(self, request):
+        # Pas de jointure entre un shard et la table des utilisateurs
+        return () if shard_aliases() else self.list_select_related
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if shard_aliases():
+            queryset = queryset.using(admin_shard(request)).prefetch_related('user')
+        return queryset
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        user_ids = {obj.user_id}
+        if change and 'user' in form.changed_data:
+            # Tâche réattribuée : l'ancien propriétaire la perd de sa liste
+            user_ids.add(form.initial['user'])
+        self._notify(user_ids)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        self._notify({obj.user_id})
+
+    def delete_queryset(self, request, queryset):
+        user_ids = set(queryset.values_list('user_id', flat=True).distinct())
+        super().delete_queryset(request, queryset)
+        self._notify(user_ids)
+
+    @admin.action(description="Mark selected tasks as done")
+    def mark_done(self, request, queryset):
+        pending = queryset.filter(status__in=[False])
+        user_ids = set(pending.values_list('user_id', flat=True).distinct())
+        # Un seul UPDATE ensembliste ; updated_at explicite (update() ignore auto_now)
+        updated = pending.update(status=True, updated_at=timezone.now())
+        self._notify(user_ids)
+        self.message_user(request, f"{updated} task(s) marked as done.", messages.SUCCESS)
+
+    @admin.action(description="Delete completed tasks among selected", permissions=['delete'])
+    def delete_completed(self, request, queryset):
+        completed = queryset.filter(status__in=[True])
+        user_ids = set(completed.values_list('user_id', flat=True).distinct())
+        # TaskQuerySet.delete : tombstones en masse puis un DELETE ensembliste
+        deleted, _ = completed.delete()
+        self._notify(user_ids)
+        self.message_user(request, f"{deleted} object(s) deleted.", messages.SUCCESS)
+
+    @staticmethod
+    def _notify(user_ids):
+        # Listes en cache invalidées et onglets ouverts rechargés
+        for user_id in user_ids:
+            notify_task_changes(user_id, [('reset', {})])
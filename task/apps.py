@@ -1,6 +1,27 @@
 from django.apps import AppConfig
+from django.contrib.auth import get_user_model
+from django.core import checks
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
 
 
 class TaskConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'task'
+
+    def ready(self):
+        from .checks import check_shared_caches
+        checks.register(check_shared_caches, checks.Tags.caches)
+
+        from .db import apply_sqlite_pragmas
+        connection_created.connect(apply_sqlite_pragmas, dispatch_uid='task.apply_sqlite_pragmas')
+
+        from .auth import invalidate_user_on_change
+        user_model = get_user_model()
+        post_save.connect(invalidate_user_on_change, sender=user_model, dispatch_uid='task.invalidate_user_save')
+        post_delete.connect(invalidate_user_on_change, sender=user_model, dispatch_uid='task.invalidate_user_delete')
+
+        from .shards import delete_user_data, invalidate_assignment
+        post_save.connect(invalidate_assignment, sender=user_model, dispatch_uid='task.invalidate_shard_save')
+        post_delete.connect(invalidate_assignment, sender=user_model, dispatch_uid='task.invalidate_shard_delete')
+        post_delete.connect(delete_user_data, sender=user_model, dispatch_uid='task.delete_user_shard_data')
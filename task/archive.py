@@ -0,0 +1,115 @@
+"""Archivage des tâches terminées (commande archive_tasks).
+
+Les tâches terminées depuis plus de TASK_ARCHIVE_AFTER_DAYS jours
+(updated_at) sont déplacées de task_task vers ArchivedTask par petits lots,
+chacun dans sa propre transaction courte : SQLite n'a qu'un écrivain, un
+long lot bloquerait toutes les écritures de l'application pendant sa durée.
+
+Pour la synchronisation, une tâche archivée sort de la liste comme une
+tâche supprimée (tombstone). Les compteurs TaskStats et l'index plein
+texte ne portent que sur les tâches vivantes. ?include_archived=1 sur
+/api/tasks/ relit les deux tables.
+
+Avec le partitionnement (task/shards.py), chaque shard est archivé à son tour.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import OperationalError, connections, router, transaction
+from django.utils import timezone
+
+from .events import notify_task_changes
+from .models import ArchivedTask, Task
+from .shards import each_shard
+
+ARCHIVE_BATCH_SIZE = 500
+ARCHIVE_FIELDS = ('id', 'user_id', 'title', 'description', 'status', 'task_time', 'created_at', 'updated_at')
+
+
+def archive_age():
+    return timedelta(days=getattr(settings, 'TASK_ARCHIVE_AFTER_DAYS', 30))
+
+
+def archivable_tasks(before):
+    # status__in plutôt que status=True : voir filter_tasks
+    return Task.objects.filter(status__in=[True], updated_at__lt=before)
+
+
+def archive_batch(before, batch_size=ARCHIVE_BATCH_SIZE):
+    """Déplace un lot ; retourne les ids d'utilisateurs concernés et le nombre de tâches"""
+    with transaction.atomic(using=router.db_for_write(Task)):
+        rows = list(archivable_tasks(before).order_by('id').values_list(*ARCHIVE_FIELDS)[:batch_size])
+        if not rows:
+            return set(), 0
+        now = timezone.now()
+        ArchivedTask.objects.bulk_create(
+            [ArchivedTask(**dict(zip(ARCHIVE_FIELDS, row)), archived_at=now) for row in rows],
+            ignore_conflicts=True,
+        )
+        # TaskQuerySet.delete : tombstones, puis les triggers mettent à jour TaskStats et l'index FTS
+        Task.objects.filter(id__in=[row[0] for row in rows]).delete()
+    return {row[1] for row in rows}, len(rows)
+
+
+def archive_completed(age=None, batch_size=ARCHIVE_BATCH_SIZE, pause=0.0, limit=None, progress=None):
+    """Archive par lots jusqu'à épuisement (ou ``limit`` tâches) ; retourne les métriques"""
+    before = timezone.now() - (age if age is not None else archive_age())
+    users = set()
+    batch_times = []
+    moved = 0
+    for _ in each_shard():
+        while limit is None or moved < limit:
+            size = batch_size if limit is None else min(batch_size, limit - moved)
+            started = time.perf_counter()
+            user_ids, count = archive_batch(before, size)
+            if not count:
+                break
+            batch_times.append(time.perf_counter() - started)
+            moved += count
+            # Dès le commit du lot : cache invalidé et lectures épinglées au
+            # primaire, sinon un réplica en retard remettrait l'ancienne liste
+            # en cache sous la nouvelle version
+            for user_id in user_ids:
+                notify_task_changes(user_id, [('reset', {})])
+            users |= user_ids
+            if progress:
+                progress(moved, batch_times[-1])
+            # Laisse passer les écritures de l'application entre deux lots
+            if pause:
+                time.sleep(pause)
+
+    return {
+        'moved': moved,
+        'batches': len(batch_times),
+        'users': len(users),
+        'avg_batch_ms': round(sum(batch_times) * 1000 / len(batch_times), 2) if batch_times else 0.0,
+        'max_batch_ms': round(max(batch_times) * 1000, 2) if batch_times else 0.0,
+    }
+
+
+def table_sizes():
+    """{table: (lignes, octets)} pour task_task et l'archive, tous shards confondus ;
+    octets à None sans dbstat"""
+    tables = [Task._meta.db_table, ArchivedTask._meta.db_table]
+    sizes = {table: [0, None] for table in tables}
+    for alias in each_shard():
+        for table, model in zip(tables, (Task, ArchivedTask)):
+            sizes[table][0] += model.objects.using(alias).count()
+        connection = connections[alias]
+        if connection.vendor != 'sqlite':
+            continue
+        try:
+            with connection.cursor() as cursor:
+                # Table et ses index (dbstat : SQLite compilé avec SQLITE_ENABLE_DBSTAT_VTAB)
+                cursor.execute(
+                    "SELECT m.tbl_name, SUM(d.pgsize) FROM dbstat d "
+                    "JOIN sqlite_master m ON m.name = d.name "
+                    "WHERE m.tbl_name IN (%s, %s) GROUP BY m.tbl_name",
+                    tables,
+                )
+                for table, size in cursor.fetchall():
+                    sizes[table][1] = (sizes[table][1] or 0) + size
+        except OperationalError:
+            pass
+    return {table: tuple(size) for table, size in sizes.items()}
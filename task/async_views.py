@@ -0,0 +1,276 @@
+"""Versions async des endpoints de l'API des tâches, pour un déploiement ASGI.
+
+Mêmes contrats que les vues de views.py, servis sous /api/async/tasks/ :
+validation des champs, ETag et 304 de la liste, ?stream=, lectures sur
+réplica. Les décorateurs synchrones de Django 4.2 (condition, cache_control,
+ensure_csrf_cookie) y sont refaits à la main.
+
+L'ORM est utilisé via son API async (aget, acreate, asave, aiterator) ; la
+session, l'utilisateur, le cache (invalidation, épinglage, compteurs) sont
+appelés hors de la boucle d'événements (API async du cache, sync_to_async) :
+un cache fichier ou réseau ne la bloque pas.
+
+Sous WSGI ces vues fonctionnent aussi, mais chaque requête paie alors une
+boucle d'événements : utiliser views.py.
+"""
+import asyncio
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.core.handlers.asgi import ASGIRequest
+from django.db import router
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from .cache import acached_task_list
+from .conditional import task_list_etag
+from .events import anotify_task_change, broker, format_event
+from .filters import InvalidFilter
+from .models import Task
+from .mutations import TaskConflict, parse_if_match, toggle_task, update_task
+from .pagination import InvalidCursor, page_queryset, parse_limit, parse_sort
+from .replicas import replica_reads
+from .serializers import InvalidFields, dumps, get_serializer, parse_fields, serialize_task
+from .views import (
+    STREAM_CHUNK_SIZE, _conflict_response, _list_querysets, _new_task_fields, _page_content, _stream_chunk,
+    _stream_queryset, _task_changes, _task_response,
+)
+
+def async_login_required(view):
+    """login_required pour les vues async (celui de Django 4.2 est synchrone)"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await sync_to_async(get_user)(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        request.user = user
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+async def _get_task(request, task_id):
+    try:
+        return await Task.objects.aget(id=task_id, user=request.user)
+    except Task.DoesNotExist:
+        return None
+
+
+async def _astream_tasks(queryset, serializer, ndjson):
+    """Version async de views._stream_tasks, par morceaux de STREAM_CHUNK_SIZE lignes"""
+    if not ndjson:
+        yield b'{"tasks":['
+    batch = []
+    first = True
+    async for row in serializer.rows(queryset).aiterator(chunk_size=STREAM_CHUNK_SIZE):
+        batch.append(dumps(serializer.serialize_row(row)))
+        if len(batch) >= STREAM_CHUNK_SIZE:
+            yield _stream_chunk(batch, first, ndjson)
+            first = False
+            batch = []
+    if batch:
+        yield _stream_chunk(batch, first, ndjson)
+    if not ndjson:
+        yield b']}'
+
+
+def _list_etag(request):
+    """Comme @ensure_csrf_cookie puis @condition(etag_func=task_list_etag),
+    synchrones en Django 4.2 : jeton CSRF d'abord, il entre dans l'ETag"""
+    get_token(request)
+    return quote_etag(task_list_etag(request))
+
+
+async def _list_tasks(request):
+    try:
+        fields = parse_fields(request.GET.get('fields'))
+    except InvalidFields as error:
+        return JsonResponse({"error": str(error)}, status=400)
+
+    stream = request.GET.get('stream')
+    if stream:
+        ndjson = stream == 'ndjson'
+        # Base choisie maintenant (shard, réplica) : le flux est lu après la
+        # sortie des middlewares qui posent ces contextes
+        using = await sync_to_async(router.db_for_read)(Task)
+        return StreamingHttpResponse(
+            _astream_tasks(_stream_queryset(request.user).using(using), get_serializer(fields), ndjson),
+            content_type='application/x-ndjson' if ndjson else 'application/json',
+        )
+
+    try:
+        limit = parse_limit(request.GET.get('limit'))
+    except ValueError:
+        return JsonResponse({"error": "Invalid limit"}, status=400)
+    try:
+        sort = parse_sort(request.GET.get('sort'))
+    except ValueError:
+        return JsonResponse({"error": "Invalid sort"}, status=400)
+    try:
+        # Mêmes querysets que views.api_tasks (archives comprises) : les
+        # deux vues partagent les entrées du cache de la liste
+        querysets = _list_querysets(request)
+    except InvalidFilter as error:
+        return JsonResponse({"error": str(error)}, status=400)
+
+    async def build():
+        serializer = get_serializer(fields, (sort.lstrip('-'),))
+        cursor = request.GET.get('cursor')
+        pages = [
+            [row async for row in serializer.rows(page_queryset(queryset, cursor, limit, sort))]
+            for queryset in querysets
+        ]
+        return _page_content(serializer, pages, limit, sort)
+
+    try:
+        content = await acached_task_list(request.user.pk, request.META.get('QUERY_STRING', ''), build)
+    except InvalidCursor:
+        return JsonResponse({"error": "Invalid cursor"}, status=400)
+
+    return HttpResponse(content, content_type='application/json')
+
+
+async def _create_task(request):
+    try:
+        fields = _new_task_fields(request.body)
+    except ValueError:
+        return JsonResponse({"error": "Invalid task fields"}, status=400)
+
+    task = await Task.objects.acreate(user=request.user, status=False, **fields)
+    payload = serialize_task(task)
+    await anotify_task_change(request.user.pk, 'task.created', payload)
+    return JsonResponse({"task": payload})
+
+
+@async_login_required
+@replica_reads
+async def api_tasks(request):
+    """API pour lister ou créer des tâches"""
+    if request.method == "GET":
+        etag = await sync_to_async(_list_etag)(request)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = await _list_tasks(request)
+        response.headers.setdefault('ETag', etag)
+    elif request.method == "POST":
+        response = await _create_task(request)
+    else:
+        response = JsonResponse({"error": "Invalid request method"}, status=400)
+    # Comme @cache_control(private=True, no_cache=True) de views.api_tasks
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@async_login_required
+async def api_task_delete(request, task_id):
+    if request.method == "DELETE":
+        task = await _get_task(request, task_id)
+        if task is None:
+            return JsonResponse({"success": False, "error": "Task not found"}, status=404)
+        # Task.delete enregistre la tombstone dans la même transaction
+        await task.adelete()
+        await anotify_task_change(request.user.pk, 'task.deleted', {'id': task_id})
+        return JsonResponse({"success": True, "message": "Task deleted successfully"})
+
+    return JsonResponse({"error": "Invalid request method"}, status=400)
+
+
+@async_login_required
+async def api_task_update(request, task_id):
+    if request.method in ["PUT", "PATCH"]:
+        data = json.loads(request.body)
+        try:
+            changes = _task_changes(data)
+        except ValueError:
+            return JsonResponse({"success": False, "error": "Invalid task fields"}, status=400)
+        try:
+            task = await sync_to_async(update_task)(
+                request.user.pk, task_id, changes,
+                parse_if_match(request.headers.get('If-Match')),
+            )
+        except TaskConflict as conflict:
+            return _conflict_response(conflict)
+        if task is None:
+            return JsonResponse({"success": False, "error": "Task not found"}, status=404)
+
+        await anotify_task_change(request.user.pk, 'task.updated', serialize_task(task))
+        return _task_response(task)
+
+    return JsonResponse({"error": "Invalid request method"}, status=400)
+
+
+@async_login_required
+async def api_task_toggle(request, task_id):
+    if request.method in ["PUT", "PATCH", "POST"]:
+        try:
+            task = await sync_to_async(toggle_task)(
+                request.user.pk, task_id, parse_if_match(request.headers.get('If-Match')),
+            )
+        except TaskConflict as conflict:
+            return _conflict_response(conflict)
+        if task is None:
+            return JsonResponse({"success": False, "error": "Task not found"}, status=404)
+
+        await anotify_task_change(request.user.pk, 'task.toggled', {'id': task.id, 'status': task.status})
+        return _task_response(task)
+
+    return JsonResponse({"error": "Invalid request method"}, status=400)
+
+
+@async_login_required
+async def api_task_events(request):
+    """Flux SSE des changements de tâches de l'utilisateur (ASGI uniquement).
+
+    Commentaire de heartbeat toutes les TASK_EVENTS_HEARTBEAT secondes ;
+    le flux se ferme après TASK_EVENTS_IDLE_TIMEOUT secondes sans événement,
+    et dans tous les cas après TASK_EVENTS_MAX_AGE secondes : Django 4.2 ne
+    signale pas la déconnexion du client à la vue, l'abonnement d'un onglet
+    fermé ne survit donc pas plus longtemps. EventSource se reconnecte avec
+    Last-Event-ID pour reprendre sans perte.
+    """
+    if not isinstance(request, ASGIRequest):
+        # Sous WSGI, Django consommerait le flux en entier avant de répondre
+        return JsonResponse({"error": "Live updates require the ASGI server"}, status=501)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    heartbeat = getattr(settings, 'TASK_EVENTS_HEARTBEAT', 15)
+    idle_timeout = getattr(settings, 'TASK_EVENTS_IDLE_TIMEOUT', 300)
+    max_age = getattr(settings, 'TASK_EVENTS_MAX_AGE', 900)
+    subscription = broker.subscribe(request.user.pk, last_event_id)
+
+    async def stream():
+        loop = asyncio.get_running_loop()
+        closes_at = loop.time() + max_age
+        last_activity = loop.time()
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                remaining = closes_at - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=min(heartbeat, remaining))
+                except asyncio.TimeoutError:
+                    if loop.time() - last_activity >= idle_timeout or loop.time() >= closes_at:
+                        break
+                    yield ': heartbeat\n\n'
+                    continue
+                last_activity = loop.time()
+                yield format_event(event)
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,62 @@
+"""Utilisateur connecté servi depuis le cache.
+
+Chaque requête authentifiée recharge l'utilisateur de la session
+(``ModelBackend.get_user``) : une requête SQL avant même la vue. Le
+backend ci-dessous garde l'instance en cache (TASK_USER_CACHE_ALIAS) ; elle
+est invalidée à chaque enregistrement ou suppression de l'utilisateur
+(changement de mot de passe, de profil, last_login...).
+
+Les modifications par ``User.objects.update()`` ne déclenchent pas de
+signal : appeler invalidate_cached_user() après.
+
+L'invalidation ne touche que le cache du processus qui a traité la
+modification. Avec plusieurs workers, l'alias doit être un cache partagé
+(TASK_CACHE_DIR, Redis, Memcached) : sur un cache propre au processus
+(LocMem), un mot de passe changé ou un compte désactivé resterait valide
+sur les autres workers. L'entrée n'y est donc gardée que
+TASK_USER_CACHE_LOCAL_TIMEOUT secondes, et le check task.W001 le signale
+hors DEBUG (task/checks.py).
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def user_cache():
+    return caches[getattr(settings, 'TASK_USER_CACHE_ALIAS', 'default')]
+
+
+def is_process_local(cache):
+    return isinstance(cache, LocMemCache)
+
+
+def user_cache_timeout(cache):
+    timeout = getattr(settings, 'TASK_USER_CACHE_TIMEOUT', 300)
+    if is_process_local(cache):
+        return min(timeout, getattr(settings, 'TASK_USER_CACHE_LOCAL_TIMEOUT', 10))
+    return timeout
+
+
+def _user_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    user_cache().delete(_user_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        cache = user_cache()
+        key = _user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, user_cache_timeout(cache))
+        return user
+
+
+def invalidate_user_on_change(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
@@ -0,0 +1,162 @@
+"""Outils communs aux commandes de benchmark (bench_sqlite, ...).
+
+Les mesures tournent sur une base SQLite temporaire, migrée pour l'occasion :
+la base de développement n'est jamais modifiée.
+"""
+import asyncio
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.core.management import call_command
+from django.db import OperationalError, connections
+
+from .shards import shard_aliases
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    """Débit et latences (ms) d'une série de requêtes"""
+    latencies = sorted(latencies)
+    total = len(latencies) + sum(errors.values())
+    return {
+        'requests': total,
+        'errors': dict(errors),
+        'error_rate': round(sum(errors.values()) / total, 4) if total else 0.0,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': _ms(percentile(latencies, 50)),
+        'p95_ms': _ms(percentile(latencies, 95)),
+        'p99_ms': _ms(percentile(latencies, 99)),
+    }
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+@contextmanager
+def temporary_database(alias='default', **overrides):
+    """Redirige l'alias vers un fichier SQLite neuf et migré, le temps du bloc.
+
+    ``overrides`` remplace des clés de DATABASES[alias] (CONN_MAX_AGE, ...).
+    Pour default, les shards (TASK_SHARDS) sont redirigés de la même façon.
+    """
+    connections.close_all()
+    aliases = [alias, *shard_aliases()] if alias == 'default' else [alias]
+    saved = {}
+    directory = Path(tempfile.mkdtemp(prefix='todoapp-bench-'))
+    for name in aliases:
+        settings_dict = connections.settings[name]
+        saved[name] = {key: settings_dict.get(key) for key in ['NAME', *overrides]}
+        settings_dict['NAME'] = str(directory / ('bench.sqlite3' if name == alias else f'{name}.sqlite3'))
+        settings_dict.update(overrides)
+    try:
+        for name in aliases:
+            call_command('migrate', database=name, verbosity=0)
+        yield connections.settings[alias]['NAME']
+    finally:
+        connections.close_all()
+        for name in aliases:
+            connections.settings[name].update(saved[name])
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def run_clients(setup, request, clients, requests_per_client, workers=None):
+    """Lance `clients` threads qui exécutent chacun `requests_per_client` requêtes.
+
+    setup(index) prépare l'état du thread (ex. un Client connecté) ;
+    request(state, i) exécute une requête et retourne le code HTTP.
+    `workers` borne le nombre de requêtes traitées en même temps, comme un
+    pool de threads WSGI : l'attente d'un worker compte dans la latence.
+    Retourne le résumé de summarize() ; les erreurs sont comptées par cause
+    (code HTTP >= 400, "locked" pour "database is locked", nom d'exception).
+    """
+    latencies = []
+    errors = {}
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients + 1)
+    pool = threading.Semaphore(workers) if workers else None
+
+    def worker(index):
+        local_latencies, local_errors = [], {}
+        try:
+            try:
+                state = setup(index)
+            except Exception:
+                barrier.abort()
+                raise
+            barrier.wait()
+            for i in range(requests_per_client):
+                start = time.perf_counter()
+                if pool:
+                    pool.acquire()
+                try:
+                    status = request(state, i)
+                except OperationalError as error:
+                    cause = 'locked' if 'locked' in str(error) else type(error).__name__
+                except Exception as error:
+                    cause = type(error).__name__
+                else:
+                    if status < 400:
+                        local_latencies.append(time.perf_counter() - start)
+                        continue
+                    cause = str(status)
+                finally:
+                    if pool:
+                        pool.release()
+                local_errors[cause] = local_errors.get(cause, 0) + 1
+        finally:
+            connections.close_all()
+            with lock:
+                latencies.extend(local_latencies)
+                for cause, count in local_errors.items():
+                    errors[cause] = errors.get(cause, 0) + count
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(clients)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def arun_clients(setup, request, clients, requests_per_client):
+    """Équivalent async de run_clients : `clients` coroutines sur une seule boucle.
+
+    setup(index) et request(state, i) sont des coroutines.
+    """
+    latencies = []
+    errors = {}
+
+    async def worker(state):
+        for i in range(requests_per_client):
+            start = time.perf_counter()
+            try:
+                status = await request(state, i)
+            except OperationalError as error:
+                cause = 'locked' if 'locked' in str(error) else type(error).__name__
+            except Exception as error:
+                cause = type(error).__name__
+            else:
+                if status < 400:
+                    latencies.append(time.perf_counter() - start)
+                    continue
+                cause = str(status)
+            errors[cause] = errors.get(cause, 0) + 1
+
+    states = [await setup(index) for index in range(clients)]
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(state) for state in states))
+    return summarize(latencies, errors, time.perf_counter() - start)
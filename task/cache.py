@@ -0,0 +1,138 @@
+"""Cache de la liste des tâches sérialisée, par utilisateur.
+
+Chaque utilisateur a un numéro de version ; les pages mises en cache sont
+rangées sous (utilisateur, version, variante de la requête). Toute écriture
+change la version, ce qui rend les anciennes entrées inaccessibles : elles
+sortent ensuite du cache par TTL ou par éviction LRU (alias ``tasks`` de
+CACHES).
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+HITS_KEY = 'tasks:stats:hits'
+MISSES_KEY = 'tasks:stats:misses'
+
+
+def task_cache():
+    return caches[getattr(settings, 'TASK_CACHE_ALIAS', 'tasks')]
+
+
+def _version_key(user_id):
+    return f'tasks:version:{user_id}'
+
+
+def _new_version():
+    # Jamais réutilisée : une version évincée ne peut pas ressusciter d'anciennes pages
+    return uuid.uuid4().hex
+
+
+def task_list_version(user_id):
+    cache = task_cache()
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        version = _new_version()
+        if not cache.add(_version_key(user_id), version, timeout=None):
+            version = cache.get(_version_key(user_id), version)
+    return version
+
+
+async def atask_list_version(user_id):
+    """Version async de task_list_version (API async du cache, hors de la boucle)"""
+    cache = task_cache()
+    version = await cache.aget(_version_key(user_id))
+    if version is None:
+        version = _new_version()
+        if not await cache.aadd(_version_key(user_id), version, timeout=None):
+            version = await cache.aget(_version_key(user_id), version)
+    return version
+
+
+def invalidate_task_list(user_id):
+    """À appeler après chaque écriture sur les tâches de l'utilisateur"""
+    task_cache().set(_version_key(user_id), _new_version(), timeout=None)
+
+
+def _count(key):
+    cache = task_cache()
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+async def _acount(key):
+    cache = task_cache()
+    if not await cache.aadd(key, 1, timeout=None):
+        try:
+            await cache.aincr(key)
+        except ValueError:
+            await cache.aset(key, 1, timeout=None)
+
+
+def _format_list_key(user_id, version, variant):
+    digest = hashlib.md5(variant.encode(), usedforsecurity=False).hexdigest()
+    return f'tasks:list:{user_id}:{version}:{digest}'
+
+
+def _list_key(user_id, variant):
+    return _format_list_key(user_id, task_list_version(user_id), variant)
+
+
+def cached_task_list(user_id, variant, build):
+    """Retourne le contenu sérialisé de la page, en appelant build() en cas d'absence.
+
+    ``variant`` identifie la requête (paramètres de pagination, filtres...).
+    La version est lue avant build() : une écriture concurrente range au pire
+    le résultat sous une version déjà périmée.
+    """
+    cache = task_cache()
+    key = _list_key(user_id, variant)
+
+    content = cache.get(key)
+    if content is not None:
+        _count(HITS_KEY)
+        return content
+
+    _count(MISSES_KEY)
+    content = build()
+    cache.set(key, content)
+    return content
+
+
+async def acached_task_list(user_id, variant, build):
+    """Version async de cached_task_list ; build est une coroutine.
+
+    Le cache n'est appelé que par son API async : un cache fichier ou
+    réseau ne bloque pas la boucle d'événements.
+    """
+    cache = task_cache()
+    key = _format_list_key(user_id, await atask_list_version(user_id), variant)
+
+    content = await cache.aget(key)
+    if content is not None:
+        await _acount(HITS_KEY)
+        return content
+
+    await _acount(MISSES_KEY)
+    content = await build()
+    await cache.aset(key, content)
+    return content
+
+
+def cache_stats():
+    cache = task_cache()
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / lookups, 4) if lookups else None,
+        'backend': type(cache).__name__,
+        'max_entries': getattr(cache, '_max_entries', None),
+        'timeout': cache.default_timeout,
+    }
@@ -0,0 +1,40 @@
+"""Checks de configuration (manage.py check, au démarrage du serveur)"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.checks import Warning
+
+from .auth import is_process_local
+from .replicas import replica_aliases
+
+
+def check_shared_caches(app_configs, **kwargs):
+    """Caches dont l'invalidation doit être vue par tous les workers.
+
+    Un cache LocMem est propre au processus : sessions et utilisateurs
+    invalidés par un worker resteraient valides sur les autres, chaque
+    worker appliquerait son propre budget de débit, et un épinglage au
+    primaire posé par un worker serait ignoré par les autres.
+    Sans importance en développement (un seul processus) : ignoré si DEBUG.
+    """
+    if settings.DEBUG:
+        return []
+    shared = {}
+    shared.setdefault(getattr(settings, 'TASK_USER_CACHE_ALIAS', 'default'), []).append(
+        "utilisateurs connectés (task/auth.py)")
+    if settings.SESSION_ENGINE in ('django.contrib.sessions.backends.cache',
+                                   'django.contrib.sessions.backends.cached_db'):
+        shared.setdefault(settings.SESSION_CACHE_ALIAS, []).append("sessions")
+    if getattr(settings, 'RATELIMIT_ENABLED', True):
+        shared.setdefault(getattr(settings, 'RATELIMIT_CACHE_ALIAS', 'default'), []).append(
+            "limitation de débit (task/ratelimit.py)")
+    if replica_aliases():
+        shared.setdefault(getattr(settings, 'REPLICA_PIN_CACHE_ALIAS', 'default'), []).append(
+            "épinglage au primaire (task/replicas.py)")
+    return [
+        Warning(
+            f"Le cache '{alias}' ({', '.join(usages)}) est propre à chaque processus.",
+            hint="Avec plusieurs workers, utiliser un cache partagé : TASK_CACHE_DIR, Redis ou Memcached.",
+            id='task.W001',
+        )
+        for alias, usages in shared.items() if is_process_local(caches[alias])
+    ]
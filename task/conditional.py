@@ -0,0 +1,45 @@
+"""Validateur HTTP (ETag) pour la liste des tâches.
+
+La version de la liste d'un utilisateur est dérivée de max(updated_at) et du
+nombre de tâches : une seule requête agrégée, servie par l'index
+``task_user_updated_idx``, sans lire ni sérialiser les lignes. Toute création,
+modification ou suppression change au moins l'une des deux valeurs.
+
+Pas de Last-Modified : max(updated_at) ne change pas quand une tâche est
+supprimée, et sa précision HTTP (la seconde) manque les écritures
+rapprochées. Un client qui n'enverrait que If-Modified-Since recevrait un 304
+pour une liste périmée.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+
+from .models import Task
+
+
+def task_list_version(request):
+    """(nombre de tâches, dernier updated_at), calculé une fois par requête"""
+    version = getattr(request, '_task_list_version', None)
+    if version is None:
+        version = Task.objects.filter(user=request.user).aggregate(
+            count=Count('id'), last_modified=Max('updated_at')
+        )
+        request._task_list_version = version
+    return version
+
+
+def task_list_etag(request, *args, **kwargs):
+    # Seules les lectures sont revalidées : pas de requête pour les POST
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    version = task_list_version(request)
+    # Le chemin complet distingue les pages (?cursor=, ?limit=, ?stream=) et le
+    # cookie CSRF invalide les pages HTML rendues avec un ancien jeton.
+    key = ':'.join([
+        str(request.user.pk),
+        str(version['count']),
+        str(version['last_modified']),
+        request.get_full_path(),
+        request.META.get('CSRF_COOKIE', ''),
+    ])
+    return hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()
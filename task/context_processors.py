@@ -0,0 +1,27 @@
+import logging
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+
+logger = logging.getLogger('task.assets')
+
+JS_BUNDLE = 'task/dist/tasks.bundle.js'
+
+
+@lru_cache(maxsize=None)
+def js_bundle_available():
+    """Le bundle est-il servi ? Entrée du manifeste (collectstatic), sinon fichier
+    trouvé par les finders. Vérifié une fois par processus."""
+    hashed_files = getattr(staticfiles_storage, 'hashed_files', None)
+    available = JS_BUNDLE in hashed_files if hashed_files is not None else bool(finders.find(JS_BUNDLE))
+    if not available:
+        logger.warning("TASK_JS_BUNDLE : %s introuvable (npm run build, puis collectstatic), "
+                       "retour à Babel dans le navigateur", JS_BUNDLE)
+    return available
+
+
+def assets(request):
+    """Bundle JS précompilé (production) ou JSX transpilé par Babel dans le navigateur"""
+    return {'TASK_JS_BUNDLE': getattr(settings, 'TASK_JS_BUNDLE', False) and js_bundle_available()}
@@ -0,0 +1,18 @@
+"""Profil SQLite appliqué à chaque nouvelle connexion.
+
+Les PRAGMA sont lus dans settings.SQLITE_PRAGMAS au moment de la connexion
+(voir TaskConfig.ready). Avec CONN_MAX_AGE, ils ne sont donc exécutés qu'une
+fois par connexion persistante, pas à chaque requête.
+"""
+from django.conf import settings
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
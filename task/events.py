@@ -0,0 +1,150 @@
+"""Diffusion en direct des changements de tâches (Server-Sent Events).
+
+Un broker en mémoire du processus relie les vues qui écrivent (publish) aux
+flux SSE ouverts par les onglets et appareils de l'utilisateur (subscribe).
+Chaque abonné a une file bornée : un client trop lent ne fait pas grossir la
+mémoire, il reçoit un événement ``reset`` et recharge sa liste. Les derniers
+événements de chaque utilisateur sont conservés pour reprendre un flux
+interrompu à partir de ``Last-Event-ID``.
+"""
+import asyncio
+import itertools
+import json
+import threading
+from collections import defaultdict, deque, namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .cache import invalidate_task_list
+from .replicas import pin_primary
+
+Event = namedtuple('Event', ['id', 'type', 'data'])
+
+# Demande au client de tout recharger (file débordée, historique insuffisant)
+RESET = Event(None, 'reset', {})
+
+
+def format_event(event):
+    lines = []
+    if event.id is not None:
+        lines.append(f'id: {event.id}')
+    lines.append(f'event: {event.type}')
+    lines.append(f'data: {json.dumps(event.data)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+class Subscription:
+    def __init__(self, broker, user_id, loop, maxsize):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+
+    def deliver(self, event):
+        """Appelé dans la boucle de l'abonné"""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Contre-pression : plutôt que d'accumuler, on remplace le retard
+            # par un unique reset
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESET)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class EventBroker:
+    """Pub/sub en mémoire, utilisable depuis les vues sync (threads) et async"""
+
+    def __init__(self, queue_size=100, history=200):
+        self.queue_size = queue_size
+        self.history_size = history
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+        self._history = defaultdict(lambda: deque(maxlen=self.history_size))
+        self._sequences = defaultdict(lambda: itertools.count(1))
+
+    def subscriber_count(self, user_id=None):
+        with self._lock:
+            if user_id is not None:
+                return len(self._subscribers.get(user_id, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, user_id, event_type, data):
+        with self._lock:
+            event = Event(next(self._sequences[user_id]), event_type, data)
+            self._history[user_id].append(event)
+            subscribers = list(self._subscribers.get(user_id, ()))
+
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # Boucle fermée : l'abonné est parti sans se désinscrire
+                self.unsubscribe(subscription)
+        return event
+
+    def subscribe(self, user_id, last_event_id=None):
+        """Nouvel abonné dans la boucle courante, avec rejeu depuis last_event_id"""
+        subscription = Subscription(self, user_id, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+            missed = self._missed(user_id, last_event_id)
+
+        for event in missed:
+            subscription.deliver(event)
+        return subscription
+
+    def _missed(self, user_id, last_event_id):
+        if last_event_id is None:
+            return []
+        history = self._history.get(user_id)
+        if not history:
+            # Rien en mémoire (redémarrage du serveur ?) : impossible de garantir la reprise
+            return [RESET] if last_event_id > 0 else []
+        if last_event_id > history[-1].id or last_event_id < history[0].id - 1:
+            return [RESET]
+        return [event for event in history if event.id > last_event_id]
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+
+broker = EventBroker(
+    queue_size=getattr(settings, 'TASK_EVENTS_QUEUE_SIZE', 100),
+    history=getattr(settings, 'TASK_EVENTS_HISTORY', 200),
+)
+
+
+def notify_task_changes(user_id, events):
+    """À appeler après chaque écriture : invalide le cache et publie les événements.
+
+    ``events`` est une liste de (type, données), par exemple
+    [('task.toggled', {'id': 3, 'status': True})].
+    """
+    invalidate_task_list(user_id)
+    # Lecture de ses écritures : ses prochaines lectures iront au primaire
+    pin_primary(user_id)
+    for event_type, data in events:
+        broker.publish(user_id, event_type, data)
+
+
+def notify_task_change(user_id, event_type, data):
+    notify_task_changes(user_id, [(event_type, data)])
+
+
+async def anotify_task_change(user_id, event_type, data):
+    """Pour les vues async : invalidation et épinglage appellent le cache
+    (fichier, réseau), à faire hors de la boucle d'événements"""
+    await sync_to_async(notify_task_changes)(user_id, [(event_type, data)])
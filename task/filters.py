@@ -0,0 +1,68 @@
+"""Filtres de l'API des tâches (?status=, ?task_time_*, ?created_*).
+
+Les combinaisons courantes sont servies par des index composites commençant
+par (user, status) : voir Task.Meta.indexes.
+"""
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime, parse_time
+
+STATUS_VALUES = {
+    'active': False,
+    'completed': True,
+}
+
+
+class InvalidFilter(ValueError):
+    pass
+
+
+def _parse_time(name, value):
+    parsed = parse_time(value)
+    if parsed is None:
+        raise InvalidFilter(f"Invalid {name}")
+    return parsed
+
+
+def _parse_datetime(name, value, end_of_day=False):
+    """Accepte une date-heure ISO ou une simple date (début ou fin de journée)"""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise InvalidFilter(f"Invalid {name}")
+        parsed = datetime.combine(day, time.max if end_of_day else time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def filter_tasks(queryset, params):
+    """Applique les filtres de la query string ; lève InvalidFilter si un paramètre est invalide"""
+    try:
+        status = params.get('status')
+        if status:
+            if status not in STATUS_VALUES:
+                raise InvalidFilter("Invalid status")
+            # status__in plutôt que status= : Django traduirait status=False en
+            # « NOT status », que SQLite ne sait pas chercher dans un index.
+            queryset = queryset.filter(status__in=[STATUS_VALUES[status]])
+
+        if params.get('task_time_after'):
+            queryset = queryset.filter(task_time__gte=_parse_time('task_time_after', params['task_time_after']))
+        if params.get('task_time_before'):
+            queryset = queryset.filter(task_time__lte=_parse_time('task_time_before', params['task_time_before']))
+
+        if params.get('created_after'):
+            queryset = queryset.filter(created_at__gte=_parse_datetime('created_after', params['created_after']))
+        if params.get('created_before'):
+            queryset = queryset.filter(
+                created_at__lte=_parse_datetime('created_before', params['created_before'], end_of_day=True)
+            )
+    except ValueError as error:
+        # parse_time / parse_datetime lèvent ValueError pour une valeur hors bornes
+        if isinstance(error, InvalidFilter):
+            raise
+        raise InvalidFilter("Invalid filter value")
+    return queryset
@@ -0,0 +1,55 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from task.archive import ARCHIVE_BATCH_SIZE, archive_age, archive_completed, table_sizes
+
+
+class Command(BaseCommand):
+    help = (
+        "Déplace les tâches terminées anciennes vers l'archive, par lots en "
+        "transactions courtes, et affiche la taille des tables avant et après"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help="Âge minimal (défaut : TASK_ARCHIVE_AFTER_DAYS)")
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE)
+        parser.add_argument('--pause-ms', type=int, default=50, help="Pause entre deux lots")
+        parser.add_argument('--limit', type=int, default=None, help="Nombre maximal de tâches à déplacer")
+        parser.add_argument('--json', action='store_true', help="Résultat en JSON")
+
+    def handle(self, *args, **options):
+        age = timedelta(days=options['days']) if options['days'] is not None else archive_age()
+        before = table_sizes()
+
+        def progress(moved, elapsed):
+            if not options['json']:
+                self.stdout.write(f"  {moved} tâche(s) archivée(s), lot en {elapsed * 1000:.1f} ms")
+
+        metrics = archive_completed(
+            age, options['batch_size'], options['pause_ms'] / 1000, options['limit'], progress,
+        )
+        after = table_sizes()
+        metrics['tables'] = {
+            table: {'before': {'rows': before[table][0], 'bytes': before[table][1]},
+                    'after': {'rows': after[table][0], 'bytes': after[table][1]}}
+            for table in before
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(metrics, indent=2))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"{metrics['moved']} tâche(s) archivée(s) en {metrics['batches']} lot(s) "
+            f"(moyenne {metrics['avg_batch_ms']} ms, max {metrics['max_batch_ms']} ms)"
+        ))
+        for table, sizes in metrics['tables'].items():
+            self.stdout.write(
+                f"{table}: {sizes['before']['rows']} -> {sizes['after']['rows']} lignes, "
+                f"{_size(sizes['before']['bytes'])} -> {_size(sizes['after']['bytes'])}"
+            )
+
+
+def _size(value):
+    return "?" if value is None else f"{value / 1024:.0f} Kio"
@@ -0,0 +1,108 @@
+import asyncio
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+
+from task.benchmark import arun_clients, run_clients, temporary_database
+from task.models import Task, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare les vues sync servies par WSGI (pool de workers borné) et les "
+        "vues async servies par ASGI (une boucle d'événements) sous forte "
+        "concurrence : débit et latences p50/p95/p99. Utilise une base temporaire."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=100, help="Clients simultanés")
+        parser.add_argument('--requests', type=int, default=20, help="Requêtes par client")
+        parser.add_argument('--workers', type=int, default=8, help="Threads du serveur WSGI simulé")
+        parser.add_argument(
+            '--client-delay-ms', type=int, default=20,
+            help="Temps pendant lequel un client lent garde la connexion après la réponse",
+        )
+        parser.add_argument('--json', dest='json_path', help="Écrit les résultats dans ce fichier JSON")
+
+    def handle(self, *args, **options):
+        # Mesure de capacité : la limitation de débit fausserait les résultats
+        with override_settings(RATELIMIT_ENABLED=False), temporary_database():
+            users, task_ids = self.seed(options['concurrency'])
+            cookies = []
+            for user in users:
+                client = Client()
+                client.force_login(user)
+                cookies.append(client.cookies)
+
+            results = {
+                'wsgi_sync': self.run_wsgi(options, users, task_ids, cookies),
+                'asgi_async': asyncio.run(self.run_asgi(options, users, task_ids, cookies)),
+            }
+
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:>10}: {result['throughput_rps']:>8} req/s  "
+                f"p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  p99 {result['p99_ms']} ms  "
+                f"erreurs {result['error_rate']:.2%}"
+            )
+        if options['json_path']:
+            with open(options['json_path'], 'w') as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(f"Résultats écrits dans {options['json_path']}")
+
+    def seed(self, count):
+        users = User.objects.bulk_create([User(username=f"bench-{index}") for index in range(count)])
+        Task.objects.bulk_create([Task(user=user, title=f"Task {i}") for user in users for i in range(20)])
+        task_ids = {
+            user.pk: list(Task.objects.filter(user=user).values_list('id', flat=True)) for user in users
+        }
+        return users, task_ids
+
+    @staticmethod
+    def path(prefix, ids, i):
+        # Trois lectures de la liste pour une bascule, comme TaskList.js
+        if i % 4 == 3:
+            return 'post', f"{prefix}{random.choice(ids)}/toggle/"
+        return 'get', prefix
+
+    def run_wsgi(self, options, users, task_ids, cookies):
+        delay = options['client_delay_ms'] / 1000
+
+        def setup(index):
+            client = Client()
+            client.cookies = cookies[index]
+            return client, task_ids[users[index].pk]
+
+        def request(state, i):
+            client, ids = state
+            method, path = self.path('/api/tasks/', ids, i)
+            status = getattr(client, method)(path).status_code
+            # Le worker reste occupé tant que le client lent n'a pas fini
+            time.sleep(delay)
+            return status
+
+        return run_clients(
+            setup, request, options['concurrency'], options['requests'], workers=options['workers'],
+        )
+
+    async def run_asgi(self, options, users, task_ids, cookies):
+        delay = options['client_delay_ms'] / 1000
+
+        async def setup(index):
+            client = AsyncClient()
+            client.cookies = cookies[index]
+            return client, task_ids[users[index].pk]
+
+        async def request(state, i):
+            client, ids = state
+            method, path = self.path('/api/async/tasks/', ids, i)
+            response = await getattr(client, method)(path)
+            # Un client lent n'occupe qu'une coroutine en attente
+            await asyncio.sleep(delay)
+            return response.status_code
+
+        return await arun_clients(setup, request, options['concurrency'], options['requests'])
@@ -0,0 +1,148 @@
+import json
+import logging
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections
+from django.test import Client
+from django.test.utils import override_settings
+
+from task.benchmark import summarize, temporary_database
+from task.models import Task, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure la latence des utilisateurs raisonnables (lectures et bascules "
+        "espacées) pendant qu'un client inonde l'API de bascules, sans puis avec "
+        "la limitation de débit (task/ratelimit.py). Utilise une base temporaire."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=8, help="Utilisateurs raisonnables")
+        parser.add_argument('--requests', type=int, default=100, help="Requêtes par utilisateur raisonnable")
+        parser.add_argument('--interval', type=float, default=0.1, help="Pause entre deux requêtes (s)")
+        parser.add_argument('--flood-threads', type=int, default=4, help="Connexions du client abusif")
+        parser.add_argument(
+            '--workers', type=int, default=8,
+            help="Requêtes traitées en même temps (pool de threads du serveur)",
+        )
+        parser.add_argument('--tasks', type=int, default=50, help="Tâches par utilisateur")
+        parser.add_argument('--json', dest='json_path', help="Écrit les résultats dans ce fichier JSON")
+
+    def handle(self, *args, **options):
+        phases = [
+            # Référence : pas d'abus
+            ('calm', 0, False),
+            ('flood', options['flood_threads'], False),
+            ('flood+limit', options['flood_threads'], True),
+        ]
+        # Un avertissement par 429 : illisible sous inondation
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        results = {}
+        for name, flood_threads, limited in phases:
+            with override_settings(RATELIMIT_ENABLED=limited), temporary_database():
+                results[name] = self.run_phase(options, flood_threads)
+            self.report(name, results[name])
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(f"Résultats écrits dans {options['json_path']}")
+
+    def run_phase(self, options, flood_threads):
+        users = User.objects.bulk_create([
+            User(username=f"bench-{index}") for index in range(options['users'] + 1)
+        ])
+        Task.objects.bulk_create([
+            Task(user=user, title=f"Task {i}") for user in users for i in range(options['tasks'])
+        ])
+        task_ids = {
+            user.pk: list(Task.objects.filter(user=user).values_list('id', flat=True))
+            for user in users
+        }
+        flooder, polite = users[0], users[1:]
+        server = threading.Semaphore(options['workers'])
+        stop = threading.Event()
+        latencies, errors, flood_statuses = [], {}, {}
+        lock = threading.Lock()
+
+        def send(client, ids, i):
+            # 4 lectures pour une écriture, comme l'interface
+            with server:
+                if i % 5 == 4:
+                    return client.post(f"/api/tasks/{ids[i % len(ids)]}/toggle/").status_code
+                return client.get('/api/tasks/?limit=20').status_code
+
+        def count(counter, cause):
+            with lock:
+                counter[cause] = counter.get(cause, 0) + 1
+
+        def polite_user(user):
+            client = Client()
+            client.force_login(user)
+            try:
+                for i in range(options['requests']):
+                    start = time.perf_counter()
+                    try:
+                        status = send(client, task_ids[user.pk], i)
+                    except OperationalError as error:
+                        count(errors, 'locked' if 'locked' in str(error) else type(error).__name__)
+                    else:
+                        if status < 400:
+                            with lock:
+                                latencies.append(time.perf_counter() - start)
+                        else:
+                            count(errors, str(status))
+                    time.sleep(options['interval'])
+            finally:
+                connections.close_all()
+
+        def flood(session_cookies):
+            # Même session que les autres connexions du client abusif
+            client = Client()
+            client.cookies.update(session_cookies)
+            ids = task_ids[flooder.pk]
+            i = 0
+            try:
+                while not stop.is_set():
+                    with server:
+                        try:
+                            status = client.post(f"/api/tasks/{ids[i % len(ids)]}/toggle/").status_code
+                        except OperationalError:
+                            status = 'locked'
+                    count(flood_statuses, str(status))
+                    i += 1
+            finally:
+                connections.close_all()
+
+        # Un seul client (une session) réparti sur plusieurs connexions
+        flood_client = Client()
+        flood_client.force_login(flooder)
+        flooders = [
+            threading.Thread(target=flood, args=(flood_client.cookies,)) for _ in range(flood_threads)
+        ]
+        politeness = [threading.Thread(target=polite_user, args=(user,)) for user in polite]
+        for thread in flooders:
+            thread.start()
+        start = time.perf_counter()
+        for thread in politeness:
+            thread.start()
+        for thread in politeness:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        for thread in flooders:
+            thread.join()
+
+        result = summarize(latencies, errors, elapsed)
+        result['flood'] = flood_statuses
+        return result
+
+    def report(self, name, result):
+        self.stdout.write(
+            f"{name:>12}: p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  "
+            f"p99 {result['p99_ms']} ms  erreurs {result['error_rate']:.2%}  "
+            f"client abusif {result['flood'] or '-'}"
+        )
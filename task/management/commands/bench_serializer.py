@@ -0,0 +1,97 @@
+import json
+import statistics
+import time as clock
+from datetime import time
+
+from django.core.management.base import BaseCommand
+
+from task.benchmark import temporary_database
+from task.models import Task, User
+from task.serializers import DEFAULT_FIELDS, dumps, get_serializer, orjson
+
+MOBILE_FIELDS = ('id', 'title', 'status', 'task_time')
+
+
+def legacy_page(queryset):
+    """Ancienne sérialisation des listes : une instance et un dict écrit à la main par ligne"""
+    return json.dumps({'tasks': [
+        {
+            'id': task.id,
+            'title': task.title,
+            'description': task.description,
+            'created_at': task.created_at.isoformat(),
+            'status': task.status,
+            'task_time': task.task_time.strftime('%H:%M') if task.task_time else None,
+        }
+        for task in queryset
+    ]}).encode()
+
+
+def serializer_page(queryset, fields, encode):
+    serializer = get_serializer(fields)
+    return encode({'tasks': serializer.serialize_rows(serializer.rows(queryset))})
+
+
+def stdlib_dumps(data):
+    return json.dumps(data, separators=(',', ':')).encode()
+
+
+class Command(BaseCommand):
+    help = (
+        "Microbenchmark de la sérialisation des listes de tâches (lecture SQL "
+        "comprise) : ancienne méthode par instance, sérialiseur values_list "
+        "avec tous les champs ou ?fields= mobile, json standard ou orjson. "
+        "Résultats en ms pour 10 000 tâches. Utilise une base temporaire."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--json', dest='json_path', help="Écrit les résultats dans ce fichier JSON")
+
+    def handle(self, *args, **options):
+        variants = [
+            ('legacy', lambda qs: legacy_page(qs)),
+            ('values_json', lambda qs: serializer_page(qs, DEFAULT_FIELDS, stdlib_dumps)),
+            ('values_mobile_json', lambda qs: serializer_page(qs, MOBILE_FIELDS, stdlib_dumps)),
+        ]
+        if orjson is not None:
+            variants += [
+                ('values_orjson', lambda qs: serializer_page(qs, DEFAULT_FIELDS, dumps)),
+                ('values_mobile_orjson', lambda qs: serializer_page(qs, MOBILE_FIELDS, dumps)),
+            ]
+
+        results = {}
+        with temporary_database():
+            user = User.objects.create(username="bench")
+            Task.objects.bulk_create(
+                Task(
+                    user=user, title=f"Task {i}", description="Lorem ipsum dolor sit amet " * 4,
+                    status=i % 3 == 0, task_time=time(i % 24, i % 60) if i % 2 else None,
+                )
+                for i in range(options['tasks'])
+            )
+            queryset = Task.objects.filter(user=user).order_by('-created_at', '-id')
+
+            for name, render in variants:
+                timings = []
+                for _ in range(options['repeat']):
+                    started = clock.perf_counter()
+                    content = render(queryset.all())
+                    timings.append(clock.perf_counter() - started)
+                per_10k = 10000 / options['tasks'] * 1000
+                results[name] = {
+                    'median_ms_per_10k': round(statistics.median(timings) * per_10k, 1),
+                    'best_ms_per_10k': round(min(timings) * per_10k, 1),
+                    'bytes_per_task': round(len(content) / options['tasks'], 1),
+                }
+                self.stdout.write(
+                    f"{name:>22}: médiane {results[name]['median_ms_per_10k']:>7} ms / 10k  "
+                    f"meilleur {results[name]['best_ms_per_10k']:>7} ms  "
+                    f"{results[name]['bytes_per_task']} octets/tâche"
+                )
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(f"Résultats écrits dans {options['json_path']}")
@@ -0,0 +1,156 @@
+import json
+import logging
+import multiprocessing
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+from django.test import Client
+from django.test.utils import override_settings
+
+from task.benchmark import summarize, temporary_database
+from task.models import Task, User
+from task.shards import using_user_shard
+
+
+def _worker(users, task_ids, requests, operations, barrier, results):
+    """Processus client : bascule des tâches de ses utilisateurs à tour de rôle"""
+    clients = []
+    for user in users:
+        client = Client()
+        client.force_login(user)
+        clients.append((client, task_ids[user.pk]))
+    latencies, errors = [], {}
+    barrier.wait()
+    for i in range(requests):
+        client, ids = clients[i % len(clients)]
+        start = time.perf_counter()
+        try:
+            if operations > 1:
+                # Une transaction plus longue : api_tasks_bulk
+                body = json.dumps({'operations': [
+                    {'op': 'toggle', 'id': ids[(i + offset) % len(ids)]} for offset in range(operations)
+                ]})
+                status = client.post('/api/tasks/bulk/', body, content_type='application/json').status_code
+            else:
+                status = client.post(f"/api/tasks/{ids[i % len(ids)]}/toggle/").status_code
+        except OperationalError as error:
+            cause = 'locked' if 'locked' in str(error) else type(error).__name__
+        else:
+            if status < 400:
+                latencies.append(time.perf_counter() - start)
+                continue
+            cause = str(status)
+        errors[cause] = errors.get(cause, 0) + 1
+    connections.close_all()
+    results.put((latencies, errors))
+
+
+class Command(BaseCommand):
+    help = (
+        "Débit d'écriture selon le nombre de shards : des processus clients "
+        "basculent les tâches de leurs utilisateurs (api_task_toggle) sur une "
+        "base temporaire partitionnée en 1, 2, 4... fichiers SQLite. Des "
+        "processus et non des threads : le GIL masquerait le verrou d'écriture."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shards', default='1,2,4', help="Nombres de shards à comparer")
+        parser.add_argument('--processes', type=int, default=8, help="Processus clients")
+        parser.add_argument('--users', type=int, default=32)
+        parser.add_argument('--requests', type=int, default=300, help="Requêtes par processus")
+        parser.add_argument('--tasks', type=int, default=20, help="Tâches par utilisateur")
+        parser.add_argument(
+            '--operations', type=int, default=1,
+            help="Bascules par requête (> 1 : une requête bulk, une transaction)",
+        )
+        parser.add_argument(
+            '--synchronous', default=None,
+            help="PRAGMA synchronous des bases (ex. full : un fsync par validation)",
+        )
+        parser.add_argument('--json', dest='json_path', help="Écrit les résultats dans ce fichier JSON")
+
+    def handle(self, *args, **options):
+        try:
+            counts = [int(count) for count in options['shards'].split(',')]
+        except ValueError:
+            raise CommandError("--shards : liste d'entiers, ex. 1,2,4")
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            raise CommandError("Ce benchmark a besoin de multiprocessing fork (Linux, macOS)")
+
+        if options['users'] < options['processes']:
+            raise CommandError("--users doit être au moins égal à --processes")
+        sqlite_pragmas = dict(settings.SQLITE_PRAGMAS)
+        if options['synchronous']:
+            sqlite_pragmas['synchronous'] = options['synchronous']
+
+        # Erreurs et requêtes lentes sont comptées ici : pas de trace par requête
+        for name in ('django.request', 'task.timing'):
+            logging.getLogger(name).setLevel(logging.CRITICAL)
+
+        results = {}
+        for count in counts:
+            aliases = [f'bench-shard{index}' for index in range(count)]
+            for alias in aliases:
+                # Mêmes réglages que default ; temporary_database les redirige vers des fichiers neufs
+                connections.settings[alias] = dict(connections.settings['default'])
+            try:
+                with override_settings(TASK_SHARDS=aliases, SQLITE_PRAGMAS=sqlite_pragmas,
+                                       RATELIMIT_ENABLED=False), temporary_database():
+                    results[count] = self.run_workload(options)
+            finally:
+                for alias in aliases:
+                    # La connexion en cache garde le NAME restauré (celui de default)
+                    del connections[alias]
+                    del connections.settings[alias]
+            result = results[count]
+            self.stdout.write(
+                f"{count} shard(s) : {result['throughput_rps']:>8} écritures/s  "
+                f"p50 {result['p50_ms']} ms  p99 {result['p99_ms']} ms  erreurs {result['error_rate']:.2%}"
+            )
+        base = results[counts[0]]['throughput_rps']
+        if base:
+            self.stdout.write("Accélération : " + ", ".join(
+                f"{count} -> x{results[count]['throughput_rps'] / base:.2f}" for count in counts
+            ))
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(f"Résultats écrits dans {options['json_path']}")
+
+    def run_workload(self, options):
+        users = User.objects.bulk_create([User(username=f"bench-{index}") for index in range(options['users'])])
+        task_ids = {}
+        for user in users:
+            with using_user_shard(user):
+                Task.objects.bulk_create([Task(user=user, title=f"Task {i}") for i in range(options['tasks'])])
+                task_ids[user.pk] = list(Task.objects.filter(user=user).values_list('id', flat=True))
+
+        # Rien d'ouvert au moment du fork : chaque processus a ses connexions
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        processes_count = options['processes']
+        barrier = context.Barrier(processes_count + 1)
+        queue = context.Queue()
+        processes = [
+            context.Process(target=_worker, args=(
+                users[index::processes_count], task_ids, options['requests'], options['operations'], barrier, queue,
+            ))
+            for index in range(processes_count)
+        ]
+        for process in processes:
+            process.start()
+        barrier.wait()
+        start = time.perf_counter()
+        latencies, errors = [], {}
+        for _ in processes:
+            process_latencies, process_errors = queue.get()
+            latencies.extend(process_latencies)
+            for cause, count in process_errors.items():
+                errors[cause] = errors.get(cause, 0) + count
+        elapsed = time.perf_counter() - start
+        for process in processes:
+            process.join()
+        return summarize(latencies, errors, elapsed)
@@ -0,0 +1,74 @@
+import json
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+
+from task.benchmark import run_clients, temporary_database
+from task.models import Task, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le débit et le taux d'erreurs 'database is locked' de N threads "
+        "qui basculent des tâches (api_task_toggle), avec les réglages SQLite par "
+        "défaut puis avec le profil SQLITE_PRAGMAS. Utilise une base temporaire."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=200, help="Requêtes par thread")
+        parser.add_argument('--tasks', type=int, default=20, help="Tâches par utilisateur")
+        parser.add_argument('--json', dest='json_path', help="Écrit les résultats dans ce fichier JSON")
+
+    def handle(self, *args, **options):
+        profiles = [
+            # Avant : SQLite par défaut (journal rollback, synchronous=FULL),
+            # une connexion par requête
+            ('default', {}, 0),
+            # Après : profil de settings.py et connexions persistantes
+            ('tuned', settings.SQLITE_PRAGMAS, settings.DATABASES['default'].get('CONN_MAX_AGE', 0)),
+        ]
+        results = {}
+        for name, pragmas, conn_max_age in profiles:
+            with override_settings(SQLITE_PRAGMAS=pragmas, RATELIMIT_ENABLED=False), \
+                    temporary_database(CONN_MAX_AGE=conn_max_age):
+                results[name] = self.run_profile(options)
+            self.report(name, results[name])
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(f"Résultats écrits dans {options['json_path']}")
+
+    def run_profile(self, options):
+        users = User.objects.bulk_create([
+            User(username=f"bench-{index}") for index in range(options['threads'])
+        ])
+        Task.objects.bulk_create([
+            Task(user=user, title=f"Task {i}") for user in users for i in range(options['tasks'])
+        ])
+        task_ids = {
+            user.pk: list(Task.objects.filter(user=user).values_list('id', flat=True))
+            for user in users
+        }
+
+        def setup(index):
+            client = Client()
+            client.force_login(users[index])
+            return client, task_ids[users[index].pk]
+
+        def toggle(state, i):
+            client, ids = state
+            return client.post(f"/api/tasks/{random.choice(ids)}/toggle/").status_code
+
+        return run_clients(setup, toggle, options['threads'], options['requests'])
+
+    def report(self, name, result):
+        self.stdout.write(
+            f"{name:>8}: {result['throughput_rps']:>8} req/s  "
+            f"erreurs {result['error_rate']:.2%} {result['errors'] or ''}  "
+            f"p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  p99 {result['p99_ms']} ms"
+        )
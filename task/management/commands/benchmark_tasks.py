@@ -0,0 +1,164 @@
+import json
+import platform
+import threading
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from task.benchmark import run_clients, temporary_database
+from task.models import Task, User
+
+SEED_BATCH_SIZE = 5000
+
+# Scénario -> (méthode, chemin) ; {id} est remplacé par une tâche de l'utilisateur
+SCENARIOS = {
+    'list': ('get', '/api/tasks/'),
+    'page': ('get', '/task/'),
+    'toggle': ('post', '/api/tasks/{id}/toggle/'),
+    'update': ('patch', '/api/tasks/{id}/update/'),
+    'delete': ('delete', '/api/tasks/{id}/delete/'),
+}
+
+# Indicateurs comparés à --baseline : une hausse au-delà de la tolérance est une régression
+COMPARED_METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request')
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère des utilisateurs et des tâches (bulk_create) dans une base "
+        "temporaire, puis mesure les routes de l'application avec des clients "
+        "concurrents : débit, latences p50/p95/p99 et requêtes SQL par requête."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--tasks', type=int, default=1000, help="Tâches par utilisateur")
+        parser.add_argument('--clients', type=int, default=8, help="Clients concurrents")
+        parser.add_argument('--requests', type=int, default=50, help="Requêtes par client et par scénario")
+        parser.add_argument(
+            '--scenario', action='append', choices=sorted(SCENARIOS),
+            help="Scénario à exécuter (répétable, tous par défaut)",
+        )
+        parser.add_argument('--output', help="Écrit les résultats dans ce fichier JSON")
+        parser.add_argument('--baseline', help="Compare aux résultats JSON d'une exécution précédente")
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help="Hausse relative tolérée par rapport à --baseline (0.2 = +20%%)",
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] > options['tasks'] and 'delete' in (options['scenario'] or SCENARIOS):
+            raise CommandError("--requests ne peut pas dépasser --tasks pour le scénario delete")
+
+        scenarios = options['scenario'] or list(SCENARIOS)
+        results = {
+            'meta': {
+                'date': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                **{key: options[key] for key in ('users', 'tasks', 'clients', 'requests')},
+            },
+            'scenarios': {},
+        }
+
+        # Mesure de capacité : la limitation de débit fausserait les résultats
+        with override_settings(RATELIMIT_ENABLED=False), temporary_database():
+            users = self.seed(options['users'], options['tasks'])
+            for name in scenarios:
+                result = self.run_scenario(name, users, options)
+                results['scenarios'][name] = result
+                self.stdout.write(
+                    f"{name:>8}: {result['throughput_rps']:>8} req/s  "
+                    f"p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  p99 {result['p99_ms']} ms  "
+                    f"{result['queries_per_request']} SQL/req  erreurs {result['error_rate']:.2%}"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(f"Résultats écrits dans {options['output']}")
+
+        if options['baseline']:
+            regressions = self.compare(options['baseline'], results, options['tolerance'])
+            if regressions:
+                raise CommandError(f"{len(regressions)} régression(s) par rapport à {options['baseline']}")
+
+    def seed(self, user_count, tasks_per_user):
+        users = User.objects.bulk_create([User(username=f"bench-{index}") for index in range(user_count)])
+        batch = []
+        for user in users:
+            for i in range(tasks_per_user):
+                batch.append(Task(user=user, title=f"Task {i}", description="Benchmark task"))
+                if len(batch) >= SEED_BATCH_SIZE:
+                    Task.objects.bulk_create(batch)
+                    batch = []
+        if batch:
+            Task.objects.bulk_create(batch)
+        self.stdout.write(f"{user_count} utilisateur(s) × {tasks_per_user} tâche(s) générés")
+        return users
+
+    def run_scenario(self, name, users, options):
+        method, path = SCENARIOS[name]
+        clients = options['clients']
+        queries = {'count': 0}
+        lock = threading.Lock()
+
+        # Chaque client a son propre lot de tâches (un delete ne vise jamais deux fois la même)
+        task_ids = {
+            user.pk: list(Task.objects.filter(user=user).order_by('id').values_list('id', flat=True))
+            for user in users
+        }
+
+        def setup(index):
+            user = users[index % len(users)]
+            client = Client()
+            client.force_login(user)
+            sharing = range(index % len(users), clients, len(users))
+            ids = task_ids[user.pk][sharing.index(index)::len(sharing)]
+            return client, ids
+
+        def count_queries(execute, sql, params, many, context):
+            with lock:
+                queries['count'] += 1
+            return execute(sql, params, many, context)
+
+        def request(state, i):
+            client, ids = state
+            url = path.format(id=ids[i % len(ids)]) if '{id}' in path else path
+            kwargs = {'content_type': 'application/json', 'data': json.dumps({'title': f"Renamed {i}"})} \
+                if method == 'patch' else {}
+            # Toutes les bases (shards, réplicas, sessions), pas seulement default
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(count_queries))
+                return getattr(client, method)(url, **kwargs).status_code
+
+        result = run_clients(setup, request, clients, options['requests'])
+        result['queries_per_request'] = round(queries['count'] / result['requests'], 2) if result['requests'] else 0
+        return result
+
+    def compare(self, baseline_path, results, tolerance):
+        with open(baseline_path) as baseline_file:
+            baseline = json.load(baseline_file)['scenarios']
+
+        regressions = []
+        for name, result in results['scenarios'].items():
+            before = baseline.get(name)
+            if not before:
+                continue
+            for metric in COMPARED_METRICS:
+                old, new = before.get(metric), result.get(metric)
+                if not old or new is None:
+                    continue
+                change = (new - old) / old
+                if change > tolerance:
+                    regressions.append((name, metric))
+                    self.stdout.write(self.style.ERROR(
+                        f"RÉGRESSION {name}.{metric} : {old} -> {new} ({change:+.0%})"
+                    ))
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS("Aucune régression par rapport à la référence"))
+        return regressions
@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from task.sync import compact_tombstones, tombstone_retention
+
+
+class Command(BaseCommand):
+    help = "Supprime les tombstones de tâches plus anciennes que la rétention configurée"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help="Rétention en jours (défaut : TASK_TOMBSTONE_RETENTION_DAYS)",
+        )
+
+    def handle(self, *args, **options):
+        retention = timedelta(days=options['days']) if options['days'] is not None else tombstone_retention()
+        deleted = compact_tombstones(retention)
+        self.stdout.write(self.style.SUCCESS(
+            f"{deleted} tombstone(s) supprimée(s) (rétention : {retention.days} jours)"
+        ))
@@ -0,0 +1,41 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from task.models import Task, User
+from task.shards import each_shard, shard_for
+from task.transfer import FORMATS, export_tasks
+
+
+class Command(BaseCommand):
+    help = "Exporte les tâches en NDJSON ou CSV (lecture par morceaux, mémoire constante)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=FORMATS, default='ndjson')
+        parser.add_argument('--user', help="Nom d'utilisateur (tous par défaut)")
+        parser.add_argument('--output', help="Fichier de sortie (défaut : sortie standard)")
+
+    def handle(self, *args, **options):
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"Utilisateur inconnu : {options['user']}")
+            querysets = [Task.objects.using(shard_for(user)).filter(user=user)]
+        else:
+            # Un queryset par shard (default seul sans partitionnement)
+            querysets = [Task.objects.using(alias) for alias in each_shard()]
+
+        output = open(options['output'], 'w', newline='') if options['output'] else sys.stdout
+        count = 0
+        try:
+            for line in export_tasks(querysets, options['format']):
+                output.write(line)
+                count += 1
+        finally:
+            if options['output']:
+                output.close()
+
+        if options['output']:
+            if options['format'] == 'csv':
+                count -= 1  # en-tête
+            self.stderr.write(f"{count} tâche(s) exportée(s) dans {options['output']}")
@@ -0,0 +1,75 @@
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from task.models import User
+from task.transfer import FORMATS, IMPORT_BATCH_SIZE, InvalidRecord, import_tasks, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        "Importe des tâches depuis un fichier NDJSON ou CSV, par lots "
+        "transactionnels. Un point de reprise est écrit après chaque lot : "
+        "relancer avec --resume pour continuer un import interrompu."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help="Fichier à importer ('-' pour l'entrée standard)")
+        parser.add_argument('--format', choices=FORMATS, default=None, help="Défaut : d'après l'extension")
+        parser.add_argument('--user', help="Attribue toutes les tâches à cet utilisateur (sinon champ 'user')")
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--checkpoint', help="Fichier de reprise (défaut : <input>.checkpoint)")
+        parser.add_argument('--resume', action='store_true', help="Reprend après le dernier lot validé")
+
+    def handle(self, *args, **options):
+        path = options['input']
+        fmt = options['format'] or ('csv' if path.endswith('.csv') else 'ndjson')
+        checkpoint = options['checkpoint'] or (f"{path}.checkpoint" if path != '-' else None)
+
+        user = None
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"Utilisateur inconnu : {options['user']}")
+
+        skip = 0
+        if options['resume']:
+            if not checkpoint or not os.path.exists(checkpoint):
+                raise CommandError("Aucun point de reprise trouvé")
+            with open(checkpoint) as saved:
+                skip = int(saved.read().strip() or 0)
+            self.stdout.write(f"Reprise après {skip} enregistrement(s)")
+
+        started = time.perf_counter()
+
+        def save_checkpoint(processed):
+            if checkpoint:
+                # Écriture atomique : le point de reprise n'est jamais à moitié écrit
+                with open(f"{checkpoint}.tmp", 'w') as output:
+                    output.write(str(processed))
+                os.replace(f"{checkpoint}.tmp", checkpoint)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"  {processed} enregistrement(s) validé(s) ({(processed - skip) / elapsed:.0f}/s)")
+
+        source = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            imported = import_tasks(
+                read_records(source, fmt),
+                user=user,
+                batch_size=options['batch_size'],
+                skip=skip,
+                on_batch=save_checkpoint,
+            )
+        except InvalidRecord as error:
+            raise CommandError(f"{error} — relancer avec --resume après correction")
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+        if checkpoint and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(
+            f"{imported} tâche(s) importée(s) en {time.perf_counter() - started:.1f} s"
+        ))
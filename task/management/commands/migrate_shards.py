@@ -0,0 +1,18 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from task.shards import shard_aliases
+
+
+class Command(BaseCommand):
+    help = (
+        "Applique les migrations à la base default puis à chaque shard "
+        "(TASK_SHARDS). Les shards ne reçoivent que les tables des tâches."
+    )
+
+    def handle(self, *args, **options):
+        if not shard_aliases():
+            raise CommandError("Aucun shard configuré (TASK_SHARDS)")
+        for alias in ['default', *shard_aliases()]:
+            self.stdout.write(f"== {alias}")
+            call_command('migrate', database=alias, verbosity=options['verbosity'])
@@ -0,0 +1,81 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from task.models import User
+from task.shards import hash_shard, move_user, purge_user, shard_aliases, shard_for, user_locations
+
+
+class Command(BaseCommand):
+    help = (
+        "Déplace les tâches des utilisateurs vers leur shard : celui donné par "
+        "--to, sinon leur shard fixé (User.shard), sinon celui du hachage de "
+        "leur id. À lancer après un changement de TASK_SHARDS ; reprend aussi "
+        "les tâches restées dans default et nettoie les copies laissées par un "
+        "déplacement interrompu."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Nom d'utilisateur (tous par défaut)")
+        parser.add_argument('--to', help="Shard de destination (avec --user)")
+        parser.add_argument('--dry-run', action='store_true', help="Affiche les déplacements sans rien écrire")
+
+    def handle(self, *args, **options):
+        aliases = shard_aliases()
+        if not aliases:
+            raise CommandError("Aucun shard configuré (TASK_SHARDS)")
+        if options['to'] and not options['user']:
+            raise CommandError("--to s'utilise avec --user")
+        if options['to'] and options['to'] not in aliases:
+            raise CommandError(f"Shard inconnu : {options['to']} (shards : {', '.join(aliases)})")
+
+        if options['user']:
+            users = User.objects.filter(username=options['user'])
+            if not users.exists():
+                raise CommandError(f"Utilisateur inconnu : {options['user']}")
+        else:
+            users = User.objects.order_by('pk')
+
+        # Tâches d'avant le partitionnement : encore dans default
+        locations = user_locations(['default', *aliases])
+        started = time.perf_counter()
+        moved_users = moved_tasks = 0
+        for user in users.iterator():
+            target = options['to'] or (user.shard if user.shard in aliases else hash_shard(user.pk))
+            found = locations.get(user.pk, set())
+            current = shard_for(user)
+            if found - {target}:
+                if target in found and current == target:
+                    # Déplacement interrompu après l'affectation : copies périmées
+                    source = None
+                elif current in found:
+                    source = current
+                elif len(found) == 1:
+                    source = next(iter(found))
+                else:
+                    self.stderr.write(
+                        f"{user.username} : tâches dans {', '.join(sorted(found))}, source ambiguë ; "
+                        f"utiliser --user {user.username} --to <shard> après vérification"
+                    )
+                    continue
+
+                if source:
+                    self.stdout.write(f"{user.username} : {source} -> {target}")
+                    if not options['dry_run']:
+                        moved_tasks += move_user(user, source, target)
+                    moved_users += 1
+                for stale in found - {target, source}:
+                    self.stdout.write(f"{user.username} : copie périmée supprimée de {stale}")
+                    if not options['dry_run']:
+                        with transaction.atomic(using=stale):
+                            purge_user(user.pk, stale)
+            elif current != target and not options['dry_run']:
+                # Pas de tâches ailleurs : seule l'affectation change
+                user.shard = None if target == hash_shard(user.pk) else target
+                user.save(update_fields=['shard'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{moved_users} utilisateur(s), {moved_tasks} tâche(s) déplacé(s) "
+            f"en {time.perf_counter() - started:.2f} s"
+        ))
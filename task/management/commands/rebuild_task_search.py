@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from task.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index plein texte des tâches (FTS5), une transaction par base"
+
+    def handle(self, *args, **options):
+        indexed = rebuild_index(
+            progress=lambda alias, count: self.stdout.write(f"{alias} : {count} tâche(s) indexée(s)..."),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Index reconstruit : {indexed} tâche(s)"))
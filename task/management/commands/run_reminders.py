@@ -0,0 +1,53 @@
+import json
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from task.reminders import get_backend, purge_reminders, run_reminders
+
+PURGE_INTERVAL = 3600  # secondes
+
+
+class Command(BaseCommand):
+    help = (
+        "Planificateur des rappels de tâches : envoie les rappels des tâches "
+        "actives dont l'heure (task_time) est atteinte, par lots, via "
+        "TASK_REMINDER_BACKEND. Tourne en boucle, ou une seule fois avec --once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Un seul passage puis sortie (cron)")
+        parser.add_argument('--interval', type=float, default=30, help="Secondes entre deux passages")
+        parser.add_argument('--lookback', type=int, default=None, help="Rattrapage en secondes (défaut : TASK_REMINDER_LOOKBACK)")
+        parser.add_argument('--lead', type=int, default=None, help="Avance en secondes (défaut : TASK_REMINDER_LEAD)")
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--json', action='store_true', help="Métriques de chaque passage en JSON")
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        last_purge = None
+        while True:
+            metrics = run_reminders(
+                backend, lookback=options['lookback'], lead=options['lead'], batch_size=options['batch_size'],
+            )
+            self.report(metrics, options['json'])
+
+            if last_purge is None or time.monotonic() - last_purge >= PURGE_INTERVAL:
+                purge_reminders(timedelta(days=2))
+                last_purge = time.monotonic()
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+    def report(self, metrics, as_json):
+        if as_json:
+            self.stdout.write(json.dumps(metrics))
+            return
+        self.stdout.write(
+            f"{metrics['sent']} rappel(s) envoyé(s), {metrics['skipped']} déjà envoyé(s), "
+            f"{metrics['batches']} lot(s) en {metrics['elapsed_s']} s "
+            f"({metrics['throughput_per_s']} échéances/s, {metrics['per_batch_ms']} ms/lot), "
+            f"retard max {metrics['max_lag_s']} s, moyen {metrics['avg_lag_s']} s"
+        )
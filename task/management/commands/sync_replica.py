@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from task.replicas import beat, copy_sqlite_replica, measure_lag, replica_aliases
+
+
+class Command(BaseCommand):
+    help = (
+        "Écrit le battement de réplication (ReplicaHeartbeat) sur le primaire. "
+        "Les réplicas SQLite (développement) sont en plus recopiés depuis le "
+        "primaire ; les autres moteurs répliquent eux-mêmes. Tourne en boucle, "
+        "ou une seule fois avec --once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Un seul passage puis sortie")
+        parser.add_argument('--interval', type=float, default=1, help="Secondes entre deux passages")
+
+    def handle(self, *args, **options):
+        aliases = replica_aliases()
+        if not aliases:
+            raise CommandError("Aucun réplica configuré (DB_REPLICA_NAME)")
+        while True:
+            start = time.perf_counter()
+            beat()
+            for alias in aliases:
+                if connections[alias].vendor == 'sqlite':
+                    copy_sqlite_replica(alias)
+            lags = ', '.join(f"{alias} {measure_lag(alias)} s" for alias in aliases)
+            self.stdout.write(f"battement en {(time.perf_counter() - start) * 1000:.1f} ms, retard : {lags}")
+            if options['once']:
+                break
+            time.sleep(options['interval'])
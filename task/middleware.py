@@ -0,0 +1,138 @@
+"""Mesure du temps passé par requête : SQL, vue et rendu des templates.
+
+Les durées sont exposées dans l'en-tête ``Server-Timing`` (visible dans
+l'onglet Réseau du navigateur) et les requêtes plus lentes que
+REQUEST_TIMING_SLOW_MS sont écrites dans le logger ``task.timing`` sous
+forme d'une ligne JSON.
+
+Avec REQUEST_TIMING_SAMPLE_RATE < 1, seule une fraction des requêtes est
+instrumentée en détail ; les autres ne mesurent que leur durée totale
+(un appel à perf_counter), ce qui permet de laisser le middleware actif en
+charge.
+"""
+import json
+import logging
+import random
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('task.timing')
+
+
+class RequestTimings:
+    __slots__ = ('queries', 'sql', 'render', 'render_started')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql = 0.0
+        self.render = 0.0
+        self.render_started = None
+
+    def __call__(self, execute, sql, params, many, context):
+        """Wrapper d'exécution SQL (connection.execute_wrapper)"""
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql += perf_counter() - started
+            self.queries += 1
+
+    def render_done(self, response):
+        self.render = perf_counter() - self.render_started
+
+
+class RequestTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'REQUEST_TIMING_SAMPLE_RATE', 1.0)
+        self.slow_ms = getattr(settings, 'REQUEST_TIMING_SLOW_MS', 500)
+        self.header = getattr(settings, 'REQUEST_TIMING_HEADER', True)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _sampled(self):
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    @staticmethod
+    def _install(timings):
+        for connection in connections.all():
+            connection.execute_wrappers.append(timings)
+
+    @staticmethod
+    def _uninstall(timings):
+        for connection in connections.all():
+            if timings in connection.execute_wrappers:
+                connection.execute_wrappers.remove(timings)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timings = RequestTimings() if self._sampled() else None
+        started = perf_counter()
+        if timings:
+            request._timings = timings
+            self._install(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            if timings:
+                self._uninstall(timings)
+        return self._finish(request, response, timings, perf_counter() - started)
+
+    async def __acall__(self, request):
+        timings = RequestTimings() if self._sampled() else None
+        started = perf_counter()
+        if timings:
+            request._timings = timings
+            # Les requêtes async passent par sync_to_async (thread_sensitive) :
+            # le wrapper doit être posé sur les connexions de ce thread-là
+            await sync_to_async(self._install)(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            if timings:
+                await sync_to_async(self._uninstall)(timings)
+        return self._finish(request, response, timings, perf_counter() - started)
+
+    def process_template_response(self, request, response):
+        """Le rendu d'une TemplateResponse a lieu après la vue : on le chronomètre à part"""
+        timings = getattr(request, '_timings', None)
+        if timings:
+            timings.render_started = perf_counter()
+            response.add_post_render_callback(timings.render_done)
+        return response
+
+    def _finish(self, request, response, timings, total):
+        metrics = {'total': total * 1000}
+        if timings:
+            metrics.update({
+                'db': timings.sql * 1000,
+                'view': (total - timings.render) * 1000,
+                'render': timings.render * 1000,
+            })
+
+        if self.header:
+            response['Server-Timing'] = ', '.join(
+                f'{name};dur={duration:.1f}' + (f';desc="{timings.queries} queries"' if name == 'db' else '')
+                for name, duration in metrics.items()
+            )
+
+        if self.slow_ms is not None and metrics['total'] >= self.slow_ms:
+            record = {
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'sampled': timings is not None,
+                **{f'{name}_ms': round(duration, 1) for name, duration in metrics.items()},
+            }
+            if timings:
+                record['queries'] = timings.queries
+            logger.warning(json.dumps(record), extra={'timing': record})
+        return response
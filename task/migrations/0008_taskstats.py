@@ -0,0 +1,89 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Compteurs maintenus par SQLite dans la même transaction que l'écriture
+# sur task_task (les opérations ensemblistes n'envoient pas de signaux).
+CREATE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS task_stats_after_insert AFTER INSERT ON task_task
+    BEGIN
+        INSERT INTO task_taskstats (user_id, total, completed)
+        VALUES (new.user_id, 1, new.status)
+        ON CONFLICT (user_id) DO UPDATE SET
+            total = total + 1,
+            completed = completed + new.status;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS task_stats_after_delete AFTER DELETE ON task_task
+    BEGIN
+        UPDATE task_taskstats SET
+            total = total - 1,
+            completed = completed - old.status
+        WHERE user_id = old.user_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS task_stats_after_update AFTER UPDATE OF status, user_id ON task_task
+    WHEN old.status IS NOT new.status OR old.user_id IS NOT new.user_id
+    BEGIN
+        UPDATE task_taskstats SET
+            total = total - 1,
+            completed = completed - old.status
+        WHERE user_id = old.user_id;
+        INSERT INTO task_taskstats (user_id, total, completed)
+        VALUES (new.user_id, 1, new.status)
+        ON CONFLICT (user_id) DO UPDATE SET
+            total = total + 1,
+            completed = completed + new.status;
+    END
+    """,
+]
+
+DROP_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS task_stats_after_insert",
+    "DROP TRIGGER IF EXISTS task_stats_after_delete",
+    "DROP TRIGGER IF EXISTS task_stats_after_update",
+]
+
+BACKFILL = """
+    INSERT INTO task_taskstats (user_id, total, completed)
+    SELECT user_id, COUNT(*), COALESCE(SUM(status), 0) FROM task_task GROUP BY user_id
+"""
+
+
+def create_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(BACKFILL)
+    for sql in CREATE_TRIGGERS:
+        schema_editor.execute(sql)
+
+
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_TRIGGERS:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0007_tasktombstone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:24
+
+from django.db import migrations
+
+# Index plein texte FTS5 à contenu externe : les textes restent dans
+# task_task, la table virtuelle ne stocke que l'index. Les triggers le
+# tiennent à jour pour toutes les écritures, ORM ou SQL.
+CREATE_FTS = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS task_task_fts USING fts5(
+        title,
+        description,
+        content='task_task',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+]
+
+CREATE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS task_fts_after_insert AFTER INSERT ON task_task
+    BEGIN
+        INSERT INTO task_task_fts (rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS task_fts_after_delete AFTER DELETE ON task_task
+    BEGIN
+        INSERT INTO task_task_fts (task_task_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS task_fts_after_update AFTER UPDATE OF title, description ON task_task
+    BEGIN
+        INSERT INTO task_task_fts (task_task_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO task_task_fts (rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+DROP = [
+    "DROP TRIGGER IF EXISTS task_fts_after_insert",
+    "DROP TRIGGER IF EXISTS task_fts_after_delete",
+    "DROP TRIGGER IF EXISTS task_fts_after_update",
+    "DROP TABLE IF EXISTS task_task_fts",
+]
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_FTS + CREATE_TRIGGERS:
+        schema_editor.execute(sql)
+    # Indexe les tâches existantes
+    schema_editor.execute("INSERT INTO task_task_fts (task_task_fts) VALUES ('rebuild')")
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0008_taskstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0014_task_shards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TombstoneCompaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('compacted_before', models.DateTimeField()),
+            ],
+        ),
+    ]
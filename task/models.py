@@ -1,11 +1,29 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, router, transaction
+from django.utils import timezone
 
 class User(AbstractUser):
-    pass
+    # Shard des tâches (task/shards.py) ; vide : choisi par hachage de l'id
+    shard = models.CharField(max_length=32, null=True, blank=True)
+
+class TaskQuerySet(models.QuerySet):
+    def delete(self):
+        """Supprime les tâches en laissant une tombstone pour la synchronisation"""
+        with transaction.atomic(using=self.db):
+            TaskTombstone.objects.using(self.db).bulk_create(
+                TaskTombstone(user_id=user_id, task_id=task_id)
+                for user_id, task_id in self.values_list('user_id', 'id')
+            )
+            return super().delete()
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
 
 class Task(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="tasks")
+    # Sans contrainte en base : avec le partitionnement (task/shards.py), les
+    # tâches et l'utilisateur sont dans des bases différentes
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="tasks", db_constraint=False)
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True, null=True)
     status = models.BooleanField(default=False)
@@ -13,8 +31,118 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TaskQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.title} - {self.user.username}"
 
+    def delete(self, using=None, keep_parents=False):
+        using = using or router.db_for_write(self.__class__, instance=self)
+        with transaction.atomic(using=using):
+            TaskTombstone.objects.using(using).create(user_id=self.user_id, task_id=self.id)
+            return super().delete(using=using, keep_parents=keep_parents)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Pagination par curseur : (user, -created_at, -id)
+            models.Index(fields=['user', '-created_at', '-id'], name='task_user_created_idx'),
+            # Version de la liste (ETag) : max(updated_at) par utilisateur
+            models.Index(fields=['user', 'updated_at'], name='task_user_updated_idx'),
+            # Filtres de l'API : ?status= avec tri par défaut, ou par heure (?sort=task_time)
+            models.Index(fields=['user', 'status', '-created_at', '-id'], name='task_user_status_created_idx'),
+            models.Index(fields=['user', 'status', 'task_time'], name='task_user_status_time_idx'),
+            # Rappels (task/reminders.py) : tâches actives dont l'heure tombe dans
+            # une fenêtre, tous utilisateurs confondus
+            models.Index(fields=['status', 'task_time'], name='task_status_time_idx'),
+        ]
+
+
+class TaskTombstone(models.Model):
+    """Trace d'une tâche supprimée, pour la synchronisation incrémentale"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="task_tombstones", db_constraint=False)
+    task_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx'),
+            # Compactage : suppression des tombstones expirées
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ]
+
+
+class TombstoneCompaction(models.Model):
+    """Une seule ligne (id=1) : instant avant lequel les tombstones ont pu être supprimées.
+
+    Écrite par compact_tombstones, quelle que soit la rétention utilisée : un
+    jeton de synchronisation plus ancien a pu manquer des suppressions
+    (voir task/sync.py).
+    """
+    compacted_before = models.DateTimeField()
+
+
+class TaskStats(models.Model):
+    """Compteurs dénormalisés par utilisateur.
+
+    Maintenus par des triggers SQLite sur task_task (migration 0008), donc
+    dans la même transaction que chaque création, bascule ou suppression,
+    y compris pour les opérations en masse et l'admin.
+    """
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="task_stats", db_constraint=False,
+    )
+    total = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+
+
+class TaskReminder(models.Model):
+    """Rappel envoyé pour une échéance (tâche, date et heure).
+
+    Enregistré après l'envoi : un redémarrage du planificateur ne renvoie pas
+    les rappels déjà délivrés (voir task/reminders.py).
+    """
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="reminders")
+    due_at = models.DateTimeField()
+    delivered_at = models.DateTimeField(default=timezone.now)
+
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'due_at'], name='task_reminder_unique'),
+        ]
+        indexes = [
+            # Purge des rappels anciens
+            models.Index(fields=['due_at'], name='task_reminder_due_idx'),
+        ]
+
+
+class ArchivedTask(models.Model):
+    """Tâche terminée déplacée hors de task_task par archive_tasks.
+
+    Garde l'id d'origine : une liste qui fusionne tâches et archives
+    (?include_archived=1) reste ordonnée par (clé de tri, id) sans doublon.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archived_tasks", db_constraint=False)
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True, null=True)
+    status = models.BooleanField(default=True)
+    task_time = models.TimeField(blank=True, null=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='archived_user_created_idx'),
+        ]
+
+
+class ReplicaHeartbeat(models.Model):
+    """Horodatage écrit sur le primaire et lu sur les réplicas.
+
+    Une seule ligne (id=1), mise à jour par sync_replica : son âge lu sur un
+    réplica mesure le retard de réplication (voir task/replicas.py).
+    """
+    beat_at = models.DateTimeField()
@@ -0,0 +1,113 @@
+"""Écritures d'une tâche en une seule requête UPDATE conditionnelle.
+
+Au lieu de SELECT + save() (deux allers-retours, toutes les colonnes
+réécrites, et une bascule perdue si deux appareils tapent en même temps),
+la modification est calculée par la base : ``SET status = NOT status`` pour
+la bascule, seules les colonnes reçues pour une modification partielle.
+Quand la base le permet (SQLite >= 3.35, PostgreSQL), ``RETURNING`` renvoie
+la ligne à jour dans la même requête.
+
+La version d'une tâche est son ``updated_at`` (en microsecondes depuis
+l'epoch) : elle sert d'ETag et, via ``If-Match``, de verrou optimiste.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import connections, router, transaction
+from django.db.models import Case, Value, When
+from django.db.models.sql import UpdateQuery
+from django.utils import timezone
+from django.utils.http import parse_etags
+
+from .models import Task
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class TaskConflict(Exception):
+    """La tâche a changé depuis la version attendue (If-Match)"""
+
+    def __init__(self, task):
+        super().__init__(task.pk)
+        self.task = task
+
+
+def format_version(updated_at):
+    return str((updated_at - EPOCH) // timedelta(microseconds=1))
+
+
+def task_version(task):
+    return format_version(task.updated_at)
+
+
+def task_etag(task):
+    return f'"{task_version(task)}"'
+
+
+def parse_if_match(header):
+    """En-tête If-Match -> liste de updated_at acceptés, None si absent ou '*'.
+
+    Une liste vide (ETag illisible) ne correspond à aucune version.
+    """
+    if not header:
+        return None
+    versions = []
+    for etag in parse_etags(header):
+        if etag == '*':
+            return None
+        try:
+            versions.append(EPOCH + timedelta(microseconds=int(etag.removeprefix('W/').strip('"'))))
+        except ValueError:
+            continue
+    return versions
+
+
+def supports_update_returning(connection):
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version_info >= (3, 35)
+    return False
+
+
+def update_task(user_id, task_id, values, versions=None):
+    """UPDATE de ``values`` (valeurs ou expressions) sur une tâche de l'utilisateur.
+
+    Retourne la tâche à jour, ou None si elle n'existe pas. Si ``versions``
+    est donné (voir parse_if_match), la ligne n'est modifiée que si son
+    updated_at en fait partie ; sinon TaskConflict est levée avec la tâche
+    courante.
+    """
+    using = router.db_for_write(Task)
+    queryset = Task.objects.using(using).filter(pk=task_id, user_id=user_id)
+    target = queryset if versions is None else queryset.filter(updated_at__in=versions)
+    # QuerySet.update() ne déclenche pas auto_now
+    values = {**values, 'updated_at': timezone.now()}
+
+    connection = connections[using]
+    if versions is not None and not versions:
+        # If-Match illisible : aucune version ne correspond (412, ou 404 si
+        # la tâche n'existe pas). filter(updated_at__in=[]) ne compile pas.
+        task = None
+    elif supports_update_returning(connection):
+        query = target.query.chain(UpdateQuery)
+        query.add_update_values(values)
+        sql, params = query.get_compiler(using).as_sql()
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in Task._meta.concrete_fields)
+        updated = list(Task.objects.db_manager(using).raw(f'{sql} RETURNING {columns}', params))
+        task = updated[0] if updated else None
+    else:
+        with transaction.atomic(using=using):
+            task = queryset.get() if target.update(**values) else None
+
+    if task is None and versions is not None:
+        # Chemin d'échec uniquement : introuvable (404) ou modifiée entre-temps (412) ?
+        current = queryset.first()
+        if current is not None:
+            raise TaskConflict(current)
+    return task
+
+
+def toggle_task(user_id, task_id, versions=None):
+    """Bascule atomique du statut : deux bascules concurrentes s'annulent au lieu de se perdre"""
+    flipped = Case(When(status=True, then=Value(False)), default=Value(True))
+    return update_task(user_id, task_id, {'status': flipped}, versions)
@@ -0,0 +1,139 @@
+"""Pagination par curseur (keyset) pour l'API des tâches.
+
+Les pages sont ordonnées par (clé de tri, id) : le curseur contient la
+dernière paire vue, donc chaque page est une simple recherche dans l'index
+correspondant (``task_user_created_idx`` pour le tri par défaut), quelle que
+soit sa position dans la liste.
+"""
+import base64
+import json
+
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime, parse_time
+
+from .models import Task
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+DEFAULT_SORT = '-created_at'
+# Clés de tri autorisées (?sort=) -> fonction de décodage de la valeur du curseur
+SORT_FIELDS = {
+    'created_at': parse_datetime,
+    'task_time': parse_time,
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def parse_sort(value):
+    """Valide ?sort= ('champ' ou '-champ'), lève ValueError si non autorisé"""
+    sort = value or DEFAULT_SORT
+    if sort.lstrip('-') not in SORT_FIELDS:
+        raise ValueError(value)
+    return sort
+
+
+def encode_cursor(task, sort=DEFAULT_SORT):
+    value = getattr(task, sort.lstrip('-'))
+    payload = json.dumps(
+        [sort, value.isoformat() if value is not None else None, task.id],
+        separators=(',', ':'),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort=DEFAULT_SORT):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort, value, task_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        task_id = int(task_id)
+        if value is not None:
+            parsed = SORT_FIELDS[sort.lstrip('-')](value)
+            if parsed is None:
+                raise ValueError(value)
+            value = parsed
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    # Un curseur n'est valable que pour le tri qui l'a produit
+    if cursor_sort != sort:
+        raise InvalidCursor(cursor)
+    return value, task_id
+
+
+def parse_limit(value):
+    """Taille de page demandée, bornée à MAX_PAGE_SIZE."""
+    if value in (None, ''):
+        return DEFAULT_PAGE_SIZE
+    limit = int(value)
+    if limit < 1:
+        raise ValueError(value)
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def _after(field, value, task_id, descending, nullable):
+    """Condition « strictement après (value, id) » ; les NULL sont toujours en fin de liste"""
+    if value is None:
+        return Q(**{f'{field}__isnull': True}) & Q(**{'id__lt' if descending else 'id__gt': task_id})
+
+    op = 'lt' if descending else 'gt'
+    after = Q(**{f'{field}__{op}': value}) | Q(**{field: value, f'id__{op}': task_id})
+    if nullable:
+        after |= Q(**{f'{field}__isnull': True})
+    return after
+
+
+def order_tasks(queryset, sort=DEFAULT_SORT):
+    """Trie par (clé de tri, id), les NULL en dernier"""
+    field = sort.lstrip('-')
+    descending = sort.startswith('-')
+    if Task._meta.get_field(field).null:
+        order = F(field).desc(nulls_last=True) if descending else F(field).asc(nulls_last=True)
+    else:
+        order = sort
+    return queryset.order_by(order, '-id' if descending else 'id')
+
+
+def page_queryset(queryset, cursor=None, limit=DEFAULT_PAGE_SIZE, sort=DEFAULT_SORT):
+    """Requête d'une page : limit + 1 lignes après le curseur (voir finish_page)"""
+    field = sort.lstrip('-')
+    descending = sort.startswith('-')
+    nullable = Task._meta.get_field(field).null
+    queryset = order_tasks(queryset, sort)
+
+    if cursor:
+        value, task_id = decode_cursor(cursor, sort)
+        queryset = queryset.filter(_after(field, value, task_id, descending, nullable))
+
+    # Une ligne de plus pour savoir s'il reste une page, sans COUNT(*)
+    return queryset[:limit + 1]
+
+
+def finish_page(tasks, limit=DEFAULT_PAGE_SIZE, sort=DEFAULT_SORT):
+    """Retourne (tâches de la page, curseur suivant ou None) à partir des lignes lues"""
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        return tasks, encode_cursor(tasks[-1], sort)
+    return tasks, None
+
+
+def merge_sorted(row_lists, sort=DEFAULT_SORT):
+    """Fusionne des lignes déjà triées par order_tasks (même ordre, NULL en dernier)"""
+    field = sort.lstrip('-')
+    descending = sort.startswith('-')
+
+    def key(row):
+        value = getattr(row, field)
+        if value is None:
+            return (0, row.id) if descending else (1, row.id)
+        return (1, value, row.id) if descending else (0, value, row.id)
+
+    return sorted((row for rows in row_lists for row in rows), key=key, reverse=descending)
+
+
+def paginate(queryset, cursor=None, limit=DEFAULT_PAGE_SIZE, sort=DEFAULT_SORT):
+    """Retourne (tâches de la page, curseur suivant ou None)."""
+    tasks = list(page_queryset(queryset, cursor, limit, sort))
+    return finish_page(tasks, limit, sort)
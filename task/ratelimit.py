@@ -0,0 +1,149 @@
+"""Limitation de débit par utilisateur et délestage des écritures de l'API.
+
+Chaque utilisateur a deux seaux à jetons (token bucket), un pour les
+lectures et un pour les écritures (RATE_LIMITS : débit par seconde et
+rafale). Une requête sans jeton reçoit 429 avec Retry-After, sans toucher
+à la base. En plus, le nombre d'écritures en cours sur l'ensemble des
+workers est plafonné (WRITE_CONCURRENCY_LIMIT) : au-delà, 503 immédiat
+plutôt qu'une attente derrière le verrou d'écriture de SQLite.
+
+L'état est gardé dans le cache RATELIMIT_CACHE_ALIAS, partagé entre les
+workers s'il s'agit d'un cache partagé (fichier avec TASK_CACHE_DIR, Redis,
+Memcached). Le cache de
+Django n'offre pas de compare-and-swap : deux requêtes simultanées d'un
+même utilisateur sur deux workers peuvent consommer le même jeton, un
+dépassement marginal accepté. Le compteur de concurrence utilise incr/decr,
+atomiques sur Redis et Memcached (approchés sur le cache fichier).
+"""
+import math
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+WRITE_SLOTS_KEY = 'ratelimit:write-slots'
+# Un compteur de concurrence orphelin (worker tué) expire ce délai après la
+# dernière écriture admise
+WRITE_SLOTS_TIMEOUT = 60
+
+_lock = threading.Lock()
+
+
+def ratelimit_cache():
+    return caches[getattr(settings, 'RATELIMIT_CACHE_ALIAS', 'default')]
+
+
+def take_token(user_id, scope, rate, burst, now=None):
+    """Consomme un jeton ; retourne 0 si la requête passe, sinon le délai avant le prochain jeton (s)"""
+    cache = ratelimit_cache()
+    key = f'ratelimit:{scope}:{user_id}'
+    now = now if now is not None else time.time()
+    with _lock:
+        tokens, updated = cache.get(key) or (burst, now)
+        tokens = min(burst, tokens + (now - updated) * rate)
+        if tokens < 1:
+            return (1 - tokens) / rate
+        # Expire quand le seau serait de toute façon plein
+        cache.set(key, (tokens - 1, now), timeout=math.ceil(burst / rate) + 1)
+    return 0
+
+
+def acquire_write_slot(limit):
+    cache = ratelimit_cache()
+    cache.add(WRITE_SLOTS_KEY, 0, timeout=WRITE_SLOTS_TIMEOUT)
+    try:
+        slots = cache.incr(WRITE_SLOTS_KEY)
+    except ValueError:
+        # Clé expirée entre add et incr : on laisse passer
+        return True
+    # incr ne prolonge pas la clé : sous charge continue, elle expirerait
+    # avec des créneaux encore pris
+    cache.touch(WRITE_SLOTS_KEY, WRITE_SLOTS_TIMEOUT)
+    if slots <= limit:
+        return True
+    release_write_slot()
+    return False
+
+
+def release_write_slot():
+    cache = ratelimit_cache()
+    try:
+        if cache.decr(WRITE_SLOTS_KEY) < 0:
+            # Compteur expiré et recréé pendant des écritures en cours
+            cache.set(WRITE_SLOTS_KEY, 0, timeout=WRITE_SLOTS_TIMEOUT)
+    except ValueError:
+        pass
+
+
+def _too_many_requests(retry_after):
+    response = JsonResponse({"error": "Too many requests"}, status=429)
+    response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def _server_busy():
+    response = JsonResponse({"error": "Server busy, retry shortly"}, status=503)
+    response['Retry-After'] = '1'
+    return response
+
+
+class RateLimitMiddleware:
+    """À placer après AuthenticationMiddleware ; ne concerne que les URLs /api/ des utilisateurs connectés"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'RATELIMIT_ENABLED', True)
+        self.limits = getattr(settings, 'RATE_LIMITS', {'read': (20, 60), 'write': (5, 20)})
+        self.write_limit = getattr(settings, 'WRITE_CONCURRENCY_LIMIT', None)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _check(self, request):
+        """(réponse de refus ou None, True si un créneau d'écriture a été pris)"""
+        if not self.enabled or not request.path.startswith('/api/'):
+            return None, False
+        user = request.user
+        if not user.is_authenticated:
+            return None, False
+
+        scope = 'read' if request.method in SAFE_METHODS else 'write'
+        rate, burst = self.limits[scope]
+        retry_after = take_token(user.pk, scope, rate, burst)
+        if retry_after:
+            return _too_many_requests(retry_after), False
+
+        if scope == 'write' and self.write_limit:
+            if not acquire_write_slot(self.write_limit):
+                return _server_busy(), False
+            return None, True
+        return None, False
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        refused, slot = self._check(request)
+        if refused:
+            return refused
+        try:
+            return self.get_response(request)
+        finally:
+            if slot:
+                release_write_slot()
+
+    async def __acall__(self, request):
+        # request.user est chargé paresseusement (session, base) : hors de la boucle
+        refused, slot = await sync_to_async(self._check)(request)
+        if refused:
+            return refused
+        try:
+            return await self.get_response(request)
+        finally:
+            if slot:
+                await sync_to_async(release_write_slot)()
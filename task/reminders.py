@@ -0,0 +1,187 @@
+"""Rappels à l'heure des tâches (task_time).
+
+Une tâche active avec une heure est due chaque jour à cette heure (heure
+locale, TIME_ZONE). À chaque passage, le planificateur (commande
+run_reminders) cherche les échéances de la fenêtre
+[maintenant - rattrapage, maintenant] décalée de l'avance configurée, par
+une requête de plage servie par l'index ``task_status_time_idx``, sans
+parcourir les autres tâches. Les échéances sont traitées par lots : celles
+déjà présentes dans TaskReminder sont ignorées, les autres sont délivrées
+par le backend configuré (TASK_REMINDER_BACKEND) puis enregistrées.
+
+Avec le partitionnement (task/shards.py), les shards sont parcourus l'un
+après l'autre ; les noms d'utilisateur sont lus à part dans default.
+
+Un seul planificateur doit tourner à la fois : l'enregistrement a lieu après
+l'envoi, un rappel peut donc être renvoyé (jamais perdu) si le processus
+s'arrête entre les deux.
+"""
+import json
+import logging
+import time as clock
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task, TaskReminder, User
+from .shards import each_shard
+
+logger = logging.getLogger('task.reminders')
+
+Reminder = namedtuple('Reminder', ['task_id', 'user_id', 'username', 'title', 'due_at'])
+
+
+class BaseReminderBackend:
+    def __init__(self, **options):
+        pass
+
+    def send(self, reminders):
+        """Délivre une liste de Reminder ; lever une exception pour que le lot soit retenté"""
+        raise NotImplementedError
+
+
+class LogBackend(BaseReminderBackend):
+    """Écrit chaque rappel dans le logger task.reminders"""
+
+    def send(self, reminders):
+        for reminder in reminders:
+            logger.info(
+                "Rappel pour %s : %s (%s)", reminder.username, reminder.title,
+                timezone.localtime(reminder.due_at).strftime('%H:%M'),
+            )
+
+
+class FileBackend(BaseReminderBackend):
+    """Ajoute une ligne JSON par rappel au fichier ``path``"""
+
+    def __init__(self, path, **options):
+        super().__init__(**options)
+        self.path = path
+
+    def send(self, reminders):
+        with open(self.path, 'a') as output:
+            for reminder in reminders:
+                output.write(json.dumps({**reminder._asdict(), 'due_at': reminder.due_at.isoformat()}) + '\n')
+
+
+# Rappels délivrés par MemoryBackend (tests), comme mail.outbox
+outbox = []
+
+
+class MemoryBackend(BaseReminderBackend):
+    def send(self, reminders):
+        outbox.extend(reminders)
+
+
+def get_backend():
+    backend = import_string(getattr(settings, 'TASK_REMINDER_BACKEND', 'task.reminders.LogBackend'))
+    return backend(**getattr(settings, 'TASK_REMINDER_BACKEND_OPTIONS', {}))
+
+
+def _day_ranges(start, end):
+    """Découpe [start, end] (heure locale) en (jour, heure de début, heure de fin) à minuit"""
+    start, end = timezone.localtime(start), timezone.localtime(end)
+    day = start.date()
+    while day <= end.date():
+        yield (
+            day,
+            start.time() if day == start.date() else time.min,
+            end.time() if day == end.date() else time.max,
+        )
+        day += timedelta(days=1)
+
+
+def due_reminders(start, end, batch_size=500):
+    """Lots de Reminder dont l'échéance est dans [start, end], dans l'ordre des heures"""
+    tz = timezone.get_current_timezone()
+    for day, time_from, time_to in _day_ranges(start, end):
+        # status__in plutôt que status=False (rendu « NOT status ») : l'index
+        # (status, task_time) est utilisé pour la plage
+        queryset = (
+            Task.objects.filter(status__in=[False], task_time__gte=time_from, task_time__lte=time_to)
+            .order_by('task_time', 'id')
+            .values_list('id', 'user_id', 'title', 'task_time')
+        )
+        after = Q()
+        while True:
+            rows = list(queryset.filter(after)[:batch_size])
+            if not rows:
+                break
+            # Pas de jointure : les utilisateurs peuvent être dans une autre base
+            usernames = dict(User.objects.filter(pk__in={row[1] for row in rows}).values_list('pk', 'username'))
+            yield [
+                Reminder(
+                    task_id, user_id, usernames.get(user_id), title,
+                    timezone.make_aware(datetime.combine(day, task_time), tz),
+                )
+                for task_id, user_id, title, task_time in rows
+            ]
+            if len(rows) < batch_size:
+                break
+            # Pagination par clé (task_time, id) : chaque lot reste une recherche dans l'index
+            last_time, last_id = rows[-1][3], rows[-1][0]
+            after = Q(task_time__gt=last_time) | Q(task_time=last_time, id__gt=last_id)
+
+
+def deliver_batch(backend, reminders):
+    """Envoie les rappels du lot qui ne l'ont pas encore été ; retourne ceux envoyés"""
+    delivered = set(
+        TaskReminder.objects.filter(
+            task_id__in={reminder.task_id for reminder in reminders},
+            due_at__in={reminder.due_at for reminder in reminders},
+        ).values_list('task_id', 'due_at')
+    )
+    pending = [reminder for reminder in reminders if (reminder.task_id, reminder.due_at) not in delivered]
+    if pending:
+        backend.send(pending)
+        now = timezone.now()
+        TaskReminder.objects.bulk_create(
+            [TaskReminder(task_id=reminder.task_id, due_at=reminder.due_at, delivered_at=now) for reminder in pending],
+            ignore_conflicts=True,
+        )
+    return pending
+
+
+def run_reminders(backend=None, now=None, lookback=None, lead=None, batch_size=None):
+    """Un passage du planificateur ; retourne ses métriques (décalage, débit par lot)"""
+    backend = backend or get_backend()
+    now = now or timezone.now()
+    lookback = timedelta(seconds=lookback if lookback is not None else getattr(settings, 'TASK_REMINDER_LOOKBACK', 300))
+    lead = timedelta(seconds=lead if lead is not None else getattr(settings, 'TASK_REMINDER_LEAD', 0))
+    batch_size = batch_size or getattr(settings, 'TASK_REMINDER_BATCH_SIZE', 500)
+
+    metrics = {'due': 0, 'sent': 0, 'skipped': 0, 'batches': 0, 'max_lag_s': 0.0, 'avg_lag_s': 0.0}
+    started = clock.perf_counter()
+    total_lag = 0.0
+    for _ in each_shard():
+        for batch in due_reminders(now + lead - lookback, now + lead, batch_size):
+            sent = deliver_batch(backend, batch)
+            metrics['batches'] += 1
+            metrics['due'] += len(batch)
+            metrics['sent'] += len(sent)
+            metrics['skipped'] += len(batch) - len(sent)
+            for reminder in sent:
+                # Retard par rapport au moment prévu pour l'envoi (échéance - avance)
+                lag = (now - (reminder.due_at - lead)).total_seconds()
+                total_lag += lag
+                metrics['max_lag_s'] = max(metrics['max_lag_s'], round(lag, 3))
+
+    elapsed = clock.perf_counter() - started
+    metrics['elapsed_s'] = round(elapsed, 3)
+    if metrics['sent']:
+        metrics['avg_lag_s'] = round(total_lag / metrics['sent'], 3)
+    metrics['per_batch_ms'] = round(elapsed * 1000 / metrics['batches'], 2) if metrics['batches'] else 0.0
+    metrics['throughput_per_s'] = round(metrics['due'] / elapsed, 1) if elapsed else 0.0
+    return metrics
+
+
+def purge_reminders(retention=timedelta(days=2)):
+    """Supprime les enregistrements d'envoi plus anciens que ``retention``"""
+    deleted = 0
+    for _ in each_shard():
+        deleted += TaskReminder.objects.filter(due_at__lt=timezone.now() - retention).delete()[0]
+    return deleted
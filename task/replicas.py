@@ -0,0 +1,205 @@
+"""Lectures sur réplicas, écritures sur le primaire, et lecture de ses écritures.
+
+Seules les vues décorées par @replica_reads (liste, page et statistiques en
+GET) lisent sur un réplica : les autres lectures, et toutes celles d'une vue
+qui écrit, restent sur le primaire.
+
+Lecture de ses écritures : après une écriture, les lectures de l'utilisateur
+sont épinglées au primaire pendant REPLICA_PIN_SECONDS (clé du cache
+REPLICA_PIN_CACHE_ALIAS). Le
+middleware épingle après chaque requête d'écriture réussie, et
+notify_task_changes après toute écriture, y compris hors requête
+(commandes, admin). C'est indispensable à cause du cache des listes : une
+page lue sur un réplica en retard juste après l'invalidation resterait en
+cache bien après que le réplica a rattrapé son retard. L'épinglage posé par
+le worker qui a écrit doit être vu par celui qui sert la lecture suivante :
+avec plusieurs workers, REPLICA_PIN_CACHE_ALIAS doit désigner un cache
+partagé (fichier, Redis, Memcached), pas LocMem (check task.W001).
+
+Retard de réplication : sync_replica écrit l'heure courante dans
+ReplicaHeartbeat sur le primaire ; l'âge de cette ligne lue sur un réplica
+est son retard. Un réplica en retard de plus de REPLICA_MAX_LAG, injoignable
+ou sans battement n'est plus utilisé, les lectures reviennent au primaire.
+La mesure est gardée REPLICA_LAG_CHECK_INTERVAL secondes par processus.
+"""
+import contextvars
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, connections
+from django.utils import timezone
+
+PRIMARY = 'default'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_reading_from_replicas = contextvars.ContextVar('reading_from_replicas', default=False)
+_lag_checks = {}  # alias -> (monotonic de la mesure, retard en secondes ou None)
+_lag_lock = threading.Lock()
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def _pin_key(user_id):
+    return f'replica-pin:{user_id}'
+
+
+def pin_cache():
+    return caches[getattr(settings, 'REPLICA_PIN_CACHE_ALIAS', 'default')]
+
+
+def pin_primary(user_id):
+    """Les lectures de l'utilisateur iront au primaire pendant REPLICA_PIN_SECONDS"""
+    if replica_aliases():
+        pin_cache().set(_pin_key(user_id), 1, timeout=settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    return pin_cache().get(_pin_key(user_id)) is not None
+
+
+def beat():
+    """Battement écrit sur le primaire (répliqué comme le reste des données)"""
+    from .models import ReplicaHeartbeat
+    ReplicaHeartbeat.objects.using(PRIMARY).update_or_create(pk=1, defaults={'beat_at': timezone.now()})
+
+
+def copy_sqlite_replica(alias):
+    """Réplication de fortune pour le développement : copie le fichier primaire
+    dans celui du réplica avec l'API de sauvegarde de SQLite (copie cohérente,
+    sans bloquer les écrivains plus que le temps d'une page).
+    """
+    primary = connections[PRIMARY]
+    primary.ensure_connection()
+    target = sqlite3.connect(connections[alias].settings_dict['NAME'])
+    try:
+        primary.connection.backup(target)
+    finally:
+        target.close()
+
+
+def measure_lag(alias):
+    """Retard du réplica en secondes, ou None s'il est injoignable ou sans battement"""
+    from .models import ReplicaHeartbeat
+    try:
+        beat_at = ReplicaHeartbeat.objects.using(alias).filter(pk=1).values_list('beat_at', flat=True).first()
+    except DatabaseError:
+        return None
+    if beat_at is None:
+        return None
+    return max(0.0, (timezone.now() - beat_at).total_seconds())
+
+
+def replica_lag(alias):
+    now = time.monotonic()
+    with _lag_lock:
+        checked = _lag_checks.get(alias)
+    if checked and now - checked[0] < settings.REPLICA_LAG_CHECK_INTERVAL:
+        return checked[1]
+    lag = measure_lag(alias)
+    with _lag_lock:
+        _lag_checks[alias] = (now, lag)
+    return lag
+
+
+def healthy_replicas():
+    return [
+        alias for alias in replica_aliases()
+        if (lag := replica_lag(alias)) is not None and lag <= settings.REPLICA_MAX_LAG
+    ]
+
+
+@contextmanager
+def reading_from_replicas():
+    token = _reading_from_replicas.set(True)
+    try:
+        yield
+    finally:
+        _reading_from_replicas.reset(token)
+
+
+def replica_reads(view):
+    """Les lectures de la vue (GET/HEAD) vont à un réplica, sauf utilisateur épinglé.
+
+    À placer sous @login_required : l'utilisateur est chargé depuis le primaire.
+    Les vues async sont acceptées (la lecture de l'épinglage sort de la boucle).
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if (request.method not in ('GET', 'HEAD') or not replica_aliases()
+                    or await sync_to_async(is_pinned)(request.user.pk)):
+                return await view(request, *args, **kwargs)
+            with reading_from_replicas():
+                return await view(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (request.method not in ('GET', 'HEAD') or not replica_aliases()
+                or is_pinned(request.user.pk)):
+            return view(request, *args, **kwargs)
+        with reading_from_replicas():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _reading_from_replicas.get():
+            return PRIMARY
+        healthy = healthy_replicas()
+        return random.choice(healthy) if healthy else PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Les réplicas reçoivent le schéma par la réplication
+        if db in replica_aliases():
+            return False
+        return None
+
+
+class ReadYourWritesMiddleware:
+    """Épingle au primaire les lectures d'un utilisateur qui vient d'écrire"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _after_response(self, request, response):
+        if (request.method not in SAFE_METHODS and response.status_code < 400
+                and replica_aliases() and request.user.is_authenticated):
+            pin_primary(request.user.pk)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        self._after_response(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if request.method not in SAFE_METHODS and replica_aliases():
+            await sync_to_async(self._after_response)(request, response)
+        return response
@@ -0,0 +1,73 @@
+"""Recherche plein texte sur le titre et la description des tâches (SQLite FTS5).
+
+La table virtuelle ``task_task_fts`` et ses triggers sont créés par la
+migration 0009 ; ce module construit les requêtes MATCH et reconstruit
+l'index.
+"""
+import re
+
+from django.db import connections, transaction
+
+from .models import Task
+from .shards import each_shard
+
+SEARCH_MAX_RESULTS = 50
+
+# Poids bm25 par colonne : un terme dans le titre compte plus que dans la description
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+SEARCH_SQL = """
+    SELECT t.id, t.title, t.description, t.status, t.task_time, t.created_at, t.updated_at, t.user_id,
+           snippet(task_task_fts, -1, '**', '**', '…', 12) AS snippet,
+           bm25(task_task_fts, %s, %s) AS rank
+    FROM task_task_fts
+    JOIN task_task t ON t.id = task_task_fts.rowid
+    WHERE task_task_fts MATCH %s AND t.user_id = %s
+    ORDER BY rank
+    LIMIT %s
+"""
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_match_query(q):
+    """Transforme la saisie en requête FTS5 : chaque mot, en préfixe, doit apparaître.
+
+    Les mots sont cités pour que la syntaxe FTS5 (OR, NEAR, *, ") tapée par
+    l'utilisateur ne soit jamais interprétée.
+    """
+    return ' '.join(f'"{token}"*' for token in TOKEN_RE.findall(q))
+
+
+def search_tasks(user, q, limit=SEARCH_MAX_RESULTS):
+    """Tâches de l'utilisateur correspondant à q, les plus pertinentes d'abord.
+
+    Chaque tâche porte en plus ``snippet`` (extrait, termes entre **) et
+    ``rank`` (score bm25, plus petit = plus pertinent).
+    """
+    match = build_match_query(q)
+    if not match:
+        return []
+    return list(Task.objects.raw(
+        SEARCH_SQL, [TITLE_WEIGHT, DESCRIPTION_WEIGHT, match, user.pk, limit]
+    ))
+
+
+def rebuild_index(progress=None):
+    """Reconstruit l'index à partir de task_task, shard par shard.
+
+    Commande FTS5 'rebuild' : une seule instruction, donc une seule
+    transaction par shard. Les écritures concurrentes attendent la fin au lieu
+    d'être indexées deux fois (FTS5 accepte les rowid en double).
+    Retourne le nombre de tâches indexées.
+    """
+    indexed = 0
+    for alias in each_shard():
+        with transaction.atomic(using=alias):
+            with connections[alias].cursor() as cursor:
+                cursor.execute("INSERT INTO task_task_fts (task_task_fts) VALUES ('rebuild')")
+            indexed += Task.objects.using(alias).count()
+        if progress:
+            progress(alias, indexed)
+    return indexed
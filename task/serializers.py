@@ -0,0 +1,115 @@
+"""Sérialisation des tâches en JSON, partagée par toutes les vues de l'API.
+
+Les listes sont construites à partir de ``values_list()`` : pas d'instance
+de modèle par ligne, seulement les colonnes demandées. Avec ``?fields=``,
+un client mobile ne lit que ``id,title,status,task_time`` et la requête SQL
+ne sélectionne que ces colonnes.
+
+Le plan de sérialisation (position de chaque colonne et conversion à
+appliquer) est calculé une fois par combinaison de champs. L'encodage
+utilise orjson s'il est installé, sinon le module json standard.
+"""
+import json
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:  # dépendance optionnelle
+    orjson = None
+
+from .mutations import format_version
+
+# Champ du payload -> colonne lue en base
+FIELD_COLUMNS = {
+    'id': 'id',
+    'title': 'title',
+    'description': 'description',
+    'created_at': 'created_at',
+    'status': 'status',
+    'task_time': 'task_time',
+    'version': 'updated_at',
+}
+DEFAULT_FIELDS = tuple(FIELD_COLUMNS)
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+def _format_datetime(value):
+    return value.isoformat()
+
+
+def _format_time(value):
+    return value.strftime('%H:%M') if value is not None else None
+
+
+FORMATTERS = {
+    'created_at': _format_datetime,
+    'task_time': _format_time,
+    'version': format_version,
+}
+
+
+def parse_fields(value):
+    """?fields=id,title -> tuple de champs (tous si vide) ; lève InvalidFields"""
+    if not value:
+        return DEFAULT_FIELDS
+    fields = tuple(dict.fromkeys(field.strip() for field in value.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in FIELD_COLUMNS]
+    if unknown or not fields:
+        raise InvalidFields(f"Invalid fields: {', '.join(unknown) or value}")
+    return fields
+
+
+class TaskSerializer:
+    """Sérialiseur pour une combinaison de champs (voir get_serializer)"""
+
+    def __init__(self, fields=DEFAULT_FIELDS, extra_columns=()):
+        self.fields = fields
+        # Les colonnes demandées, puis celles qu'il faut lire en plus (id et
+        # clé de tri pour le curseur de pagination)
+        columns = [FIELD_COLUMNS[field] for field in fields]
+        columns += [column for column in ('id', *extra_columns) if column not in columns]
+        self.columns = tuple(columns)
+        self._plan = tuple(
+            (field, self.columns.index(FIELD_COLUMNS[field]), FORMATTERS.get(field))
+            for field in fields
+        )
+
+    def rows(self, queryset):
+        """Lignes (namedtuple) avec uniquement les colonnes nécessaires"""
+        return queryset.values_list(*self.columns, named=True)
+
+    def serialize_row(self, row):
+        return {
+            field: formatter(row[index]) if formatter else row[index]
+            for field, index, formatter in self._plan
+        }
+
+    def serialize_rows(self, rows):
+        serialize_row = self.serialize_row
+        return [serialize_row(row) for row in rows]
+
+    def serialize(self, task):
+        """Instance de modèle -> payload (créations et modifications)"""
+        return {
+            field: formatter(getattr(task, FIELD_COLUMNS[field])) if formatter else getattr(task, FIELD_COLUMNS[field])
+            for field, _, formatter in self._plan
+        }
+
+
+@lru_cache(maxsize=64)
+def get_serializer(fields=DEFAULT_FIELDS, extra_columns=()):
+    return TaskSerializer(fields, extra_columns)
+
+
+def serialize_task(task, fields=DEFAULT_FIELDS):
+    return get_serializer(fields).serialize(task)
+
+
+def dumps(data):
+    """Encode en JSON (bytes) avec l'encodeur le plus rapide disponible"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':')).encode()
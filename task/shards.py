@@ -0,0 +1,336 @@
+"""Partitionnement des tâches par utilisateur sur plusieurs bases (shards).
+
+SQLite n'a qu'un écrivain par fichier : toutes les écritures de tous les
+utilisateurs attendent le même verrou. Avec TASK_SHARDS, les tables des
+tâches (SHARDED_MODELS) sont réparties sur plusieurs fichiers, un
+utilisateur vivant entièrement dans un seul : ses écritures ne bloquent plus
+que celles des utilisateurs du même shard. Comptes, sessions et admin
+restent dans la base default.
+
+Le shard d'un utilisateur est User.shard s'il a été fixé (rebalance_shards),
+sinon un hachage stable de son id. Les requêtes ORM ne disent pas pour quel
+utilisateur elles lisent : le shard est donc un contexte, posé par
+ShardMiddleware pour l'utilisateur connecté, ou par each_shard() pour les
+traitements qui parcourent tous les utilisateurs (rappels, archivage...).
+Les écritures d'une instance vont au shard de son utilisateur.
+
+Sans TASK_SHARDS, le routeur ne répond jamais : tout reste dans default.
+"""
+import contextvars
+import zlib
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+# Tables suivies par les triggers de task_task (TaskStats, FTS) : même shard
+SHARDED_MODELS = frozenset({'task', 'tasktombstone', 'taskstats', 'taskreminder', 'archivedtask'})
+
+# (id de l'utilisateur ou None, alias du shard)
+_current = contextvars.ContextVar('task_shard', default=None)
+
+
+def shard_aliases():
+    return getattr(settings, 'TASK_SHARDS', [])
+
+
+def test_databases():
+    """Bases à déclarer dans les cas de test : default et les shards.
+
+    Pas '__all__' : le réplica local est un miroir de default en test
+    (TEST MIRROR), une seconde connexion sur la même base.
+    """
+    return {'default', *shard_aliases()}
+
+
+def is_sharded(model):
+    """Modèle ou instance (y compris request.user, SimpleLazyObject)"""
+    return model._meta.app_label == 'task' and model._meta.model_name in SHARDED_MODELS
+
+
+def hash_shard(user_id):
+    """Shard par défaut de l'utilisateur : stable d'un processus à l'autre (pas hash())"""
+    aliases = shard_aliases()
+    return aliases[zlib.crc32(str(user_id).encode()) % len(aliases)]
+
+
+def _assignment_key(user_id):
+    return f'shard:user:{user_id}'
+
+
+def shard_for(user):
+    if not shard_aliases():
+        return 'default'
+    return user.shard or hash_shard(user.pk)
+
+
+def shard_for_user_id(user_id):
+    """Comme shard_for, sans l'instance : User.shard passe par le cache"""
+    if not shard_aliases():
+        return 'default'
+    current = _current.get()
+    if current and current[0] == user_id:
+        return current[1]
+    cache = caches['default']
+    shard = cache.get(_assignment_key(user_id))
+    if shard is None:
+        from .models import User
+        shard = User.objects.using('default').filter(pk=user_id).values_list('shard', flat=True).first() or ''
+        cache.set(_assignment_key(user_id), shard, settings.TASK_SHARD_CACHE_TIMEOUT)
+    return shard or hash_shard(user_id)
+
+
+def invalidate_assignment(sender, instance, **kwargs):
+    caches['default'].delete(_assignment_key(instance.pk))
+
+
+@contextmanager
+def using_shard(alias, user_id=None):
+    token = _current.set((user_id, alias))
+    try:
+        yield alias
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def using_user_shard(user):
+    with using_shard(shard_for(user), user.pk) as alias:
+        yield alias
+
+
+def each_shard():
+    """Alias de chaque shard, le bloc de la boucle s'exécutant dans son contexte.
+
+    Sans partitionnement, un seul tour sur default.
+    """
+    aliases = shard_aliases()
+    if not aliases:
+        yield 'default'
+        return
+    for alias in aliases:
+        with using_shard(alias):
+            yield alias
+
+
+class ShardRouter:
+    def _shard(self, model, hints):
+        if not shard_aliases() or not is_sharded(model):
+            return None
+        instance = hints.get('instance')
+        if instance is not None:
+            if instance._state.db in shard_aliases():
+                return instance._state.db
+            if is_sharded(instance) and getattr(instance, 'user_id', None) is not None:
+                return shard_for_user_id(instance.user_id)
+            if instance._meta.model_name == 'user':
+                # user.tasks, user.task_stats...
+                return shard_for(instance)
+        current = _current.get()
+        return current[1] if current else None
+
+    def db_for_read(self, model, **hints):
+        return self._shard(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._shard(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Clés étrangères vers User sans contrainte en base (voir models.py)
+        if shard_aliases() and (is_sharded(obj1) or is_sharded(obj2)):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db not in shard_aliases():
+            return None
+        if app_label != 'task':
+            return False
+        # RunPython sans modèle (triggers, FTS) : ils portent sur les tables des tâches
+        return model_name is None or model_name in SHARDED_MODELS
+
+
+def _iterate_in_shard(current, iterator):
+    # Réponse en streaming : lue après la sortie du middleware, dans le même shard
+    iterator = iter(iterator)
+    while True:
+        token = _current.set(current)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _current.reset(token)
+        yield chunk
+
+
+class ShardMiddleware:
+    """Les lectures de tâches de la requête vont au shard de l'utilisateur connecté"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _current_for(request):
+        if not shard_aliases() or not request.user.is_authenticated:
+            return None
+        return (request.user.pk, shard_for(request.user))
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        current = self._current_for(request)
+        if current is None:
+            return self.get_response(request)
+        token = _current.set(current)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        if response.streaming and not response.is_async:
+            response.streaming_content = _iterate_in_shard(current, response.streaming_content)
+        return response
+
+    async def __acall__(self, request):
+        if not shard_aliases():
+            return await self.get_response(request)
+        current = await sync_to_async(self._current_for)(request)
+        if current is None:
+            return await self.get_response(request)
+        token = _current.set(current)
+        try:
+            return await self.get_response(request)
+        finally:
+            _current.reset(token)
+
+
+def delete_user_data(sender, instance, **kwargs):
+    """Suppression d'un utilisateur : le CASCADE de l'ORM ne vise que la base default"""
+    if not shard_aliases():
+        return
+    alias = shard_for(instance)
+    with transaction.atomic(using=alias):
+        purge_user(instance.pk, alias)
+
+
+# Rééquilibrage (commande rebalance_shards)
+
+def user_locations(aliases):
+    """{user_id: {alias, ...}} : bases qui contiennent des lignes de chaque utilisateur"""
+    from .models import ArchivedTask, TaskStats, TaskTombstone
+    locations = {}
+    for alias in aliases:
+        for model in (TaskStats, ArchivedTask, TaskTombstone):
+            try:
+                user_ids = set(model.objects.using(alias).values_list('user_id', flat=True).distinct())
+            except DatabaseError:
+                # default sans tables de tâches
+                break
+            for user_id in user_ids:
+                locations.setdefault(user_id, set()).add(alias)
+    return locations
+
+
+def _allocate_ids(alias, count):
+    """Réserve ``count`` ids dans la séquence AUTOINCREMENT de task_task du shard.
+
+    Les ids ne sont uniques que par shard : les tâches déplacées sont
+    renumérotées, archives comprises (même séquence, voir ArchivedTask).
+    Les shards sont des bases SQLite, comme le reste du projet (index FTS5,
+    triggers, PRAGMA de task/db.py).
+    """
+    from .models import ArchivedTask, Task
+    connection = connections[alias]
+    table = Task._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = %s", [table])
+        row = cursor.fetchone()
+        start = max(
+            row[0] if row else 0,
+            Task.objects.using(alias).order_by('-id').values_list('id', flat=True).first() or 0,
+            ArchivedTask.objects.using(alias).order_by('-id').values_list('id', flat=True).first() or 0,
+        )
+        if row:
+            cursor.execute("UPDATE sqlite_sequence SET seq = %s WHERE name = %s", [start + count, table])
+        else:
+            cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)", [table, start + count])
+    return range(start + 1, start + count + 1)
+
+
+def purge_user(user_id, alias):
+    """Supprime les lignes de l'utilisateur dans ``alias`` (sans tombstones)"""
+    from .models import ArchivedTask, Task, TaskReminder, TaskStats, TaskTombstone
+    # Rappels d'abord : leur clé étrangère vers task_task est vérifiée en base
+    TaskReminder.objects.using(alias).filter(task__user_id=user_id)._raw_delete(alias)
+    # Les triggers décrémentent TaskStats et retirent les tâches de l'index FTS
+    for model in (Task, ArchivedTask, TaskTombstone, TaskStats):
+        model.objects.using(alias).filter(user_id=user_id)._raw_delete(alias)
+
+
+def move_user(user, source, target):
+    """Déplace les tâches de ``user`` de ``source`` vers ``target`` et l'y affecte.
+
+    La source reste verrouillée en écriture du début à la fin : les
+    écritures concurrentes sur ce shard attendent (busy_timeout). Copie
+    validée sur la cible, puis affectation, puis suppression à la source :
+    une interruption laisse des lignes en double, que le passage suivant
+    supprime du côté de la base qui n'est pas celle de l'affectation.
+
+    Les tâches changent d'id (unicité par shard) : une tombstone par ancien
+    id et updated_at à maintenant, la synchronisation incrémentale
+    (task/sync.py) voit une suppression et une création.
+    Retourne le nombre de tâches déplacées.
+    """
+    from .events import notify_task_changes
+    from .models import ArchivedTask, Task, TaskReminder, TaskStats, TaskTombstone
+    from .transfer import insert_tasks
+
+    now = timezone.now()
+    with transaction.atomic(using=source):
+        # Première écriture de la transaction, même sans ligne modifiée : prend
+        # le verrou d'écriture de la source
+        TaskStats.objects.using(source).filter(user_id=user.pk).update(total=F('total'))
+        tasks = list(Task.objects.using(source).filter(user_id=user.pk).order_by('id'))
+        archived = list(ArchivedTask.objects.using(source).filter(user_id=user.pk).order_by('id'))
+        tombstones = list(TaskTombstone.objects.using(source).filter(user_id=user.pk))
+        reminders = list(TaskReminder.objects.using(source).filter(task__user_id=user.pk))
+
+        with transaction.atomic(using=target):
+            purge_user(user.pk, target)
+            live_ids = [task.id for task in tasks]
+            old_ids = sorted(live_ids + [task.id for task in archived])
+            new_ids = dict(zip(old_ids, _allocate_ids(target, len(old_ids))))
+            for task in tasks:
+                task.id, task.updated_at = new_ids[task.id], now
+                task._state.db = None
+            insert_tasks(tasks, target, with_ids=True)
+            for task in archived:
+                task.id = new_ids[task.id]
+            ArchivedTask.objects.using(target).bulk_create(archived)
+            TaskTombstone.objects.using(target).bulk_create(
+                [TaskTombstone(user_id=user.pk, task_id=tombstone.task_id, deleted_at=tombstone.deleted_at)
+                 for tombstone in tombstones]
+                # Les tâches archivées ont déjà la leur
+                + [TaskTombstone(user_id=user.pk, task_id=old_id, deleted_at=now) for old_id in live_ids]
+            )
+            TaskReminder.objects.using(target).bulk_create([
+                TaskReminder(task_id=new_ids[reminder.task_id], due_at=reminder.due_at,
+                             delivered_at=reminder.delivered_at)
+                for reminder in reminders
+            ])
+
+        user.shard = None if target == hash_shard(user.pk) else target
+        user.save(update_fields=['shard'])
+        purge_user(user.pk, source)
+
+    notify_task_changes(user.pk, [('reset', {})])
+    return len(tasks)
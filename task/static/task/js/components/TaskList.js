@@ -1,17 +1,95 @@
+// Données intégrées par task_view (json_script), lues une seule fois
+function readInitialTasks() {
+    const element = document.getElementById('initial-tasks');
+    if (!element) return null;
+    try {
+        const data = JSON.parse(element.textContent);
+        element.remove();  // un remontage (reset) repassera par l'API
+        return data;
+    } catch (error) {
+        return null;
+    }
+}
+
+// Vrai si la page est servie sous ASGI (task_view) : seul cas où /api/tasks/events/ répond
+function readLiveUpdates() {
+    const element = document.getElementById('live-updates');
+    try {
+        return Boolean(element && JSON.parse(element.textContent));
+    } catch (error) {
+        return false;
+    }
+}
+
 function TaskList() {
-    const [tasks, setTasks] = React.useState([]);
-    const [filteredTasks, setFilteredTasks] = React.useState([]);
-    const [isLoading, setIsLoading] = React.useState(true);
+    const [initial] = React.useState(readInitialTasks);
+    const [tasks, setTasks] = React.useState(initial ? initial.tasks : []);
+    const [filteredTasks, setFilteredTasks] = React.useState(initial ? initial.tasks : []);
+    const [isLoading, setIsLoading] = React.useState(!initial);
     const [error, setError] = React.useState(null);
     const [hideCompleted, setHideCompleted] = React.useState(false);
-    const [stats, setStats] = React.useState({
+    const [nextCursor, setNextCursor] = React.useState(initial ? initial.next : null);
+    const [isLoadingMore, setIsLoadingMore] = React.useState(false);
+    const [stats, setStats] = React.useState(initial ? initial.stats : {
         total: 0,
         completed: 0,
         active: 0
     });
 
+    // Dernier état connu, pour les événements reçus en direct
+    const tasksRef = React.useRef(tasks);
+    tasksRef.current = tasks;
+    const fetchTasksRef = React.useRef(null);
+
+    // Recharge depuis le serveur quand le filtre change (?status=active) ;
+    // au premier rendu, seulement si la page n'a pas fourni les données
+    const hydrated = React.useRef(Boolean(initial));
     React.useEffect(() => {
+        if (hydrated.current) {
+            hydrated.current = false;
+            return;
+        }
         fetchTasks();
+    }, [hideCompleted]);
+
+    // Mises à jour en direct depuis les autres onglets et appareils (SSE, serveur ASGI)
+    React.useEffect(() => {
+        if (typeof EventSource === 'undefined' || !readLiveUpdates()) return;
+
+        const source = new EventSource('/api/tasks/events/');
+        const on = (type, handler) => source.addEventListener(type, (e) => handler(JSON.parse(e.data)));
+
+        on('task.created', (task) => {
+            if (tasksRef.current.some(t => t.id === task.id)) return;
+            setTasks(prev => [task, ...prev]);
+            adjustStats(1, 0);
+        });
+        on('task.updated', (task) => {
+            setTasks(prev => prev.map(t => t.id === task.id ? { ...t, ...task } : t));
+        });
+        on('task.toggled', ({ id, status }) => {
+            const current = tasksRef.current.find(t => t.id === id);
+            if (current && current.status === status) return;  // déjà appliqué par cet onglet
+            setTasks(prev => prev.map(t => t.id === id ? { ...t, status } : t));
+            if (current) {
+                adjustStats(0, status ? 1 : -1);
+            } else {
+                fetchStats().catch(() => {});
+            }
+        });
+        on('task.deleted', ({ id }) => {
+            const current = tasksRef.current.find(t => t.id === id);
+            if (!current) {
+                fetchStats().catch(() => {});
+                return;
+            }
+            setTasks(prev => prev.filter(t => t.id !== id));
+            adjustStats(-1, current.status ? -1 : 0);
+        });
+        // Trop d'événements manqués : on recharge tout
+        source.addEventListener('reset', () => fetchTasksRef.current && fetchTasksRef.current());
+
+        return () => source.close();
     }, []);
 
     // Filtrer les tâches quand hideCompleted change
@@ -21,28 +99,34 @@ function TaskList() {
         } else {
             setFilteredTasks(tasks);
         }
-        
-        // Mettre à jour les statistiques
-        updateStats(tasks);
     }, [tasks, hideCompleted]);
 
+    // Charge une page de tâches (curseur null = première page)
+    const fetchPage = async (cursor) => {
+        const params = new URLSearchParams();
+        if (hideCompleted) params.set('status', 'active');
+        if (cursor) params.set('cursor', cursor);
+        const query = params.toString();
+        const url = query ? `/api/tasks/?${query}` : '/api/tasks/';
+        const response = await fetch(url, {
+            credentials: 'include'
+        });
+
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+        }
+        return response.json();
+    };
+
     const fetchTasks = async () => {
         setIsLoading(true);
         setError(null);
         
         try {
-            const response = await fetch('/api/tasks/', {
-                credentials: 'include'
-            });
-            
-            if (response.ok) {
-                const data = await response.json();
-                setTasks(data.tasks || []);
-                setFilteredTasks(data.tasks || []);
-                updateStats(data.tasks || []);
-            } else {
-                throw new Error(`HTTP ${response.status}`);
-            }
+            const [data] = await Promise.all([fetchPage(null), fetchStats()]);
+            setTasks(data.tasks || []);
+            setFilteredTasks(data.tasks || []);
+            setNextCursor(data.next || null);
         } catch (error) {
             console.error('Fetch tasks error:', error);
             setError('Failed to load tasks. Please refresh.');
@@ -51,22 +135,62 @@ function TaskList() {
         }
     };
 
-    const updateStats = (taskList) => {
-        const total = taskList.length;
-        const completed = taskList.filter(task => task.status).length;
-        const active = total - completed;
-        
-        setStats({ total, completed, active });
+    fetchTasksRef.current = fetchTasks;
+
+    // Page suivante, à la demande
+    const loadMore = async () => {
+        if (!nextCursor || isLoadingMore) return;
+
+        setIsLoadingMore(true);
+        try {
+            const data = await fetchPage(nextCursor);
+            setTasks(prev => [...prev, ...(data.tasks || [])]);
+            setNextCursor(data.next || null);
+        } catch (error) {
+            console.error('Load more error:', error);
+            setError('Failed to load tasks. Please refresh.');
+        } finally {
+            setIsLoadingMore(false);
+        }
+    };
+
+    // Statistiques calculées par le serveur (toutes les tâches, pas seulement la page chargée)
+    const fetchStats = async () => {
+        const response = await fetch('/api/tasks/stats/', {
+            credentials: 'include'
+        });
+
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+        }
+        const data = await response.json();
+        setStats({ total: data.total, completed: data.completed, active: data.active });
+    };
+
+    // Ajuste les compteurs localement après une action, sans rien recalculer
+    const adjustStats = (totalDelta, completedDelta) => {
+        setStats(prev => {
+            const total = prev.total + totalDelta;
+            const completed = prev.completed + completedDelta;
+            return { total, completed, active: total - completed };
+        });
     };
 
     const handleDelete = (taskId) => {
+        const deleted = tasksRef.current.find(task => task.id === taskId);
         setTasks(prev => prev.filter(task => task.id !== taskId));
+        if (deleted) {
+            adjustStats(-1, deleted.status ? -1 : 0);
+        }
     };
 
     const handleToggle = (taskId, newStatus) => {
+        const current = tasksRef.current.find(task => task.id === taskId);
+        if (current && current.status === newStatus) return;  // déjà reçu en direct
         setTasks(prev => prev.map(task => 
             task.id === taskId ? { ...task, status: newStatus } : task
         ));
+        adjustStats(0, newStatus ? 1 : -1);
     };
 
     const toggleHideCompleted = () => {
@@ -142,6 +266,15 @@ function TaskList() {
                     <a href="/" className="btn btn-primary">
                         <i className="bi bi-plus-circle me-2"></i> New Task
                     </a>
+                    {nextCursor && (
+                        <button
+                            className="btn btn-outline-primary ms-2"
+                            onClick={loadMore}
+                            disabled={isLoadingMore}
+                        >
+                            <i className="bi bi-chevron-down me-2"></i> Load more
+                        </button>
+                    )}
                 </div>
             </div>
         );
@@ -180,6 +313,24 @@ function TaskList() {
                 ))}
             </div>
 
+            {/* Pagination : charger la page suivante */}
+            {nextCursor && (
+                <div className="text-center mt-4">
+                    <button
+                        className="btn btn-outline-primary"
+                        onClick={loadMore}
+                        disabled={isLoadingMore}
+                    >
+                        {isLoadingMore ? (
+                            <span className="spinner-border spinner-border-sm me-2" role="status"></span>
+                        ) : (
+                            <i className="bi bi-chevron-down me-2"></i>
+                        )}
+                        Load more
+                    </button>
+                </div>
+            )}
+
             {/* Message si des tâches sont masquées */}
             {hideCompleted && stats.completed > 0 && (
                 <div className="alert alert-success alert-dismissible fade show mt-4" role="alert">
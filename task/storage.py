@@ -0,0 +1,55 @@
+"""Stockage des fichiers statiques pour la production.
+
+Noms hachés par ManifestStaticFilesStorage (cache navigateur illimité, sans
+risque de servir une ancienne version), plus une copie .gz, et .br si le
+module brotli est installé, de chaque fichier texte. Le serveur web les
+sert tels quels (nginx : ``gzip_static on; brotli_static on;``) au lieu de
+compresser à chaque requête.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # dépendance optionnelle
+    brotli = None
+
+COMPRESSED_EXTENSIONS = ('.js', '.css', '.json', '.svg', '.map', '.txt', '.html')
+# En dessous, la compression ne fait rien gagner
+MIN_COMPRESS_SIZE = 256
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # layout.html référence des fichiers optionnels (task/css/style.css) :
+    # une entrée absente du manifeste ne doit pas provoquer d'erreur 500
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = []
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.append(hashed_name)
+            yield name, hashed_name, processed
+
+        if dry_run:
+            return
+        for hashed_name in dict.fromkeys(hashed_names):
+            if hashed_name.endswith(COMPRESSED_EXTENSIONS):
+                self._compress(hashed_name)
+
+    def _compress(self, name):
+        with self.open(name) as original:
+            content = original.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+
+        variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(content)))
+        for suffix, compressed in variants:
+            if len(compressed) < len(content):
+                if self.exists(name + suffix):
+                    self.delete(name + suffix)
+                self._save(name + suffix, ContentFile(compressed))
@@ -0,0 +1,95 @@
+"""Synchronisation incrémentale des tâches (jetons + tombstones).
+
+Un jeton de synchronisation encode l'instant du dernier échange. Les
+changements sont les tâches dont ``updated_at`` est postérieur au jeton
+(index ``task_user_updated_idx``) et les tombstones plus récentes que lui.
+
+Un jeton antérieur à la rétention, ou au dernier compactage réellement
+effectué (compact_tombstones --days peut être plus court que la rétention),
+a pu manquer des suppressions : il est refusé (ExpiredSyncToken).
+"""
+import base64
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Task, TaskTombstone, TombstoneCompaction
+from .shards import each_shard
+
+# Les écritures en cours peuvent être validées avec un updated_at légèrement
+# antérieur au jeton émis : on recule donc le jeton de cette marge. Les
+# clients reçoivent parfois une tâche deux fois, mais n'en manquent aucune.
+SYNC_SAFETY_MARGIN = timedelta(seconds=2)
+
+
+class InvalidSyncToken(ValueError):
+    pass
+
+
+class ExpiredSyncToken(Exception):
+    """Le jeton est plus ancien que les tombstones conservées ou compactées"""
+
+
+def tombstone_retention():
+    return timedelta(days=getattr(settings, 'TASK_TOMBSTONE_RETENTION_DAYS', 30))
+
+
+def compaction_watermark():
+    """Instant avant lequel des tombstones ont été supprimées, None si jamais compactées"""
+    return TombstoneCompaction.objects.filter(pk=1).values_list('compacted_before', flat=True).first()
+
+
+def encode_token(moment):
+    return base64.urlsafe_b64encode(moment.isoformat().encode()).decode().rstrip('=')
+
+
+def decode_token(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        moment = parse_datetime(base64.urlsafe_b64decode(padded.encode()).decode())
+    except ValueError:
+        raise InvalidSyncToken(token)
+    if moment is None or timezone.is_naive(moment):
+        raise InvalidSyncToken(token)
+    return moment
+
+
+def changes_since(user, token=None):
+    """Retourne (tâches modifiées, ids supprimés, nouveau jeton).
+
+    Sans jeton, toutes les tâches sont renvoyées (synchronisation initiale).
+    """
+    now = timezone.now()
+    next_token = encode_token(now - SYNC_SAFETY_MARGIN)
+
+    tasks = Task.objects.filter(user=user)
+    if token is None:
+        return tasks.order_by('updated_at', 'id'), [], next_token
+
+    since = decode_token(token)
+    watermark = compaction_watermark()
+    if since < now - tombstone_retention() or (watermark is not None and since < watermark):
+        raise ExpiredSyncToken(token)
+
+    tasks = tasks.filter(updated_at__gte=since).order_by('updated_at', 'id')
+    deleted = list(
+        TaskTombstone.objects.filter(user=user, deleted_at__gte=since)
+        .values_list('task_id', flat=True)
+    )
+    return tasks, deleted, next_token
+
+
+def compact_tombstones(retention=None):
+    """Supprime les tombstones plus anciennes que la durée de rétention"""
+    horizon = timezone.now() - (retention if retention is not None else tombstone_retention())
+    # Avant de supprimer : une synchronisation concurrente voit déjà son jeton expiré.
+    # Le repère ne recule jamais (un compactage plus court a déjà eu lieu).
+    watermark = compaction_watermark()
+    if watermark is None or watermark < horizon:
+        TombstoneCompaction.objects.update_or_create(pk=1, defaults={'compacted_before': horizon})
+    deleted = 0
+    for _ in each_shard():
+        deleted += TaskTombstone.objects.filter(deleted_at__lt=horizon).delete()[0]
+    return deleted
@@ -1,3 +1,1258 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import tempfile
+import time as time_module
+from contextlib import ExitStack
+from datetime import datetime, time, timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import caches
+from django.db import OperationalError, connection, connections
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .archive import archive_completed
+from .benchmark import run_clients
+from .checks import check_shared_caches
+from .db import apply_sqlite_pragmas
+from .events import RESET, EventBroker
+from .filters import filter_tasks
+from .management.commands import benchmark_tasks
+from .models import ReplicaHeartbeat, Task, TaskStats, User
+from .pagination import order_tasks
+from . import (
+    async_views, auth, context_processors, ratelimit, reminders, replicas, search, shards, sync, transfer, views,
+)
+
+
+class TaskTestCase(TestCase):
+    """Avec TASK_SHARDS, les tâches vivent dans les bases des shards.
+
+    Les données de test sont écrites hors requête (bulk_create, filter) :
+    tout le cas s'exécute dans le contexte d'un seul shard, celui où les
+    vues liront chaque utilisateur.
+
+    Avec DB_REPLICA_NAME, le réplica de test est un miroir de default qui
+    ne voit pas la transaction du cas : lectures sur le primaire, sauf cas
+    qui redéfinissent DATABASE_REPLICAS (voir ReplicaFileTests).
+    """
+    databases = shards.test_databases()
+
+    @classmethod
+    def setUpClass(cls):
+        aliases = shards.shard_aliases()
+        if aliases:
+            cls.enterClassContext(override_settings(TASK_SHARDS=aliases[:1]))
+            cls.enterClassContext(shards.using_shard(aliases[0]))
+        if replicas.replica_aliases():
+            cls.enterClassContext(override_settings(DATABASE_REPLICAS=[]))
+        # Les budgets du limiteur survivent d'un cas à l'autre (mêmes ids
+        # d'utilisateurs) : activé seulement par RateLimitTests
+        cls.enterClassContext(override_settings(RATELIMIT_ENABLED=False))
+        super().setUpClass()
+
+    @property
+    def task_connection(self):
+        """Connexion des tables des tâches, pour compter leurs requêtes"""
+        aliases = shards.shard_aliases()
+        return connections[aliases[0] if aliases else 'default']
+
+
+class TaskPaginationTests(TaskTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("adele", "adele@example.com", "password")
+        # Même created_at pour plusieurs tâches : l'id départage
+        Task.objects.bulk_create([Task(user=cls.user, title=f"Task {i}") for i in range(7)])
+        Task.objects.filter(user=cls.user, title__in=["Task 2", "Task 3", "Task 4"]).update(
+            created_at=timezone.now() - timedelta(hours=1)
+        )
+
+    def setUp(self):
+        caches['tasks'].clear()
+        self.client.force_login(self.user)
+
+    def test_cursor_walks_every_task_once_in_order(self):
+        ids, cursor = [], None
+        while True:
+            data = self.client.get('/api/tasks/?limit=3' + (f'&cursor={cursor}' if cursor else '')).json()
+            self.assertLessEqual(len(data['tasks']), 3)
+            ids += [task['id'] for task in data['tasks']]
+            cursor = data['next']
+            if not cursor:
+                break
+        expected = list(Task.objects.filter(user=self.user).order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_invalid_cursor_or_limit_returns_400(self):
+        self.assertEqual(self.client.get('/api/tasks/?cursor=abc').status_code, 400)
+        self.assertEqual(self.client.get('/api/tasks/?limit=0').status_code, 400)
+        # Curseur d'un autre tri
+        cursor = self.client.get('/api/tasks/?limit=1').json()['next']
+        self.assertEqual(self.client.get(f'/api/tasks/?sort=task_time&cursor={cursor}').status_code, 400)
+
+
+class TaskStreamTests(TaskTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("basile", "basile@example.com", "password")
+        Task.objects.bulk_create([Task(user=cls.user, title=f"Task {i}") for i in range(5)])
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def stream(self, query):
+        response = self.client.get(f'/api/tasks/?{query}')
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_json_stream_spans_several_chunks(self):
+        with mock.patch.object(views, 'STREAM_CHUNK_SIZE', 2):
+            response, content = self.stream('stream=1')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        tasks = json.loads(content)['tasks']
+        self.assertEqual(len(tasks), 5)
+        self.assertEqual(len({task['id'] for task in tasks}), 5)
+
+    def test_ndjson_stream_is_one_task_per_line(self):
+        response, content = self.stream('stream=ndjson&fields=title')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = content.splitlines()
+        self.assertEqual(sorted(json.loads(line)['title'] for line in lines), [f"Task {i}" for i in range(5)])
+
+
+class TaskBulkTests(TaskTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("celia", "celia@example.com", "password")
+        cls.other = User.objects.create_user("cyril", "cyril@example.com", "password")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.task = Task.objects.create(user=self.user, title="Task")
+        self.foreign = Task.objects.create(user=self.other, title="Not mine")
+
+    def bulk(self, operations):
+        response = self.client.post('/api/tasks/bulk/', {'operations': operations}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_operations_apply_in_one_transaction_with_ordered_results(self):
+        results = self.bulk([
+            {'op': 'create', 'title': "New"},
+            {'op': 'update', 'id': self.task.id, 'title': "Renamed", 'task_time': "09:30"},
+            {'op': 'toggle', 'id': self.task.id},
+            {'op': 'delete', 'id': self.foreign.id},
+            {'op': 'archive'},
+        ])
+        self.assertEqual([result['success'] for result in results], [True, True, True, False, False])
+        self.assertEqual(results[3]['error'], "Task not found")
+        self.assertEqual(results[4]['error'], "Unknown operation")
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.title, self.task.status, self.task.task_time), ("Renamed", True, time(9, 30)))
+        self.assertTrue(Task.objects.filter(id=self.foreign.id).exists())
+        self.assertEqual(TaskStats.objects.get(user=self.user).total, 2)
+
+    def test_invalid_items_are_reported_without_writing(self):
+        results = self.bulk([
+            {'op': 'update', 'id': self.task.id, 'title': None},
+            {'op': 'update', 'id': self.task.id, 'title': "x" * 201},
+            {'op': 'update', 'id': self.task.id, 'description': 5},
+            {'op': 'create', 'title': ["list"]},
+            {'op': 'update', 'id': self.task.id, 'task_time': "25:99"},
+            {'op': 'update', 'id': self.task.id, 'status': "false"},
+            {'op': 'toggle', 'id': self.task.id},
+        ])
+        self.assertEqual([result.get('error') for result in results], ["Invalid operation"] * 6 + [None])
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.title, self.task.status), ("Task", True))
+
+    def test_repeated_toggles_report_each_state(self):
+        with mock.patch.object(views, 'notify_task_changes') as notify:
+            results = self.bulk([{'op': 'toggle', 'id': self.task.id}] * 3)
+        self.assertEqual([result['status'] for result in results], [True, False, True])
+        self.assertEqual([data['status'] for _, data in notify.call_args.args[1]], [True, False, True])
+        self.task.refresh_from_db()
+        self.assertIs(self.task.status, True)
+        self.bulk([{'op': 'toggle', 'id': self.task.id}] * 2)
+        self.task.refresh_from_db()
+        self.assertIs(self.task.status, True)
+
+    def test_single_create_validates_like_bulk(self):
+        for body in ('{"title": ', '[]', '{"title": null}', json.dumps({'title': "x" * 201})):
+            with self.subTest(body=body):
+                response = self.client.post('/api/tasks/', body, content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 1)
+        response = self.client.post('/api/tasks/', {'title': "New", 'task_time': 5}, content_type='application/json')
+        self.assertIsNone(response.json()['task']['task_time'])
+
+
+class ConditionalTaskListTests(TaskTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("denis", "denis@example.com", "password")
+
+    def setUp(self):
+        caches['tasks'].clear()
+        self.client.force_login(self.user)
+        self.tasks = [Task.objects.create(user=self.user, title=f"Task {i}") for i in range(3)]
+
+    def test_matching_etag_returns_304_without_reading_rows(self):
+        etag = self.client.get('/api/tasks/')['ETag']
+        with CaptureQueriesContext(self.task_connection) as queries:
+            response = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse([q for q in queries.captured_queries if 'title' in q['sql']])
+
+    def test_delete_changes_validator(self):
+        first = self.client.get('/api/tasks/')
+        self.assertNotIn('Last-Modified', first)
+        self.client.delete(f'/api/tasks/{self.tasks[0].id}/delete/')
+        response = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['tasks']), 2)
+
+
+class TaskSyncTests(TaskTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("elise", "elise@example.com", "password")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.kept, self.deleted = Task.objects.bulk_create([
+            Task(user=self.user, title="Kept"), Task(user=self.user, title="Deleted"),
+        ])
+
+    def changes(self, since):
+        return self.client.get(f'/api/tasks/changes/?since={since}')
+
+    def test_changes_since_token_include_updates_and_deletions(self):
+        initial = self.client.get('/api/tasks/changes/').json()
+        self.assertEqual(len(initial['tasks']), 2)
+        self.client.post(f'/api/tasks/{self.kept.id}/toggle/')
+        self.client.delete(f'/api/tasks/{self.deleted.id}/delete/')
+
+        data = self.changes(initial['token']).json()
+        self.assertEqual([(task['id'], task['status']) for task in data['tasks']], [(self.kept.id, True)])
+        self.assertEqual(data['deleted'], [self.deleted.id])
+        self.assertEqual(self.changes("not-a-token").status_code, 400)
+
+    def test_tokens_older_than_actual_compaction_expire(self):
+        old_token = sync.encode_token(timezone.now() - timedelta(days=10))
+        recent_token = sync.encode_token(timezone.now() - timedelta(days=3))
+        self.assertEqual(self.changes(old_token).status_code, 200)
+
+        # Rétention de 30 jours, mais compactage à 7 jours
+        sync.compact_tombstones(timedelta(days=7))
+        response = self.changes(old_token)
+        self.assertEqual(response.status_code, 410)
+        self.assertIs(response.json()['reset'], True)
+        self.assertEqual(self.changes(recent_token).status_code, 200)
+
+        # Un compactage plus long ne fait pas reculer le repère
+        sync.compact_tombstones(timedelta(days=30))
+        self.assertEqual(self.changes(old_token).status_code, 410)
+
+
+class TaskListCacheTests(TaskTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("fabien", "fabien@example.com", "password")
+        cls.task = Task.objects.create(user=cls.user, title="Task")
+
+    def setUp(self):
+        caches['tasks'].clear()
+        self.client.force_login(self.user)
+
+    def row_queries(self, url):
+        with CaptureQueriesContext(self.task_connection) as queries:
+            data = self.client.get(url).json()
+        return data, [q['sql'] for q in queries.captured_queries if '"task_task"."title"' in q['sql']]
+
+    def test_second_read_is_served_from_cache(self):
+        self.assertTrue(self.row_queries('/api/tasks/')[1])
+        data, queries = self.row_queries('/api/tasks/')
+        self.assertEqual(queries, [])
+        self.assertEqual(data['tasks'][0]['title'], "Task")
+        # Autre variante de la requête : autre entrée
+        self.assertTrue(self.row_queries('/api/tasks/?fields=title')[1])
+
+    def test_every_write_path_invalidates(self):
+        self.client.get('/api/tasks/')
+        writes = [
+            lambda: self.client.post(f'/api/tasks/{self.task.id}/toggle/'),
+            lambda: self.client.patch(f'/api/tasks/{self.task.id}/update/', {'title': "Renamed"},
+                                      content_type='application/json'),
+            lambda: self.client.post('/api/tasks/', {'title': "New"}, content_type='application/json'),
+            lambda: self.client.post('/api/tasks/bulk/', {'operations': [{'op': 'toggle', 'id': self.task.id}]},
+                                     content_type='application/json'),
+        ]
+        for index, write in enumerate(writes):
+            before = self.client.get('/api/tasks/').json()
+            write()
+            with self.subTest(write=index):
+                self.assertNotEqual(self.client.get('/api/tasks/').json(), before)
+
+
+class TaskStatsTests(TaskTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("gaspard", "gaspard@example.com", "password")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def counters(self):
+        stats = TaskStats.objects.get(user=self.user)
+        return stats.total, stats.completed
+
+    def test_triggers_follow_every_kind_of_write(self):
+        tasks = Task.objects.bulk_create([Task(user=self.user, title=f"Task {i}") for i in range(4)])
+        self.assertEqual(self.counters(), (4, 0))
+        Task.objects.filter(id__in=[tasks[0].id, tasks[1].id]).update(status=True)
+        self.assertEqual(self.counters(), (4, 2))
+        tasks[0].delete()
+        self.assertEqual(self.counters(), (3, 1))
+        Task.objects.filter(user=self.user, status=False).delete()
+        self.assertEqual(self.counters(), (1, 1))
+        self.assertEqual(self.counters(), (Task.objects.count(), Task.objects.filter(status=True).count()))
+
+    def test_stats_endpoint_reads_counters_and_time_buckets(self):
+        Task.objects.bulk_create([
+            Task(user=self.user, title="Done", status=True),
+            Task(user=self.user, title="Early", task_time=time(0, 0)),
+            Task(user=self.user, title="Unscheduled"),
+        ])
+        data = self.client.get('/api/tasks/stats/').json()
+        self.assertEqual((data['total'], data['completed'], data['active']), (3, 1, 2))
+        self.assertEqual(data['overdue'] + data['upcoming'], 1)
+        self.assertEqual(data['unscheduled'], 1)
+
+
+class TaskSearchTests(TaskTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("hugo", "hugo@example.com", "password")
+        other = User.objects.create_user("helene", "helene@example.com", "password")
+        Task.objects.bulk_create(
+            [Task(user=cls.user, title=f"Groceries {i}", description="milk and bread") for i in range(60)]
+            + [Task(user=cls.user, title="Call plumber", description="groceries later"),
+               Task(user=other, title="Groceries elsewhere")]
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def search(self, query):
+        return self.client.get(f'/api/tasks/search/?{query}')
+
+    def test_prefix_match_ranks_title_first_and_stays_per_user(self):
+        tasks = self.search('q=groc&limit=50').json()['tasks']
+        self.assertEqual(len(tasks), 50)
+        self.assertTrue(all(task['title'].startswith("Groceries ") for task in tasks))
+        self.assertIn("**", tasks[0]['snippet'])
+        self.assertEqual(self.search('q=plumb*"').json()['tasks'][0]['title'], "Call plumber")
+
+    def test_limit_is_bounded(self):
+        self.assertEqual(len(self.search('q=groc&limit=-1').json()['tasks']), 1)
+        self.assertEqual(len(self.search('q=groc&limit=500').json()['tasks']), 50)
+        self.assertEqual(self.search('q=groc&limit=abc').status_code, 400)
+
+    def test_rebuild_does_not_duplicate_rows(self):
+        self.assertEqual(search.rebuild_index(), 62)
+        search.rebuild_index()
+        with self.task_connection.cursor() as cursor:
+            cursor.execute("SELECT count(*), count(DISTINCT rowid) FROM task_task_fts WHERE task_task_fts MATCH 'milk'")
+            self.assertEqual(cursor.fetchone(), (60, 60))
+
+
+class TaskQueryPlanTests(TaskTestCase):
+    """Les filtres courants de l'API doivent être servis par un index, pas par un parcours"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("alice", "alice@example.com", "password")
+        Task.objects.bulk_create([
+            Task(user=cls.user, title=f"Task {i}", status=i % 2 == 0, task_time=time(i % 24, 0))
+            for i in range(50)
+        ])
+
+    def query_plan(self, params, sort='-created_at'):
+        queryset = filter_tasks(Task.objects.filter(user=self.user), params)
+        return order_tasks(queryset, sort).explain()
+
+    def test_default_listing_uses_created_index(self):
+        self.assertIn("task_user_created_idx", self.query_plan({}))
+
+    def test_status_filter_uses_status_created_index(self):
+        plan = self.query_plan({'status': 'active'})
+        self.assertIn("task_user_status_created_idx", plan)
+        self.assertNotIn("SCAN task_task", plan)
+
+    def test_status_and_time_range_uses_status_time_index(self):
+        plan = self.query_plan(
+            {'status': 'active', 'task_time_after': '08:00', 'task_time_before': '12:00'},
+            sort='task_time',
+        )
+        self.assertIn("task_user_status_time_idx", plan)
+        self.assertNotIn("SCAN task_task", plan)
+
+
+class SqlitePragmaTests(TaskTestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_profile_is_applied_on_connect(self):
+        # 1 = NORMAL, 2 = MEMORY
+        self.assertEqual(
+            [self.pragma(name) for name in ('busy_timeout', 'synchronous', 'cache_size', 'temp_store')],
+            [5000, 1, -20000, 2],
+        )
+
+    def apply(self, pragmas):
+        with override_settings(SQLITE_PRAGMAS=pragmas):
+            apply_sqlite_pragmas(None, connection)
+
+    def test_profile_is_read_from_settings(self):
+        self.addCleanup(self.apply, {'cache_size': -20000})
+        self.apply({'cache_size': -1000})
+        self.assertEqual(self.pragma('cache_size'), -1000)
+
+
+class AsyncTaskViewTests(TaskTestCase):
+    """Les vues async servent aussi sous WSGI (Client) : mêmes contrats que views.py"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("ines", "ines@example.com", "password")
+        Task.objects.bulk_create([Task(user=cls.user, title=f"Task {i}", task_time=time(9, i)) for i in range(3)])
+
+    def setUp(self):
+        caches['tasks'].clear()
+        self.client.force_login(self.user)
+        self.task = Task.objects.filter(user=self.user).first()
+
+    def test_list_matches_sync_view(self):
+        for query in ('', '?limit=2&fields=title', '?status=active&sort=task_time'):
+            with self.subTest(query=query):
+                caches['tasks'].clear()
+                expected = self.client.get(f'/api/tasks/{query}').json()
+                caches['tasks'].clear()
+                self.assertEqual(self.client.get(f'/api/async/tasks/{query}').json(), expected)
+
+    def test_list_revalidates_and_streams_like_sync_view(self):
+        response = self.client.get('/api/async/tasks/')
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('csrftoken', response.cookies)
+        self.assertEqual(self.client.get('/api/async/tasks/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        async def stream(url):
+            response = await self.async_client.get(url)
+            return b''.join([chunk async for chunk in response.streaming_content])
+
+        self.async_client.force_login(self.user)
+        for query in ('stream=1', 'stream=ndjson&fields=title'):
+            with self.subTest(query=query):
+                expected = b''.join(self.client.get(f'/api/tasks/?{query}').streaming_content)
+                self.assertEqual(async_to_sync(stream)(f'/api/async/tasks/?{query}'), expected)
+
+    def test_create_validates_like_sync_view(self):
+        for body in ('{"title": ', '{"title": null}', json.dumps({'title': "x" * 201})):
+            with self.subTest(body=body):
+                response = self.client.post('/api/async/tasks/', body, content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 3)
+
+    def test_async_list_includes_archives_in_shared_cache(self):
+        Task.objects.filter(id=self.task.id).update(status=True, updated_at=timezone.now() - timedelta(days=90))
+        archive_completed(timedelta(days=30))
+        # L'entrée rangée par la vue async est relue par la vue sync
+        archived = self.client.get('/api/async/tasks/?include_archived=1').json()
+        self.assertEqual(len(archived['tasks']), 3)
+        self.assertEqual(self.client.get('/api/tasks/?include_archived=1').json(), archived)
+        self.assertEqual(len(self.client.get('/api/async/tasks/').json()['tasks']), 2)
+
+    def test_toggle_conditional_update_and_delete(self):
+        response = self.client.post(f'/api/async/tasks/{self.task.id}/toggle/')
+        self.assertIs(response.json()['task']['status'], True)
+        stale = response['ETag']
+        self.client.post(f'/api/async/tasks/{self.task.id}/toggle/')
+        response = self.client.patch(f'/api/async/tasks/{self.task.id}/update/', {'title': "Renamed"},
+                                     content_type='application/json', HTTP_IF_MATCH=stale)
+        self.assertEqual(response.status_code, 412)
+
+        created = self.client.post('/api/async/tasks/', {'title': "New"}, content_type='application/json').json()
+        response = self.client.delete(f"/api/async/tasks/{created['task']['id']}/delete/")
+        self.assertIs(response.json()['success'], True)
+        self.assertEqual(self.client.delete(f"/api/async/tasks/{created['task']['id']}/delete/").status_code, 404)
+
+
+class BenchmarkQueryCountTests(TaskTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("bench", "bench@example.com", "password")
+        Task.objects.create(user=cls.user, title="Task")
+
+    def run_inline(self, setup, request, clients, requests_per_client):
+        # Requêtes dans le thread du test : les threads ne verraient pas ses données
+        state = setup(0)
+        for i in range(requests_per_client):
+            request(state, i)
+        return {'requests': requests_per_client}
+
+    def test_queries_are_counted_on_every_database(self):
+        command = benchmark_tasks.Command(stdout=io.StringIO())
+        options = {'clients': 1, 'requests': 1}
+        with mock.patch.object(benchmark_tasks, 'run_clients', self.run_inline):
+            caches['tasks'].clear()
+            result = command.run_scenario('list', [self.user], options)
+
+            caches['tasks'].clear()
+            client = Client()
+            client.force_login(self.user)
+            with ExitStack() as stack:
+                contexts = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in self.databases]
+                client.get('/api/tasks/')
+        self.assertEqual(result['queries_per_request'], sum(len(context) for context in contexts))
+        self.assertGreater(result['queries_per_request'], 0)
+
+
+class BenchmarkToolsTests(SimpleTestCase):
+    def test_run_clients_counts_errors_by_cause(self):
+        def request(state, i):
+            if i == 3:
+                raise OperationalError("database is locked")
+            return 500 if i == 4 else 200
+
+        result = run_clients(lambda index: None, request, clients=3, requests_per_client=5)
+        self.assertEqual(result['requests'], 15)
+        self.assertEqual(result['errors'], {'locked': 3, '500': 3})
+        self.assertEqual(result['error_rate'], 0.4)
+        self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+    def test_baseline_comparison_flags_regressions_beyond_tolerance(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as baseline:
+            json.dump({'scenarios': {'list': {'p50_ms': 10, 'p99_ms': 20, 'queries_per_request': 4}}}, baseline)
+            baseline.flush()
+            results = {'scenarios': {'list': {'p50_ms': 11, 'p99_ms': 30, 'queries_per_request': 4}}}
+            command = benchmark_tasks.Command(stdout=io.StringIO())
+            self.assertEqual(command.compare(baseline.name, results, 0.2), [('list', 'p99_ms')])
+            self.assertEqual(command.compare(baseline.name, results, 0.6), [])
+
+
+class TaskEventBrokerTests(SimpleTestCase):
+    def test_thousand_concurrent_subscribers(self):
+        broker = EventBroker()
+
+        async def scenario():
+            subscriptions = [broker.subscribe(user_id % 10, None) for user_id in range(1000)]
+            self.assertEqual(broker.subscriber_count(), 1000)
+
+            # Publication depuis un autre thread, comme une vue sync
+            loop = asyncio.get_running_loop()
+            for user_id in range(10):
+                await loop.run_in_executor(None, broker.publish, user_id, 'task.toggled', {'id': user_id})
+
+            events = await asyncio.wait_for(
+                asyncio.gather(*(subscription.get() for subscription in subscriptions)), timeout=5
+            )
+            for subscription in subscriptions:
+                subscription.close()
+            return subscriptions, events
+
+        subscriptions, events = asyncio.run(scenario())
+        for subscription, event in zip(subscriptions, events):
+            self.assertEqual(event.data, {'id': subscription.user_id})
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    def test_slow_subscriber_is_reset_instead_of_buffering(self):
+        broker = EventBroker(queue_size=5)
+
+        async def scenario():
+            subscription = broker.subscribe(1)
+            for i in range(20):
+                broker.publish(1, 'task.created', {'id': i})
+            await asyncio.sleep(0)
+            self.assertLessEqual(subscription.queue.qsize(), 5)
+            events = [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]
+            subscription.close()
+            return events
+
+        self.assertIn(RESET, asyncio.run(scenario()))
+
+    def test_resume_from_last_event_id(self):
+        broker = EventBroker(history=3)
+        for i in range(5):
+            broker.publish(1, 'task.created', {'id': i})
+
+        async def replay(last_event_id):
+            subscription = broker.subscribe(1, last_event_id)
+            events = [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]
+            subscription.close()
+            return events
+
+        self.assertEqual([event.id for event in asyncio.run(replay(3))], [4, 5])
+        # Les événements 2 à 3 ne sont plus en mémoire : le client doit tout recharger
+        self.assertEqual(asyncio.run(replay(1)), [RESET])
+
+
+class TaskEventStreamTests(TaskTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("sse", "sse@example.com", "password")
+
+    def setUp(self):
+        # Broker neuf : l'historique global est indexé par user_id, réutilisé d'un test à l'autre
+        self.broker = EventBroker()
+        patcher = mock.patch.object(async_views, 'broker', self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+
+    def read_stream(self, limit=None, headers=None, on_open=None):
+        async def scenario():
+            response = await self.async_client.get('/api/tasks/events/', headers=headers or {})
+            stream = response.streaming_content
+            chunks = []
+            try:
+                async for chunk in stream:
+                    chunks.append(chunk.decode())
+                    if len(chunks) == 1 and on_open:
+                        on_open()
+                    if limit and len(chunks) >= limit:
+                        break
+            finally:
+                await stream.aclose()
+            return response, chunks
+
+        return async_to_sync(scenario)()
+
+    def test_wsgi_returns_501(self):
+        response = self.client.get('/api/tasks/events/')
+        self.assertEqual(response.status_code, 501)
+
+    def test_resume_from_last_event_id(self):
+        for i in range(3):
+            self.broker.publish(self.user.pk, 'task.created', {'id': i})
+        response, chunks = self.read_stream(limit=3, headers={'Last-Event-ID': '1'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(chunks[0], 'retry: 3000\n\n')
+        self.assertTrue(chunks[1].startswith('id: 2\n'))
+        self.assertTrue(chunks[2].startswith('id: 3\n'))
+
+    def test_live_event_is_delivered(self):
+        _, chunks = self.read_stream(
+            limit=2, on_open=lambda: self.broker.publish(self.user.pk, 'task.toggled', {'id': 7})
+        )
+        self.assertIn('event: task.toggled\n', chunks[1])
+
+    @override_settings(TASK_EVENTS_HEARTBEAT=0.01, TASK_EVENTS_IDLE_TIMEOUT=0.05)
+    def test_heartbeat_then_idle_close(self):
+        _, chunks = self.read_stream()
+        self.assertEqual(chunks[1], ': heartbeat\n\n')
+        self.assertNotIn('id:', ''.join(chunks))
+        self.assertEqual(self.broker.subscriber_count(), 0)
+
+    @override_settings(TASK_EVENTS_HEARTBEAT=0.01, TASK_EVENTS_IDLE_TIMEOUT=60, TASK_EVENTS_MAX_AGE=0.05)
+    def test_max_age_closes_stream(self):
+        started = time_module.monotonic()
+        _, chunks = self.read_stream()
+        self.assertLess(time_module.monotonic() - started, 5)
+        self.assertIn(': heartbeat\n\n', chunks)
+        self.assertEqual(self.broker.subscriber_count(), 0)
+
+
+class RequestTimingMiddlewareTests(TaskTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("bob", "bob@example.com", "password")
+        Task.objects.create(user=cls.user, title="Task")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def timings(self, response):
+        return dict(
+            (entry.split(';')[0].strip(), entry) for entry in response['Server-Timing'].split(',')
+        )
+
+    def test_server_timing_reports_queries_view_and_render(self):
+        response = self.client.get('/task/')
+        timings = self.timings(response)
+        self.assertEqual(set(timings), {'total', 'db', 'view', 'render'})
+        self.assertRegex(timings['db'], r'desc="[1-9]\d* queries"')
+
+    @override_settings(REQUEST_TIMING_SLOW_MS=0)
+    def test_slow_requests_are_logged_as_json(self):
+        with self.assertLogs('task.timing', 'WARNING') as logs:
+            self.client.get('/api/tasks/')
+        record = logs.records[0].timing
+        self.assertEqual(record['path'], '/api/tasks/')
+        self.assertGreater(record['queries'], 0)
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_requests_only_measure_total(self):
+        response = self.client.get('/api/tasks/')
+        self.assertEqual(set(self.timings(response)), {'total'})
+
+
+class TaskMutationTests(TaskTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("carol", "carol@example.com", "password")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.task = Task.objects.create(user=self.user, title="Task", description="Details")
+
+    def test_toggle_is_a_single_update(self):
+        with CaptureQueriesContext(self.task_connection) as queries:
+            response = self.client.post(f'/api/tasks/{self.task.id}/toggle/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIs(response.json()['task']['status'], True)
+        task_queries = [q['sql'] for q in queries.captured_queries if '"task_task"' in q['sql']]
+        self.assertEqual(len(task_queries), 1)
+        self.assertTrue(task_queries[0].startswith('UPDATE'))
+
+    def test_partial_update_keeps_concurrent_changes(self):
+        self.client.post(f'/api/tasks/{self.task.id}/toggle/')
+        response = self.client.patch(
+            f'/api/tasks/{self.task.id}/update/', {'title': "Renamed"}, content_type='application/json',
+        )
+        self.assertEqual(response.json()['task']['title'], "Renamed")
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.title, self.task.description, self.task.status), ("Renamed", "Details", True))
+
+    def test_stale_if_match_returns_412(self):
+        etag = self.client.post(f'/api/tasks/{self.task.id}/toggle/')['ETag']
+        self.client.post(f'/api/tasks/{self.task.id}/toggle/', HTTP_IF_MATCH=etag)
+        response = self.client.post(f'/api/tasks/{self.task.id}/toggle/', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.assertIs(response.json()['task']['status'], False)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_missing_task_with_if_match_returns_404(self):
+        response = self.client.post('/api/tasks/0/toggle/', HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, 404)
+
+    def test_unparsable_if_match_returns_412(self):
+        for header in ('"abc"', 'W/"abc"', 'garbage'):
+            with self.subTest(header=header):
+                response = self.client.patch(
+                    f'/api/tasks/{self.task.id}/update/', {'title': "Renamed"},
+                    content_type='application/json', HTTP_IF_MATCH=header,
+                )
+                self.assertEqual(response.status_code, 412)
+        self.assertEqual(self.client.post('/api/tasks/0/toggle/', HTTP_IF_MATCH='"abc"').status_code, 404)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, "Task")
+
+    def test_invalid_title_returns_400(self):
+        for title in (None, 5, "x" * 201):
+            with self.subTest(title=title):
+                response = self.client.patch(
+                    f'/api/tasks/{self.task.id}/update/', {'title': title}, content_type='application/json',
+                )
+                self.assertEqual(response.status_code, 400)
+
+
+class TaskFieldsTests(TaskTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("dave", "dave@example.com", "password")
+        Task.objects.create(user=cls.user, title="Task", description="Long description", task_time=time(9, 30))
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_sparse_fieldset_selects_only_requested_columns(self):
+        with CaptureQueriesContext(self.task_connection) as queries:
+            response = self.client.get('/api/tasks/?fields=title,task_time')
+        self.assertEqual(response.json()['tasks'], [{'title': "Task", 'task_time': "09:30"}])
+        select = next(q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT "task_task"."title"'))
+        self.assertNotIn('"description"', select)
+
+    def test_unknown_field_is_rejected(self):
+        self.assertEqual(self.client.get('/api/tasks/?fields=password').status_code, 400)
+
+
+class TaskPageTests(TaskTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("erin", "erin@example.com", "password")
+        Task.objects.create(user=cls.user, title="Embedded task", status=True)
+
+    def setUp(self):
+        caches['tasks'].clear()
+        self.client.force_login(self.user)
+
+    def test_first_page_and_stats_are_embedded(self):
+        response = self.client.get('/task/')
+        initial = response.context['initial_tasks']
+        self.assertEqual([task['title'] for task in initial['tasks']], ["Embedded task"])
+        self.assertEqual(initial['stats'], {'total': 1, 'completed': 1, 'active': 0})
+        self.assertContains(response, '<script id="initial-tasks" type="application/json">')
+
+    def test_live_updates_disabled_under_wsgi(self):
+        response = self.client.get('/task/')
+        self.assertContains(response, '<script id="live-updates" type="application/json">false</script>')
+
+    @override_settings(TASK_JS_BUNDLE=True)
+    def test_missing_bundle_falls_back_to_babel(self):
+        context_processors.js_bundle_available.cache_clear()
+        self.addCleanup(context_processors.js_bundle_available.cache_clear)
+        with mock.patch.object(context_processors, 'JS_BUNDLE', 'task/dist/missing.bundle.js'), \
+                self.assertLogs('task.assets', 'WARNING'):
+            response = self.client.get('/task/')
+        self.assertContains(response, 'babel.min.js')
+        self.assertNotContains(response, 'tasks.bundle.js')
+
+        context_processors.js_bundle_available.cache_clear()
+        with mock.patch.object(context_processors, 'js_bundle_available', return_value=True):
+            response = self.client.get('/task/')
+        self.assertContains(response, 'tasks.bundle.js')
+        self.assertNotContains(response, 'babel.min.js')
+
+    def test_embedded_page_matches_api(self):
+        embedded = self.client.get('/task/').context['initial_tasks']
+        api = self.client.get('/api/tasks/').json()
+        self.assertEqual(embedded['tasks'], api['tasks'])
+
+
+class TaskReminderTests(TaskTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("frank", "frank@example.com", "password")
+        Task.objects.bulk_create([
+            Task(user=cls.user, title="Due 1", task_time=time(8, 58)),
+            Task(user=cls.user, title="Due 2", task_time=time(9, 0)),
+            Task(user=cls.user, title="Due 3", task_time=time(9, 0)),
+            Task(user=cls.user, title="Done", task_time=time(9, 0), status=True),
+            Task(user=cls.user, title="Later", task_time=time(9, 30)),
+            Task(user=cls.user, title="Unscheduled"),
+        ])
+
+    def setUp(self):
+        reminders.outbox.clear()
+        self.backend = reminders.MemoryBackend()
+
+    def run_at(self, hour, minute, **kwargs):
+        now = timezone.make_aware(datetime(2026, 3, 2, hour, minute))
+        return reminders.run_reminders(self.backend, now=now, lookback=300, **kwargs)
+
+    def test_sends_due_active_tasks_once(self):
+        metrics = self.run_at(9, 0, batch_size=2)
+        self.assertEqual(sorted(r.title for r in reminders.outbox), ["Due 1", "Due 2", "Due 3"])
+        self.assertEqual((metrics['sent'], metrics['batches']), (3, 2))
+        self.assertEqual(metrics['max_lag_s'], 120)
+
+        # Redémarrage : la même fenêtre ne renvoie rien
+        metrics = self.run_at(9, 1)
+        self.assertEqual((metrics['sent'], metrics['skipped']), (0, 3))
+        self.assertEqual(len(reminders.outbox), 3)
+
+    def test_window_crossing_midnight(self):
+        Task.objects.create(user=self.user, title="Late", task_time=time(23, 59))
+        Task.objects.create(user=self.user, title="Early", task_time=time(0, 1))
+        self.run_at(0, 2)
+        self.assertEqual(sorted(r.title for r in reminders.outbox), ["Early", "Late"])
+        late = next(r for r in reminders.outbox if r.title == "Late")
+        self.assertEqual(timezone.localtime(late.due_at).date().day, 1)
+
+    def test_range_query_uses_status_time_index(self):
+        plan = Task.objects.filter(status__in=[False], task_time__gte=time(8), task_time__lte=time(9)).explain()
+        self.assertIn("task_status_time_idx", plan)
+
+
+class TaskTransferTests(TaskTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.source = User.objects.create_user("gina", "gina@example.com", "password")
+        cls.target = User.objects.create_user("hank", "hank@example.com", "password")
+        Task.objects.bulk_create([
+            Task(user=cls.source, title=f'Task, "{i}"', description="Line 1\nLine 2", status=i % 2 == 0,
+                 task_time=time(9, i))
+            for i in range(5)
+        ])
+
+    def export(self, fmt):
+        self.client.force_login(self.source)
+        response = self.client.get(f'/api/tasks/export/?format={fmt}')
+        return b''.join(response.streaming_content)
+
+    def test_csv_round_trip_keeps_fields_and_created_at(self):
+        content = self.export('csv')
+        self.client.force_login(self.target)
+        response = self.client.post('/api/tasks/import/?batch_size=2', content, content_type='text/csv')
+        self.assertEqual(response.json()['imported'], 5)
+
+        columns = ('title', 'description', 'status', 'task_time', 'created_at')
+        source = list(Task.objects.filter(user=self.source).order_by('id').values_list(*columns))
+        target = list(Task.objects.filter(user=self.target).order_by('id').values_list(*columns))
+        self.assertEqual(source, target)
+
+    def test_batches_are_stamped_when_written(self):
+        records = transfer.read_records(self.export('ndjson').decode().splitlines(keepends=True), 'ndjson')
+        tokens = []
+
+        def on_batch(processed):
+            # Jeton émis entre deux lots, sans la marge de sécurité
+            tokens.append(sync.encode_token(timezone.now()))
+
+        transfer.import_tasks(records, user=self.target, batch_size=2, on_batch=on_batch)
+        tasks, _, _ = sync.changes_since(self.target, tokens[0])
+        self.assertEqual(tasks.count(), 3)
+
+    def test_failed_import_reports_committed_records_for_resume(self):
+        lines = self.export('ndjson').splitlines(keepends=True)
+        broken = b''.join(lines[:3] + [b'{"title": ""}\n'] + lines[3:])
+        self.client.force_login(self.target)
+
+        response = self.client.post('/api/tasks/import/?batch_size=2', broken, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['processed'], 2)
+
+        fixed = b''.join(lines[:3] + [b'{"title": "Fixed"}\n'] + lines[3:])
+        response = self.client.post('/api/tasks/import/?skip=2', fixed, content_type='application/x-ndjson')
+        self.assertEqual(response.json()['processed'], 6)
+        self.assertEqual(Task.objects.filter(user=self.target).count(), 6)
+
+    def test_mistyped_fields_are_rejected_with_400(self):
+        self.client.force_login(self.target)
+        for record in (
+            {"title": "Task", "task_time": 930},
+            {"title": "Task", "created_at": 1767254400},
+            {"title": ["Task"]},
+            {"title": "x" * 201},
+            {"title": "Task", "description": {"text": "..."}},
+        ):
+            with self.subTest(record=record):
+                response = self.client.post(
+                    '/api/tasks/import/', json.dumps(record), content_type='application/x-ndjson'
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("Line 1", response.json()['error'])
+        with self.assertRaisesMessage(transfer.InvalidRecord, "unknown user"):
+            transfer.import_tasks([(1, {"user": ["gina"], "title": "Task"})])
+        self.assertFalse(Task.objects.filter(user=self.target).exists())
+
+
+class CachedAuthenticationTests(TaskTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("iris", "iris@example.com", "password")
+        cls.task = Task.objects.create(user=cls.user, title="Task")
+
+    def setUp(self):
+        caches['sessions'].clear()
+        self.client.login(username="iris", password="password")
+        self.url = f'/api/tasks/{self.task.id}/toggle/'
+
+    def test_toggle_with_cached_session_is_one_statement(self):
+        self.client.post(self.url)  # session et utilisateur mis en cache
+        with self.assertNumQueries(1, using=self.task_connection.alias):
+            response = self.client.post(self.url)
+        self.assertIs(response.json()['task']['status'], False)
+
+    def test_password_change_invalidates_cached_user(self):
+        self.client.post(self.url)
+        self.user.set_password("changed")
+        self.user.save()
+        # Le hachage de session ne correspond plus : déconnecté
+        self.assertEqual(self.client.post(self.url).status_code, 302)
+
+    def test_process_local_cache_is_short_lived_and_flagged(self):
+        self.assertEqual(auth.user_cache_timeout(caches['sessions']), 10)
+        with override_settings(DEBUG=False):
+            self.assertIn("'sessions'", " ".join(error.msg for error in check_shared_caches(None)))
+        shared = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': tempfile.gettempdir()}
+        with override_settings(DEBUG=False, CACHES={**settings.CACHES, 'sessions': shared}):
+            self.assertEqual(auth.user_cache_timeout(caches['sessions']), 300)
+            self.assertNotIn("'sessions'", " ".join(error.msg for error in check_shared_caches(None)))
+
+
+class TaskAdminTests(TaskTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "password")
+        owners = User.objects.bulk_create([User(username=f"owner-{i}") for i in range(10)])
+        Task.objects.bulk_create([
+            Task(user=owners[i % 10], title=f"Task {i}", status=i % 2 == 0) for i in range(10000)
+        ])
+
+    def setUp(self):
+        caches['sessions'].clear()
+        caches['tasks'].clear()
+        self.client.force_login(self.admin)
+        self.client.get('/admin/task/task/')  # session et utilisateur en cache
+
+    def test_changelist_query_count_is_constant(self):
+        # Total (TaskStats), une page de tâches (avec leur user, sauf sur un
+        # shard) ; le filtre utilisateur ne charge pas la liste des utilisateurs
+        for url in ('/admin/task/task/', '/admin/task/task/?status__exact=0&p=3'):
+            with self.subTest(url=url), self.assertNumQueries(2, using=self.task_connection.alias):
+                response = self.client.get(url)
+                self.assertContains(response, "owner-")
+                self.assertContains(response, 'name="username"')
+
+    def test_username_filter(self):
+        response = self.client.get('/admin/task/task/?username=owner-3&status__exact=0')
+        self.assertEqual({task.user.username for task in response.context['cl'].result_list}, {"owner-3"})
+        self.assertContains(response, '<input type="hidden" name="status__exact" value="0">', html=True)
+
+    def test_admin_writes_notify_owners(self):
+        task = Task.objects.filter(user=User.objects.get(username="owner-1")).first()
+        new_owner = User.objects.get(username="owner-2")
+        with mock.patch('task.admin.notify_task_changes') as notify:
+            self.client.post(f'/admin/task/task/{task.id}/change/', {
+                'user': new_owner.id, 'title': "Moved", 'description': "", 'status': 'on',
+            })
+            self.assertEqual({call.args[0] for call in notify.call_args_list}, {task.user_id, new_owner.id})
+            notify.reset_mock()
+            self.client.post(f'/admin/task/task/{task.id}/delete/', {'post': 'yes'})
+            notify.assert_called_once_with(new_owner.id, [('reset', {})])
+        self.assertFalse(Task.objects.filter(id=task.id).exists())
+
+    def test_mark_done_is_set_based(self):
+        ids = list(Task.objects.filter(status=False).values_list('id', flat=True)[:500])
+        with CaptureQueriesContext(self.task_connection) as queries:
+            self.client.post('/admin/task/task/', {'action': 'mark_done', '_selected_action': ids})
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "task_task"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(Task.objects.filter(id__in=ids, status=True).count(), 500)
+
+
+class TaskArchiveTests(TaskTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("jane", "jane@example.com", "password")
+        Task.objects.bulk_create([
+            Task(user=cls.user, title=f"Task {i}", status=i % 2 == 0, task_time=time(9, i) if i % 3 else None)
+            for i in range(12)
+        ])
+        # Terminées il y a longtemps : archivables
+        Task.objects.filter(status=True).update(updated_at=timezone.now() - timedelta(days=90))
+
+    def setUp(self):
+        caches['tasks'].clear()
+        self.client.force_login(self.user)
+
+    def titles(self, query):
+        titles, cursor = [], None
+        while True:
+            url = f'/api/tasks/?{query}&limit=4' + (f'&cursor={cursor}' if cursor else '')
+            data = self.client.get(url).json()
+            titles += [task['title'] for task in data['tasks']]
+            cursor = data['next']
+            if not cursor:
+                return titles
+
+    def test_archives_in_batches_and_lists_transparently(self):
+        before = {sort: self.titles(f'sort={sort}') for sort in ('-created_at', 'task_time')}
+        metrics = archive_completed(timedelta(days=30), batch_size=4)
+        self.assertEqual((metrics['moved'], metrics['batches']), (6, 2))
+        self.assertEqual(Task.objects.count(), 6)
+        self.assertEqual(TaskStats.objects.get(user=self.user).total, 6)
+
+        self.assertEqual(len(self.titles('sort=-created_at')), 6)
+        for sort, titles in before.items():
+            with self.subTest(sort=sort):
+                self.assertEqual(self.titles(f'sort={sort}&include_archived=1'), titles)
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_each_batch_pins_owner_to_primary(self):
+        pinned = []
+
+        def progress(moved, elapsed):
+            pinned.append(replicas.is_pinned(self.user.pk))
+            replicas.pin_cache().clear()
+
+        archive_completed(timedelta(days=30), batch_size=4, progress=progress)
+        self.assertEqual(pinned, [True, True])
+
+
+@override_settings(RATELIMIT_ENABLED=True, RATE_LIMITS={'read': (1, 5), 'write': (0.5, 2)}, WRITE_CONCURRENCY_LIMIT=2)
+class RateLimitTests(TaskTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("jules", "jules@example.com", "password")
+        cls.task = Task.objects.create(user=cls.user, title="Task")
+
+    def setUp(self):
+        ratelimit.ratelimit_cache().clear()
+        self.client.force_login(self.user)
+        self.url = f'/api/tasks/{self.task.id}/toggle/'
+
+    def test_write_budget_returns_429_with_retry_after(self):
+        for _ in range(2):
+            self.assertEqual(self.client.post(self.url).status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '2')
+        # Budget de lecture distinct
+        self.assertEqual(self.client.get('/api/tasks/').status_code, 200)
+
+    def test_write_concurrency_cap_returns_503(self):
+        ratelimit.ratelimit_cache().set(ratelimit.WRITE_SLOTS_KEY, 2)
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        ratelimit.ratelimit_cache().set(ratelimit.WRITE_SLOTS_KEY, 1)
+        self.assertEqual(self.client.post(self.url).status_code, 200)
+        self.assertEqual(ratelimit.ratelimit_cache().get(ratelimit.WRITE_SLOTS_KEY), 1)
+
+    def test_write_slot_counter_outlives_its_creation_and_never_goes_negative(self):
+        cache = ratelimit.ratelimit_cache()
+        cache.set(ratelimit.WRITE_SLOTS_KEY, 0, timeout=1)
+        self.assertTrue(ratelimit.acquire_write_slot(2))
+        expires = cache._expire_info[cache.make_and_validate_key(ratelimit.WRITE_SLOTS_KEY)]
+        self.assertGreater(expires - time_module.time(), ratelimit.WRITE_SLOTS_TIMEOUT - 5)
+        # Compteur recréé à 0 alors que des créneaux étaient pris
+        cache.set(ratelimit.WRITE_SLOTS_KEY, 0)
+        ratelimit.release_write_slot()
+        self.assertEqual(cache.get(ratelimit.WRITE_SLOTS_KEY), 0)
+
+    def test_process_local_limiter_cache_is_flagged(self):
+        with override_settings(DEBUG=False):
+            messages = " ".join(error.msg for error in check_shared_caches(None))
+        self.assertIn("'ratelimit' (limitation de débit", messages)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TaskTestCase):
+    """Routage seul : l'alias 'replica' n'est jamais interrogé, son retard est simulé"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("karl", "karl@example.com", "password")
+        cls.task = Task.objects.create(user=cls.user, title="Task")
+
+    def setUp(self):
+        replicas.pin_cache().clear()
+        self.router = replicas.PrimaryReplicaRouter()
+        self.addCleanup(replicas._lag_checks.clear)
+
+    def simulate_lag(self, seconds):
+        replicas._lag_checks['replica'] = (time_module.monotonic(), seconds)
+
+    def test_reads_go_to_fresh_replica_only(self):
+        self.simulate_lag(0.5)
+        self.assertEqual(self.router.db_for_read(Task), 'default')
+        with replicas.reading_from_replicas():
+            self.assertEqual(self.router.db_for_read(Task), 'replica')
+            self.assertEqual(self.router.db_for_write(Task), 'default')
+            self.simulate_lag(10)
+            self.assertEqual(self.router.db_for_read(Task), 'default')
+            self.simulate_lag(None)
+            self.assertEqual(self.router.db_for_read(Task), 'default')
+
+    def test_write_pins_user_to_primary(self):
+        self.client.force_login(self.user)
+        self.assertFalse(replicas.is_pinned(self.user.pk))
+        self.client.post(f'/api/tasks/{self.task.id}/toggle/')
+        self.assertTrue(replicas.is_pinned(self.user.pk))
+
+    def test_pin_uses_configured_cache(self):
+        with override_settings(REPLICA_PIN_CACHE_ALIAS='tasks'):
+            replicas.pin_primary(self.user.pk)
+            self.assertTrue(replicas.is_pinned(self.user.pk))
+            self.assertIsNotNone(caches['tasks'].get(replicas._pin_key(self.user.pk)))
+        with override_settings(DEBUG=False):
+            self.assertIn("épinglage", " ".join(error.msg for error in check_shared_caches(None)))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_heartbeat_measures_lag(self):
+        self.assertIsNone(replicas.measure_lag('default'))
+        replicas.beat()
+        self.assertLess(replicas.measure_lag('default'), 1)
+
+
+@skipUnless(replicas.replica_aliases() and not shards.shard_aliases(),
+            "réplica local (DB_REPLICA_NAME), sans TASK_SHARDS : les tâches seraient sur les shards")
+class ReplicaFileTests(TransactionTestCase):
+    """Lectures servies par un vrai second fichier SQLite, copié du primaire"""
+
+    databases = {'default', *replicas.replica_aliases()}
+
+    def setUp(self):
+        replica = connections['replica']
+        replica.close()
+        # En test, le réplica est un miroir : il partage le settings_dict de default
+        mirror = replica.settings_dict
+        path = tempfile.NamedTemporaryFile(suffix='.sqlite3', delete=False).name
+        self.addCleanup(os.remove, path)
+        self.addCleanup(setattr, replica, 'settings_dict', mirror)
+        self.addCleanup(replica.close)
+        replica.settings_dict = {**mirror, 'NAME': path}
+
+        replicas.pin_cache().clear()
+        caches['tasks'].clear()
+        replicas._lag_checks.clear()
+        self.addCleanup(replicas._lag_checks.clear)
+        self.user = User.objects.create_user("mona", "mona@example.com", "password")
+        self.task = Task.objects.create(user=self.user, title="Replicated")
+        self.client.force_login(self.user)
+
+    def replicate(self, beat_age=0):
+        replicas.beat()
+        ReplicaHeartbeat.objects.update(beat_at=timezone.now() - timedelta(seconds=beat_age))
+        replicas.copy_sqlite_replica('replica')
+        # Écrite après la copie : seul le primaire la voit
+        Task.objects.create(user=self.user, title="Primary only")
+
+    def titles(self):
+        return sorted(task['title'] for task in self.client.get('/api/tasks/?fields=title').json()['tasks'])
+
+    def test_reads_use_replica_outside_pin_window(self):
+        self.replicate()
+        self.assertEqual(self.titles(), ["Replicated"])
+        self.client.post(f'/api/tasks/{self.task.id}/toggle/')
+        # Épinglé après l'écriture : le primaire, nouvelle tâche comprise
+        self.assertEqual(self.titles(), ["Primary only", "Replicated"])
+        replicas.pin_cache().clear()
+        caches['tasks'].clear()
+        self.assertEqual(self.titles(), ["Replicated"])
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        self.replicate(beat_age=settings.REPLICA_MAX_LAG + 5)
+        self.assertEqual(self.titles(), ["Primary only", "Replicated"])
+
+
+@override_settings(TASK_SHARDS=['shard0', 'shard1'])
+class ShardRoutingTests(SimpleTestCase):
+    """Routage seul : les alias des shards ne sont jamais interrogés"""
+
+    def setUp(self):
+        self.router = shards.ShardRouter()
+
+    def test_hash_shard_is_stable(self):
+        self.assertEqual(shards.hash_shard(1), shards.hash_shard(1))
+        self.assertEqual({shards.hash_shard(user_id) for user_id in range(100)}, {'shard0', 'shard1'})
+
+    def test_tasks_follow_user_shard(self):
+        user = User(pk=1, username="lea", shard='shard1')
+        self.assertEqual(self.router.db_for_write(Task, instance=Task(user=user, title="Task")), 'shard1')
+        self.assertEqual(self.router.db_for_read(Task, instance=user), 'shard1')
+        self.assertIsNone(self.router.db_for_read(Task))
+        self.assertIsNone(self.router.db_for_read(User, instance=user))
+        with shards.using_shard('shard0', 1):
+            self.assertEqual(self.router.db_for_read(TaskStats), 'shard0')
+            self.assertEqual(shards.shard_for_user_id(1), 'shard0')
+
+    def test_shards_only_migrate_task_tables(self):
+        self.assertTrue(self.router.allow_migrate('shard0', 'task', model_name='task'))
+        self.assertTrue(self.router.allow_migrate('shard0', 'task'))
+        self.assertFalse(self.router.allow_migrate('shard0', 'task', model_name='user'))
+        self.assertFalse(self.router.allow_migrate('shard0', 'sessions', model_name='session'))
+        self.assertIsNone(self.router.allow_migrate('default', 'task', model_name='task'))
@@ -0,0 +1,269 @@
+"""Export et import en masse des tâches (NDJSON ou CSV), en streaming.
+
+L'export lit les lignes par morceaux (``iterator()``) et produit une ligne
+par tâche : la mémoire reste constante quel que soit le volume. L'import lit
+son entrée ligne à ligne et écrit par lots, chaque lot dans sa propre
+transaction ; le nombre d'enregistrements validés sert de point de reprise
+(``skip``) si l'import est interrompu.
+
+Format d'un enregistrement :
+    {"user": "alice", "title": "...", "description": "...", "status": false,
+     "task_time": "09:30", "created_at": "2026-01-01T08:00:00+00:00"}
+``user`` est ignoré quand l'import vise un utilisateur donné (API, --user).
+"""
+import csv
+import io
+import itertools
+import json
+
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime, parse_time
+
+from .events import notify_task_changes
+from .models import Task, User
+from .shards import shard_for_user_id
+
+FORMATS = ('ndjson', 'csv')
+EXPORT_FIELDS = ('user', 'title', 'description', 'status', 'task_time', 'created_at')
+EXPORT_CHUNK_SIZE = 2000
+IMPORT_BATCH_SIZE = 5000
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+class InvalidRecord(ValueError):
+    def __init__(self, line, message):
+        super().__init__(f"Line {line}: {message}")
+        self.line = line
+
+
+# ==================== EXPORT ====================
+
+def export_tasks(querysets, fmt='ndjson', include_user=True):
+    """Génère le contenu exporté, ligne par ligne (str).
+
+    ``querysets`` : une liste, lue dans l'ordre (un queryset par shard pour
+    tout exporter, voir task/shards.py).
+    """
+    fields = EXPORT_FIELDS if include_user else EXPORT_FIELDS[1:]
+    rows = itertools.chain.from_iterable(
+        queryset.order_by('id')
+        .values_list('user_id', 'title', 'description', 'status', 'task_time', 'created_at')
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        for queryset in querysets
+    )
+    # Pas de jointure sur user : les utilisateurs peuvent être dans une autre base
+    usernames = {}
+
+    def username(user_id):
+        if user_id not in usernames:
+            usernames[user_id] = User.objects.filter(pk=user_id).values_list('username', flat=True).first()
+        return usernames[user_id]
+
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def line(values):
+            writer.writerow(values)
+            value = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return value
+
+        yield line(fields)
+    for user_id, title, description, status, task_time, created_at in rows:
+        values = [
+            title,
+            description,
+            status,
+            task_time.strftime('%H:%M:%S') if task_time else None,
+            created_at.isoformat(),
+        ]
+        if include_user:
+            values.insert(0, username(user_id))
+        if fmt == 'csv':
+            yield line(['' if value is None else value for value in values])
+        else:
+            yield json.dumps(dict(zip(fields, values))) + '\n'
+
+
+# ==================== IMPORT ====================
+
+def read_records(lines, fmt='ndjson'):
+    """(numéro de ligne, dict) pour chaque enregistrement d'un itérable de lignes (str)"""
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            raise InvalidRecord(number, "invalid JSON")
+        if not isinstance(record, dict):
+            raise InvalidRecord(number, "expected an object")
+        yield number, record
+
+
+TITLE_MAX_LENGTH = Task._meta.get_field('title').max_length
+
+
+def check_text_fields(values):
+    """title (chaîne d'au plus 200 caractères) et description (chaîne ou null), s'ils sont présents.
+
+    Lève ValueError : sinon l'écriture échoue en base (IntegrityError, 500).
+    Partagé avec les vues d'écriture (task/views.py).
+    """
+    title = values.get('title', '')
+    if not isinstance(title, str) or len(title) > TITLE_MAX_LENGTH:
+        raise ValueError('title')
+    if not isinstance(values.get('description', ''), (str, type(None))):
+        raise ValueError('description')
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    if value in (None, ''):
+        return False
+    if str(value).lower() in ('1', 'true', 'yes'):
+        return True
+    if str(value).lower() in ('0', 'false', 'no'):
+        return False
+    raise ValueError(value)
+
+
+def build_task(record, user_id):
+    """Enregistrement importé -> Task (non sauvegardée) ; lève ValueError si invalide.
+
+    Mêmes règles que l'API pour title et description (check_text_fields) ;
+    task_time et created_at doivent être des chaînes : parse_time() lèverait
+    TypeError sur un nombre, et l'import finirait en 500.
+
+    updated_at, et created_at s'il n'est pas fourni, sont posés à l'écriture
+    du lot (import_tasks).
+    """
+    title = record.get('title')
+    if not title:
+        raise ValueError("missing title")
+    try:
+        check_text_fields(record)
+    except ValueError as error:
+        raise ValueError(f"invalid {error}")
+    task_time = record.get('task_time') or None
+    created_at = record.get('created_at') or None
+    for name, value in (('task_time', task_time), ('created_at', created_at)):
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"invalid {name} {value!r}")
+    task = Task(
+        user_id=user_id,
+        title=title,
+        description=record.get('description') or '',
+        status=_parse_bool(record.get('status')),
+        task_time=parse_time(task_time) if task_time else None,
+        created_at=parse_datetime(created_at) if created_at else None,
+    )
+    if task_time and task.task_time is None:
+        raise ValueError(f"invalid task_time {task_time!r}")
+    if created_at and task.created_at is None:
+        raise ValueError(f"invalid created_at {created_at!r}")
+    if task.created_at is not None and timezone.is_naive(task.created_at):
+        task.created_at = timezone.make_aware(task.created_at)
+    return task
+
+
+def insert_tasks(tasks, using, with_ids=False):
+    """INSERT par paquets, sans pre_save : created_at importé est conservé
+    (bulk_create le remplacerait, auto_now_add)"""
+    fields = [field for field in Task._meta.concrete_fields if with_ids or not field.primary_key]
+    batch_size = connections[using].ops.bulk_batch_size(fields, tasks)
+    for start in range(0, len(tasks), batch_size):
+        Task.objects.using(using)._insert(tasks[start:start + batch_size], fields=fields, raw=True, using=using)
+
+
+def import_tasks(records, user=None, batch_size=IMPORT_BATCH_SIZE, skip=0, on_batch=None):
+    """Importe les enregistrements de read_records() par lots transactionnels.
+
+    ``user`` : destinataire de toutes les tâches ; sinon le champ ``user``
+    (nom d'utilisateur) de chaque enregistrement. Les ``skip`` premiers
+    enregistrements sont ignorés (reprise). ``on_batch(total)`` est appelé
+    après chaque lot validé avec le nombre total d'enregistrements traités,
+    reprise comprise. Retourne le nombre de tâches importées.
+
+    Les utilisateurs concernés reçoivent un événement ``reset`` (listes
+    rechargées), y compris si l'import s'arrête sur une erreur après
+    quelques lots.
+
+    Avec le partitionnement (task/shards.py), un lot ne vise qu'un shard :
+    il est validé plus tôt quand l'enregistrement suivant va dans un autre.
+    """
+    using = None
+    user_ids = {}
+    touched = set()
+    committed = set()
+    batch = []
+    processed = skip
+    imported = 0
+
+    def resolve(number, record):
+        if user is not None:
+            return user.pk
+        username = record.get('user')
+        if not isinstance(username, str):
+            raise InvalidRecord(number, f"unknown user {username!r}")
+        if username not in user_ids:
+            user_ids[username] = User.objects.filter(username=username).values_list('pk', flat=True).first()
+        if user_ids[username] is None:
+            raise InvalidRecord(number, f"unknown user {username!r}")
+        return user_ids[username]
+
+    def flush():
+        nonlocal processed, imported, batch
+        with transaction.atomic(using=using):
+            # Horodatage du lot, pas du début de l'import : un jeton de
+            # synchronisation émis entre deux lots doit voir les suivants
+            # (task/sync.py)
+            now = timezone.now()
+            for task in batch:
+                task.updated_at = now
+                if task.created_at is None:
+                    task.created_at = now
+            insert_tasks(batch, using)
+        committed.update(touched)
+        processed += len(batch)
+        imported += len(batch)
+        batch = []
+        if on_batch:
+            on_batch(processed)
+
+    try:
+        for index, (number, record) in enumerate(records):
+            if index < skip:
+                continue
+            user_id = resolve(number, record)
+            shard = shard_for_user_id(user_id)
+            if batch and shard != using:
+                flush()
+            using = shard
+            try:
+                batch.append(build_task(record, user_id))
+            except ValueError as error:
+                raise InvalidRecord(number, str(error))
+            touched.add(user_id)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    finally:
+        for user_id in committed:
+            notify_task_changes(user_id, [('reset', {})])
+    return imported
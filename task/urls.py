@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path("", views.index, name="index"),
@@ -12,7 +12,21 @@ urlpatterns = [
     
     # API - TRÈS IMPORTANT : mêmes noms que dans les fetch()
     path("api/tasks/", views.api_tasks, name="api_tasks"),
+    path("api/tasks/bulk/", views.api_tasks_bulk, name="api_tasks_bulk"),
+    path("api/tasks/export/", views.api_tasks_export, name="api_tasks_export"),
+    path("api/tasks/import/", views.api_tasks_import, name="api_tasks_import"),
+    path("api/tasks/changes/", views.api_task_changes, name="api_task_changes"),
+    path("api/tasks/stats/", views.api_task_stats, name="api_task_stats"),
+    path("api/tasks/search/", views.api_task_search, name="api_task_search"),
+    path("api/tasks/cache/stats/", views.api_task_cache_stats, name="api_task_cache_stats"),
+    path("api/tasks/events/", async_views.api_task_events, name="api_task_events"),
     path("api/tasks/<int:task_id>/delete/", views.api_task_delete, name="api_task_delete"),
     path("api/tasks/<int:task_id>/update/", views.api_task_update, name="api_task_update"),
-    path("api/tasks/<int:task_id>/toggle/", views.api_task_toggle, name="api_task_toggle"), 
+    path("api/tasks/<int:task_id>/toggle/", views.api_task_toggle, name="api_task_toggle"),
+
+    # API async (déploiement ASGI, voir task/async_views.py)
+    path("api/async/tasks/", async_views.api_tasks, name="api_async_tasks"),
+    path("api/async/tasks/<int:task_id>/delete/", async_views.api_task_delete, name="api_async_task_delete"),
+    path("api/async/tasks/<int:task_id>/update/", async_views.api_task_update, name="api_async_task_update"),
+    path("api/async/tasks/<int:task_id>/toggle/", async_views.api_task_toggle, name="api_async_task_toggle"),
 ]
\ No newline at end of file
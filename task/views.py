@@ -1,16 +1,41 @@
 from django.shortcuts import render
-from django.http import HttpResponseRedirect, Http404, JsonResponse
+from django.http import HttpResponse, HttpResponseRedirect, Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
+from django.core.handlers.asgi import ASGIRequest
+from django.template.response import TemplateResponse
 from django.urls import reverse
 from django.contrib.auth.decorators import login_required
-from django.db import IntegrityError
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import Case, Count, Q, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_time
 from django.views.decorators.csrf import ensure_csrf_cookie
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_http_methods
+import codecs
 import json
+from collections import Counter
 from datetime import datetime
 
+from .cache import cache_stats, cached_task_list
+from .conditional import task_list_etag
 from .models import *
+from .mutations import TaskConflict, parse_if_match, task_etag, toggle_task, update_task
+from .events import notify_task_change, notify_task_changes
+from .filters import InvalidFilter, filter_tasks
+from .pagination import (
+    DEFAULT_PAGE_SIZE, DEFAULT_SORT, InvalidCursor, finish_page, merge_sorted, page_queryset, parse_limit,
+    parse_sort,
+)
+from .replicas import replica_reads
+from .search import SEARCH_MAX_RESULTS, search_tasks
+from .serializers import DEFAULT_FIELDS, InvalidFields, dumps, get_serializer, parse_fields, serialize_task
+from .sync import ExpiredSyncToken, InvalidSyncToken, changes_since
+from .transfer import (
+    CONTENT_TYPES as TRANSFER_CONTENT_TYPES, FORMATS as TRANSFER_FORMATS, IMPORT_BATCH_SIZE, InvalidRecord,
+    check_text_fields, export_tasks, import_tasks, read_records,
+)
 
 
 # Create your views here.
@@ -69,7 +94,10 @@ def logout_view(request):
 
 # task view
 @login_required
+@replica_reads
 @ensure_csrf_cookie
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=task_list_etag)
 def task_view(request):
     if request.method == "POST":
         title = request.POST["title"]
@@ -82,42 +110,53 @@ def task_view(request):
             title=title, 
             description=description, 
             user=user,
-            task_time=task_time if task_time else None
+            task_time=parse_time(task_time) if task_time else None
         )
         task.save()
+        notify_task_change(user.pk, 'task.created', serialize_task(task))
         
         return HttpResponseRedirect(reverse("task"))
     
     else:
-        task_list = Task.objects.filter(user=request.user).order_by('-id')
-        
-        return render(request, "task/task_list.html", {
-            "task_list": task_list
+        # Première page et compteurs intégrés à la page (json_script) : TaskList
+        # s'affiche sans attendre /api/tasks/. Même entrée de cache que
+        # GET /api/tasks/ sans paramètres.
+        content = cached_task_list(request.user.pk, '', lambda: _render_page(
+            [Task.objects.filter(user=request.user)], DEFAULT_FIELDS, None, DEFAULT_PAGE_SIZE, DEFAULT_SORT,
+        ))
+        initial_tasks = {**json.loads(content), "stats": _task_counters(request.user)}
+
+        # TemplateResponse : le rendu a lieu après la vue et est mesuré à
+        # part par RequestTimingMiddleware
+        return TemplateResponse(request, "task/task_list.html", {
+            "initial_tasks": initial_tasks,
+            # Le flux SSE n'existe que sous ASGI (501 sous WSGI) : TaskList ne l'ouvre que si vrai
+            "live_updates": isinstance(request, ASGIRequest),
         })
         
 
 @login_required
 def edit_task(request, task_id):
-    try:
-        task = get_object_or_404(Task, id=task_id, user=request.user)
-    except Http404:
-        return HttpResponseRedirect(reverse("task"))
-    
     if request.method == "POST":
-        task.title = request.POST.get("title", task.title)
-        task.description = request.POST.get("description", task.description)
         task_time = request.POST.get("task_time")  # NOUVEAU
-        
+        changes = {
+            field: request.POST[field] for field in ("title", "description") if field in request.POST
+        }
         # Mettre à jour l'heure
-        if task_time:
-            task.task_time = task_time
-        else:
-            task.task_time = None
-            
-        task.save()
+        changes["task_time"] = parse_time(task_time) if task_time else None
+
+        # Seules les colonnes du formulaire sont écrites, en une requête
+        task = update_task(request.user.pk, task_id, changes)
+        if task is not None:
+            notify_task_change(request.user.pk, 'task.updated', serialize_task(task))
+        return HttpResponseRedirect(reverse("task"))
+
+    try:
+        task = get_object_or_404(Task, id=task_id, user=request.user)
+    except Http404:
         return HttpResponseRedirect(reverse("task"))
     
-    return render(request, "task/edit_task.html", {
+    return TemplateResponse(request, "task/edit_task.html", {
         "task": task
     })
 
@@ -127,6 +166,7 @@ def delete_task(request, task_id):
         try:
             task = get_object_or_404(Task, id=task_id, user=request.user)
             task.delete()
+            notify_task_change(request.user.pk, 'task.deleted', {'id': task_id})
         except Http404:
             pass
     
@@ -135,55 +175,177 @@ def delete_task(request, task_id):
 
 # ==================== API ENDPOINTS ====================
 
+STREAM_CHUNK_SIZE = 2000
+
+
+def _parse_task_time(value):
+    """'HH:MM' -> time, None si vide ; lève ValueError si invalide"""
+    if not value:
+        return None
+    return datetime.strptime(value, '%H:%M').time()
+
+
+def _new_task_fields(body):
+    """Corps JSON d'une création -> champs de la tâche, mêmes règles que le bulk.
+
+    Lève ValueError si le JSON ou title/description sont invalides ; une
+    heure invalide est ignorée.
+    """
+    data = json.loads(body)
+    if not isinstance(data, dict):
+        raise ValueError('body')
+    check_text_fields(data)
+    try:
+        task_time = _parse_task_time(data.get('task_time'))
+    except (TypeError, ValueError):
+        task_time = None
+    return {'title': data.get('title', ''), 'description': data.get('description', ''), 'task_time': task_time}
+
+
+def _stream_queryset(user):
+    return Task.objects.filter(user=user).order_by('-created_at', '-id')
+
+
+def _stream_chunk(batch, first, ndjson):
+    """Morceau du flux : lignes NDJSON, ou éléments du tableau "tasks" """
+    if ndjson:
+        return b'\n'.join(batch) + b'\n'
+    return (b'' if first else b',') + b','.join(batch)
+
+
+def _stream_tasks(user, serializer, ndjson=False):
+    """Génère la liste complète des tâches par morceaux (mémoire constante)"""
+    rows = serializer.rows(_stream_queryset(user)).iterator(chunk_size=STREAM_CHUNK_SIZE)
+
+    if not ndjson:
+        yield b'{"tasks":['
+    batch = []
+    first = True
+    for row in rows:
+        batch.append(dumps(serializer.serialize_row(row)))
+        if len(batch) >= STREAM_CHUNK_SIZE:
+            yield _stream_chunk(batch, first, ndjson)
+            first = False
+            batch = []
+    if batch:
+        yield _stream_chunk(batch, first, ndjson)
+    if not ndjson:
+        yield b']}'
+
+
+def _render_page(querysets, fields, cursor, limit, sort):
+    """Une page de la liste, sérialisée : {"tasks": [...], "next": curseur}.
+
+    Avec plusieurs querysets (tâches et archives), chacun fournit sa page
+    après le curseur et les lignes sont fusionnées dans l'ordre du tri.
+    """
+    # Le curseur a besoin de la clé de tri, même si elle n'est pas demandée
+    serializer = get_serializer(fields, (sort.lstrip('-'),))
+    pages = [list(serializer.rows(page_queryset(queryset, cursor, limit, sort))) for queryset in querysets]
+    return _page_content(serializer, pages, limit, sort)
+
+
+def _page_content(serializer, pages, limit, sort):
+    """Fusion et sérialisation des pages lues, communes aux vues sync et async"""
+    rows = pages[0] if len(pages) == 1 else merge_sorted(pages, sort)
+    page, next_cursor = finish_page(rows, limit, sort)
+    return dumps({'tasks': serializer.serialize_rows(page), 'next': next_cursor})
+
+
+def _list_querysets(request):
+    """Querysets de la liste ; lève InvalidFilter.
+
+    ?include_archived=1 : tâches archivées (task/archive.py) fusionnées dans la liste
+    """
+    querysets = [filter_tasks(Task.objects.filter(user=request.user), request.GET)]
+    if request.GET.get('include_archived') in ('1', 'true'):
+        querysets.append(filter_tasks(ArchivedTask.objects.filter(user=request.user), request.GET))
+    return querysets
+
+
 @login_required
+@replica_reads
 @ensure_csrf_cookie
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=task_list_etag)
 def api_tasks(request):
     """API pour lister ou créer des tâches"""
     if request.method == "GET":
-        tasks = Task.objects.filter(user=request.user).order_by('-created_at')
-        
-        tasks_data = []
-        for task in tasks:
-            tasks_data.append({
-                'id': task.id,
-                'title': task.title,
-                'description': task.description,
-                'created_at': task.created_at.isoformat(),
-                'status': task.status,
-                'task_time': task.task_time.strftime('%H:%M') if task.task_time else None  # NOUVEAU
-            })
-        
-        return JsonResponse({'tasks': tasks_data})
+        # ?fields=id,title,status : seules ces colonnes sont lues et renvoyées
+        try:
+            fields = parse_fields(request.GET.get('fields'))
+        except InvalidFields as error:
+            return JsonResponse({"error": str(error)}, status=400)
+
+        # Export complet en streaming : ?stream=1 (JSON) ou ?stream=ndjson
+        stream = request.GET.get('stream')
+        if stream:
+            ndjson = stream == 'ndjson'
+            return StreamingHttpResponse(
+                _stream_tasks(request.user, get_serializer(fields), ndjson=ndjson),
+                content_type='application/x-ndjson' if ndjson else 'application/json',
+            )
+
+        try:
+            limit = parse_limit(request.GET.get('limit'))
+        except ValueError:
+            return JsonResponse({"error": "Invalid limit"}, status=400)
+        try:
+            sort = parse_sort(request.GET.get('sort'))
+        except ValueError:
+            return JsonResponse({"error": "Invalid sort"}, status=400)
+        try:
+            querysets = _list_querysets(request)
+        except InvalidFilter as error:
+            return JsonResponse({"error": str(error)}, status=400)
+
+        def build():
+            return _render_page(querysets, fields, request.GET.get('cursor'), limit, sort)
+
+        # La page sérialisée est mise en cache par utilisateur (voir task/cache.py)
+        try:
+            content = cached_task_list(request.user.pk, request.META.get('QUERY_STRING', ''), build)
+        except InvalidCursor:
+            return JsonResponse({"error": "Invalid cursor"}, status=400)
+
+        return HttpResponse(content, content_type='application/json')
 
     elif request.method == "POST":
-        data = json.loads(request.body)
-        
-        # Gérer le champ task_time
-        task_time = data.get('task_time')
-        if task_time:
-            try:
-                # Convertir la chaîne en objet time
-                task_time = datetime.strptime(task_time, '%H:%M').time()
-            except:
-                task_time = None
-        
-        task = Task.objects.create(
-            title=data.get('title', ''),
-            description=data.get('description', ''),
-            user=request.user,
-            status=False,
-            task_time=task_time  # NOUVEAU
-        )
-        return JsonResponse({
-            "task": {
-                "id": task.id,
-                "title": task.title,
-                "description": task.description,
-                "created_at": task.created_at.isoformat(),
-                "status": task.status,
-                "task_time": task.task_time.strftime('%H:%M') if task.task_time else None  # NOUVEAU
-            }
-        })
+        try:
+            fields = _new_task_fields(request.body)
+        except ValueError:
+            return JsonResponse({"error": "Invalid task fields"}, status=400)
+
+        task = Task.objects.create(user=request.user, status=False, **fields)
+        payload = serialize_task(task)
+        notify_task_change(request.user.pk, 'task.created', payload)
+        return JsonResponse({"task": payload})
+
+
+@login_required
+def api_task_changes(request):
+    """Synchronisation incrémentale : tâches modifiées et supprimées depuis ?since="""
+    if request.method != "GET":
+        return JsonResponse({"error": "Invalid request method"}, status=400)
+
+    try:
+        serializer = get_serializer(parse_fields(request.GET.get('fields')))
+    except InvalidFields as error:
+        return JsonResponse({"error": str(error)}, status=400)
+
+    try:
+        tasks, deleted, token = changes_since(request.user, request.GET.get('since') or None)
+    except InvalidSyncToken:
+        return JsonResponse({"error": "Invalid sync token"}, status=400)
+    except ExpiredSyncToken:
+        # Les tombstones ont été compactées : le client doit tout recharger
+        return JsonResponse({"error": "Sync token expired", "reset": True}, status=410)
+
+    return JsonResponse({
+        "tasks": serializer.serialize_rows(serializer.rows(tasks)),
+        "deleted": deleted,
+        "token": token,
+    })
 
 
 @login_required
@@ -192,6 +354,7 @@ def api_task_delete(request, task_id):
         try:
             task = get_object_or_404(Task, id=task_id, user=request.user)
             task.delete()
+            notify_task_change(request.user.pk, 'task.deleted', {'id': task_id})
             return JsonResponse({"success": True, "message": "Task deleted successfully"})
         except Http404:
             return JsonResponse({"success": False, "error": "Task not found"}, status=404)
@@ -199,41 +362,58 @@ def api_task_delete(request, task_id):
     return JsonResponse({"error": "Invalid request method"}, status=400)
 
 
+def _task_changes(data):
+    """Champs reçus dans le corps JSON -> valeurs à écrire (mise à jour partielle).
+
+    Lève ValueError si title ou description est invalide (voir check_text_fields).
+    """
+    changes = {field: data[field] for field in ("title", "description") if field in data}
+    check_text_fields(changes)
+    if 'task_time' in data:
+        try:
+            changes['task_time'] = _parse_task_time(data.get('task_time'))
+        except ValueError:
+            pass
+    return changes
+
+
+def _task_response(task):
+    response = JsonResponse({"success": True, "task": serialize_task(task)})
+    response['ETag'] = task_etag(task)
+    return response
+
+
+def _conflict_response(conflict):
+    response = JsonResponse({
+        "success": False,
+        "error": "Task was modified",
+        "task": serialize_task(conflict.task),
+    }, status=412)
+    response['ETag'] = task_etag(conflict.task)
+    return response
+
+
 @login_required
 def api_task_update(request, task_id):
     if request.method in ["PUT", "PATCH"]:
+        data = json.loads(request.body)
         try:
-            task = get_object_or_404(Task, id=task_id, user=request.user)
-            data = json.loads(request.body)
-            
-            task.title = data.get("title", task.title)
-            task.description = data.get("description", task.description)
-            
-            # Gérer le champ task_time
-            if 'task_time' in data:
-                task_time = data.get('task_time')
-                if task_time:
-                    try:
-                        task.task_time = datetime.strptime(task_time, '%H:%M').time()
-                    except:
-                        pass
-                else:
-                    task.task_time = None
-            
-            task.save()
-            
-            return JsonResponse({
-                "success": True,
-                "task": {
-                    "id": task.id,
-                    "title": task.title,
-                    "description": task.description,
-                    "created_at": task.created_at.isoformat(),
-                    "task_time": task.task_time.strftime('%H:%M') if task.task_time else None  # NOUVEAU
-                }
-            })
-        except Http404:
+            changes = _task_changes(data)
+        except ValueError:
+            return JsonResponse({"success": False, "error": "Invalid task fields"}, status=400)
+        try:
+            # Une seule requête : UPDATE des champs reçus ... RETURNING
+            task = update_task(
+                request.user.pk, task_id, changes,
+                parse_if_match(request.headers.get('If-Match')),
+            )
+        except TaskConflict as conflict:
+            return _conflict_response(conflict)
+        if task is None:
             return JsonResponse({"success": False, "error": "Task not found"}, status=404)
+
+        notify_task_change(request.user.pk, 'task.updated', serialize_task(task))
+        return _task_response(task)
     
     return JsonResponse({"error": "Invalid request method"}, status=400)
 
@@ -242,23 +422,274 @@ def api_task_update(request, task_id):
 def api_task_toggle(request, task_id):
     if request.method in ["PUT", "PATCH", "POST"]:
         try:
-            task = get_object_or_404(Task, id=task_id, user=request.user)
-            
-            task.status = not task.status
-            task.save()
-            
-            return JsonResponse({
-                "success": True,
-                "task": {
-                    "id": task.id,
-                    "title": task.title,
-                    "description": task.description,
-                    "created_at": task.created_at.isoformat(),
-                    "status": task.status,
-                    "task_time": task.task_time.strftime('%H:%M') if task.task_time else None  # NOUVEAU
-                }
-            })
-        except Http404:
+            # SET status = NOT status ... RETURNING : pas de lecture préalable
+            task = toggle_task(request.user.pk, task_id, parse_if_match(request.headers.get('If-Match')))
+        except TaskConflict as conflict:
+            return _conflict_response(conflict)
+        if task is None:
             return JsonResponse({"success": False, "error": "Task not found"}, status=404)
+
+        notify_task_change(request.user.pk, 'task.toggled', {'id': task.id, 'status': task.status})
+        return _task_response(task)
     
-    return JsonResponse({"error": "Invalid request method"}, status=400)
\ No newline at end of file
+    return JsonResponse({"error": "Invalid request method"}, status=400)
+
+
+@login_required
+def api_task_search(request):
+    """Recherche plein texte : ?q= (préfixes acceptés), résultats classés par bm25"""
+    if request.method != "GET":
+        return JsonResponse({"error": "Invalid request method"}, status=400)
+
+    try:
+        # LIMIT -1 est illimité en SQLite : borné des deux côtés
+        limit = max(1, min(int(request.GET.get('limit', SEARCH_MAX_RESULTS)), SEARCH_MAX_RESULTS))
+    except ValueError:
+        return JsonResponse({"error": "Invalid limit"}, status=400)
+
+    results = []
+    for task in search_tasks(request.user, request.GET.get('q', ''), limit=limit):
+        results.append({**serialize_task(task), "snippet": task.snippet, "rank": task.rank})
+
+    return JsonResponse({"tasks": results})
+
+
+def _task_counters(user):
+    """total / completed / active : une ligne lue dans task_taskstats, O(1)"""
+    stats = TaskStats.objects.filter(user=user).values('total', 'completed').first()
+    stats = stats or {'total': 0, 'completed': 0}
+    return {**stats, "active": stats['total'] - stats['completed']}
+
+
+@login_required
+@replica_reads
+def api_task_stats(request):
+    """Statistiques des tâches : compteurs maintenus + répartition par heure"""
+    if request.method != "GET":
+        return JsonResponse({"error": "Invalid request method"}, status=400)
+
+    stats = _task_counters(request.user)
+
+    # Répartition des tâches actives selon task_time, en une requête agrégée
+    now = timezone.localtime().time()
+    buckets = filter_tasks(Task.objects.filter(user=request.user), {'status': 'active'}).aggregate(
+        overdue=Count('id', filter=Q(task_time__lt=now)),
+        upcoming=Count('id', filter=Q(task_time__gte=now)),
+        unscheduled=Count('id', filter=Q(task_time__isnull=True)),
+    )
+
+    return JsonResponse({**stats, **buckets})
+
+
+@login_required
+def api_task_cache_stats(request):
+    """Compteurs du cache de la liste des tâches (réservé au staff)"""
+    if not request.user.is_staff:
+        return JsonResponse({"error": "Forbidden"}, status=403)
+    return JsonResponse(cache_stats())
+
+
+# ==================== IMPORT / EXPORT ====================
+
+@login_required
+def api_tasks_export(request):
+    """Export de toutes les tâches de l'utilisateur, en streaming : ?format=ndjson|csv"""
+    if request.method != "GET":
+        return JsonResponse({"error": "Invalid request method"}, status=400)
+    fmt = request.GET.get('format', 'ndjson')
+    if fmt not in TRANSFER_FORMATS:
+        return JsonResponse({"error": "Invalid format"}, status=400)
+
+    response = StreamingHttpResponse(
+        export_tasks([Task.objects.filter(user=request.user)], fmt, include_user=False),
+        content_type=TRANSFER_CONTENT_TYPES[fmt],
+    )
+    response['Content-Disposition'] = f'attachment; filename="tasks.{fmt}"'
+    return response
+
+
+@login_required
+def api_tasks_import(request):
+    """Import en streaming (corps NDJSON ou CSV) dans les tâches de l'utilisateur.
+
+    Le corps est lu ligne à ligne et écrit par lots de ?batch_size=. En cas
+    d'erreur, les lots déjà validés restent : la réponse donne leur nombre
+    (``processed``), à renvoyer en ?skip= avec le même fichier pour reprendre.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid request method"}, status=400)
+    fmt = request.GET.get('format') or ('csv' if request.content_type == 'text/csv' else 'ndjson')
+    if fmt not in TRANSFER_FORMATS:
+        return JsonResponse({"error": "Invalid format"}, status=400)
+    try:
+        skip = int(request.GET.get('skip', 0))
+        batch_size = min(int(request.GET.get('batch_size', IMPORT_BATCH_SIZE)), IMPORT_BATCH_SIZE)
+        if skip < 0 or batch_size < 1:
+            raise ValueError
+    except ValueError:
+        return JsonResponse({"error": "Invalid skip or batch_size"}, status=400)
+
+    progress = {'processed': skip}
+
+    def on_batch(processed):
+        progress['processed'] = processed
+
+    # La requête est itérée ligne par ligne : le corps n'est jamais chargé en entier
+    lines = codecs.iterdecode(request, 'utf-8')
+    try:
+        imported = import_tasks(
+            read_records(lines, fmt), user=request.user, batch_size=batch_size, skip=skip, on_batch=on_batch,
+        )
+    except (InvalidRecord, UnicodeDecodeError) as error:
+        return JsonResponse({
+            "success": False,
+            "error": str(error),
+            "processed": progress['processed'],
+        }, status=400)
+
+    return JsonResponse({"success": True, "imported": imported, "processed": progress['processed']})
+
+
+# ==================== BULK API ====================
+
+BULK_MAX_OPERATIONS = 1000
+BULK_UPDATE_FIELDS = ('title', 'description', 'status', 'task_time')
+
+
+@login_required
+def api_tasks_bulk(request):
+    """Applique une liste d'opérations (create/update/toggle/delete) en une transaction.
+
+    Les opérations sont regroupées par type et exécutées dans cet ordre :
+    créations (bulk_create), mises à jour (bulk_update), bascules et
+    suppressions (un seul UPDATE / DELETE ensembliste chacun). Les résultats
+    sont renvoyés dans l'ordre de la requête.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid request method"}, status=400)
+
+    try:
+        operations = json.loads(request.body).get("operations")
+    except (ValueError, AttributeError):
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    if not isinstance(operations, list):
+        return JsonResponse({"error": "'operations' must be a list"}, status=400)
+    if len(operations) > BULK_MAX_OPERATIONS:
+        return JsonResponse({"error": f"Too many operations (max {BULK_MAX_OPERATIONS})"}, status=400)
+
+    results = [None] * len(operations)
+    creates, updates, toggles, deletes = [], [], [], []
+
+    # Validation : les opérations invalides sont rejetées sans rien écrire
+    for index, operation in enumerate(operations):
+        op = operation.get("op") if isinstance(operation, dict) else None
+        try:
+            if op == "create":
+                check_text_fields(operation)
+                creates.append((index, Task(
+                    title=operation.get("title", ""),
+                    description=operation.get("description", ""),
+                    user=request.user,
+                    status=False,
+                    task_time=_parse_task_time(operation.get("task_time"))
+                )))
+            elif op in ("update", "toggle", "delete"):
+                task_id = int(operation["id"])
+                if op == "update":
+                    changes = {field: operation[field] for field in BULK_UPDATE_FIELDS if field in operation}
+                    check_text_fields(changes)
+                    if 'task_time' in changes:
+                        changes['task_time'] = _parse_task_time(changes['task_time'])
+                    # Booléen JSON uniquement : bool("false") serait vrai
+                    if 'status' in changes and not isinstance(changes['status'], bool):
+                        raise ValueError('status')
+                    updates.append((index, task_id, changes))
+                elif op == "toggle":
+                    toggles.append((index, task_id))
+                else:
+                    deletes.append((index, task_id))
+            else:
+                results[index] = {"op": op, "success": False, "error": "Unknown operation"}
+        except (KeyError, TypeError, ValueError):
+            results[index] = {"op": op, "success": False, "error": "Invalid operation"}
+
+    query_count = 0
+
+    def count_queries(execute, sql, params, many, context):
+        nonlocal query_count
+        query_count += 1
+        return execute(sql, params, many, context)
+
+    user_tasks = Task.objects.filter(user=request.user)
+    now = timezone.now()
+    # Base des tâches de l'utilisateur (son shard, voir task/shards.py)
+    using = router.db_for_write(Task)
+
+    with connections[using].execute_wrapper(count_queries), transaction.atomic(using=using):
+        if creates:
+            created = Task.objects.bulk_create([task for _, task in creates])
+            for (index, _), task in zip(creates, created):
+                results[index] = {"op": "create", "success": True, "task": serialize_task(task)}
+
+        if updates:
+            tasks = user_tasks.in_bulk({task_id for _, task_id, _ in updates})
+            fields = {'updated_at'}
+            updated = []
+            for index, task_id, changes in updates:
+                task = tasks.get(task_id)
+                if task is None:
+                    results[index] = {"op": "update", "id": task_id, "success": False, "error": "Task not found"}
+                    continue
+                for field, value in changes.items():
+                    setattr(task, field, value)
+                task.updated_at = now
+                fields.update(changes)
+                updated.append((index, task))
+            if tasks:
+                user_tasks.bulk_update(tasks.values(), fields=sorted(fields))
+            for index, task in updated:
+                results[index] = {"op": "update", "id": task.id, "success": True, "task": serialize_task(task)}
+
+        if toggles:
+            current = dict(user_tasks.filter(id__in={task_id for _, task_id in toggles}).values_list('id', 'status'))
+            # Plusieurs toggles d'une même tâche : seule la parité change la ligne
+            counts = Counter(task_id for _, task_id in toggles)
+            flipped = [task_id for task_id in current if counts[task_id] % 2]
+            if flipped:
+                user_tasks.filter(id__in=flipped).update(
+                    status=Case(When(status=True, then=Value(False)), default=Value(True)),
+                    updated_at=now,
+                )
+            # Chaque résultat (et événement) donne l'état après son toggle
+            status = dict(current)
+            for index, task_id in toggles:
+                if task_id in current:
+                    status[task_id] = not status[task_id]
+                    results[index] = {"op": "toggle", "id": task_id, "success": True, "status": status[task_id]}
+                else:
+                    results[index] = {"op": "toggle", "id": task_id, "success": False, "error": "Task not found"}
+
+        if deletes:
+            existing = set(user_tasks.filter(id__in={task_id for _, task_id in deletes}).values_list('id', flat=True))
+            if existing:
+                user_tasks.filter(id__in=existing).delete()
+            for index, task_id in deletes:
+                if task_id in existing:
+                    results[index] = {"op": "delete", "id": task_id, "success": True}
+                else:
+                    results[index] = {"op": "delete", "id": task_id, "success": False, "error": "Task not found"}
+
+    events = []
+    for result in results:
+        if not result["success"]:
+            continue
+        if result["op"] in ("create", "update"):
+            events.append((f"task.{result['op']}d", result["task"]))
+        elif result["op"] == "toggle":
+            events.append(("task.toggled", {"id": result["id"], "status": result["status"]}))
+        else:
+            events.append(("task.deleted", {"id": result["id"]}))
+    if events:
+        notify_task_changes(request.user.pk, events)
+
+    return JsonResponse({"success": True, "results": results, "queries": query_count})
@@ -50,11 +50,19 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # En premier : chronomètre toute la chaîne (voir task/middleware.py)
+    'task.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Après l'authentification : limites par utilisateur (task/ratelimit.py)
+    'task.ratelimit.RateLimitMiddleware',
+    # Lecture de ses écritures avec des réplicas (task/replicas.py)
+    'task.replicas.ReadYourWritesMiddleware',
+    # Shard de l'utilisateur connecté pour la durée de la requête (task/shards.py)
+    'task.shards.ShardMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -72,6 +80,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'task.context_processors.assets',
             ],
         },
     },
@@ -79,6 +88,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'todoapp.wsgi.application'
 
+# Point d'entrée ASGI (uvicorn/daphne) : sert aussi les vues async de
+# task/async_views.py (/api/async/tasks/) sans bloquer un thread par client
+ASGI_APPLICATION = 'todoapp.asgi.application'
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
@@ -87,9 +100,136 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Connexions persistantes, vérifiées avant réutilisation
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Réplica en lecture (task/replicas.py). En local, un second fichier SQLite
+# tient lieu de réplica, recopié depuis le primaire par :
+#   DB_REPLICA_NAME=replica.sqlite3 python manage.py sync_replica --interval 1
+if os.environ.get('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['DB_REPLICA_NAME'],
+        # Tests : le réplica est la base de test du primaire
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = ['replica'] if 'replica' in DATABASES else []
+# Partitionnement par utilisateur (task/shards.py) : TASK_SHARDS=4 répartit
+# les tâches sur db.shard0.sqlite3 ... db.shard3.sqlite3 ; comptes et
+# sessions restent dans la base default. Migrer avec migrate_shards.
+for _index in range(int(os.environ.get('TASK_SHARDS', 0))):
+    DATABASES[f'shard{_index}'] = {
+        **DATABASES['default'],
+        'NAME': BASE_DIR / f'db.shard{_index}.sqlite3',
+    }
+
+TASK_SHARDS = [alias for alias in DATABASES if alias.startswith('shard')]
+TASK_SHARD_CACHE_TIMEOUT = 300    # secondes ; affectation utilisateur -> shard
+
+# Partitionnement d'abord : il ne répond que pour les modèles de tâches
+DATABASE_ROUTERS = ['task.shards.ShardRouter', 'task.replicas.PrimaryReplicaRouter']
+REPLICA_MAX_LAG = 2               # secondes ; au-delà, lectures sur le primaire
+REPLICA_LAG_CHECK_INTERVAL = 1    # secondes entre deux mesures du retard
+# Lectures épinglées au primaire après une écriture ; au moins REPLICA_MAX_LAG
+REPLICA_PIN_SECONDS = REPLICA_MAX_LAG + 3
+# Cache des épinglages : partagé entre workers (fichier avec TASK_CACHE_DIR,
+# Redis, Memcached), sinon la lecture suivante peut aller au réplica
+REPLICA_PIN_CACHE_ALIAS = 'sessions'
+
+# Profil SQLite appliqué à chaque connexion (task/db.py) : WAL pour que les
+# lectures ne bloquent plus l'écrivain, attente du verrou au lieu de
+# "database is locked", cache de pages et mmap plus grands.
+# Mettre SQLITE_PRAGMAS = {} pour revenir aux réglages par défaut de SQLite.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,           # ms
+    'mmap_size': 256 * 1024 * 1024,  # octets
+    'cache_size': -20000,           # en KiB quand négatif (~20 Mo)
+    'temp_store': 'memory',
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+#
+# L'alias "tasks" garde les listes de tâches sérialisées (task/cache.py) :
+# éviction LRU au-delà de MAX_ENTRIES et expiration après TIMEOUT secondes.
+# Avec plusieurs processus, définir TASK_CACHE_DIR pour partager un cache
+# fichier : LocMem est propre à chaque processus.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'default',
+    },
+    'tasks': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tasks',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    },
+    # Jetons et compteur d'écritures de la limitation de débit (task/ratelimit.py)
+    'ratelimit': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ratelimit',
+    },
+    # Sessions (cached_db) et utilisateurs connectés (task/auth.py)
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sessions',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+if os.environ.get('TASK_CACHE_DIR'):
+    CACHES['tasks'].update({
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ['TASK_CACHE_DIR'],
+    })
+    CACHES['sessions'].update({
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(os.environ['TASK_CACHE_DIR'], 'sessions'),
+    })
+    CACHES['ratelimit'].update({
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(os.environ['TASK_CACHE_DIR'], 'ratelimit'),
+    })
+
+
+# Sessions et authentification
+# https://docs.djangoproject.com/en/4.2/topics/http/sessions/#using-cached-sessions
+#
+# cached_db : lecture de la session dans le cache, écriture en cache et en
+# base (rien n'est perdu si le cache est vidé). L'utilisateur connecté est
+# lui aussi mis en cache, invalidé à chaque modification (task/auth.py) :
+# une requête API authentifiée ne coûte plus aucune requête SQL avant la vue.
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+
+AUTHENTICATION_BACKENDS = [
+    'task.auth.CachedModelBackend',
+    # Sessions ouvertes avant l'activation du cache (chemin du backend enregistré dans la session)
+    'django.contrib.auth.backends.ModelBackend',
+]
+TASK_USER_CACHE_ALIAS = 'sessions'
+TASK_USER_CACHE_TIMEOUT = 300
+# Sur un cache propre au processus (LocMem), l'invalidation n'atteint pas les
+# autres workers : l'utilisateur n'y est gardé que quelques secondes. En
+# production avec plusieurs workers, TASK_CACHE_DIR ou un cache partagé
+# (check task.W001).
+TASK_USER_CACHE_LOCAL_TIMEOUT = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -132,6 +272,23 @@ STATICFILES_DIRS = [
     BASE_DIR / "task" / "static",
 ]
 
+# Production : composants React précompilés (npm run build, voir build.js) au
+# lieu de Babel dans le navigateur, fichiers statiques hachés et précompressés
+# par collectstatic (task/storage.py). À activer explicitement : task/dist
+# n'est pas versionné. Bundle absent du manifeste : retour à Babel (voir
+# task/context_processors.py).
+TASK_JS_BUNDLE = os.environ.get('TASK_JS_BUNDLE', '0').lower() in ('1', 'true')
+
+if TASK_JS_BUNDLE:
+    STORAGES = {
+        'default': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        },
+        'staticfiles': {
+            'BACKEND': 'task.storage.CompressedManifestStaticFilesStorage',
+        },
+    }
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -152,4 +309,69 @@ LOGIN_REDIRECT_URL = 'index'  # ← OPTIONNEL : redirection après login réussi
 LOGOUT_REDIRECT_URL = 'index'  # ← OPTIONNEL : redirection après logout
 
 # CORS (pour dev uniquement)
-CORS_ALLOW_ALL_ORIGINS = True
\ No newline at end of file
+CORS_ALLOW_ALL_ORIGINS = True
+
+# Synchronisation : durée de conservation des tombstones de tâches supprimées
+# (voir la commande compact_tombstones)
+TASK_TOMBSTONE_RETENTION_DAYS = 30
+
+# Archivage (commande archive_tasks) : tâches terminées depuis plus de N jours
+TASK_ARCHIVE_AFTER_DAYS = 30
+
+# Mises à jour en direct (SSE, /api/tasks/events/, ASGI uniquement)
+TASK_EVENTS_HEARTBEAT = 15        # secondes entre deux heartbeats
+TASK_EVENTS_IDLE_TIMEOUT = 300    # fermeture du flux après ce délai sans événement
+TASK_EVENTS_MAX_AGE = 900         # durée maximale d'un flux (client parti sans être détecté)
+TASK_EVENTS_QUEUE_SIZE = 100      # événements en attente par abonné avant reset
+TASK_EVENTS_HISTORY = 200         # événements gardés par utilisateur pour Last-Event-ID
+
+# Rappels à l'heure des tâches (task/reminders.py, commande run_reminders)
+# Backends : task.reminders.LogBackend, task.reminders.FileBackend
+# (TASK_REMINDER_BACKEND_OPTIONS = {'path': ...}) ou une classe maison
+TASK_REMINDER_BACKEND = 'task.reminders.LogBackend'
+TASK_REMINDER_BACKEND_OPTIONS = {}
+TASK_REMINDER_LOOKBACK = 300      # secondes rattrapées après un arrêt
+TASK_REMINDER_LEAD = 0            # secondes d'avance sur l'heure de la tâche
+TASK_REMINDER_BATCH_SIZE = 500
+
+# Limitation de débit de l'API (task/ratelimit.py) : par utilisateur,
+# (jetons par seconde, rafale) pour les lectures et pour les écritures, et
+# nombre maximal d'écritures simultanées tous workers confondus (503 au-delà).
+# Avec plusieurs workers, RATELIMIT_CACHE_ALIAS doit désigner un cache partagé
+# (fichier avec TASK_CACHE_DIR, Redis, Memcached ; check task.W001), sinon
+# chaque worker applique son propre budget.
+RATELIMIT_ENABLED = True
+RATE_LIMITS = {
+    'read': (20, 60),
+    'write': (5, 20),
+}
+WRITE_CONCURRENCY_LIMIT = 4
+RATELIMIT_CACHE_ALIAS = 'ratelimit'
+
+# Instrumentation des requêtes (task/middleware.py) : en-tête Server-Timing
+# et journal des requêtes lentes (logger "task.timing")
+REQUEST_TIMING_HEADER = True
+REQUEST_TIMING_SLOW_MS = 500       # None pour désactiver le journal
+REQUEST_TIMING_SAMPLE_RATE = float(os.environ.get('REQUEST_TIMING_SAMPLE_RATE', 1.0))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'task.timing': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        'task.reminders': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}